@@ -6,13 +6,18 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
-from app.db.config import DB_URL
+from app.core.setting import load_database_config
+from app.db.config import database_url
 from app.auth import models
+from app.tasks import models as task_models
+from app.behaviors import models as behavior_models
+from app.summaries import models as summary_models
 from app.db.base import Base
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", DB_URL)
+# only the postgres secrets are read, not the whole app settings
+config.set_main_option("sqlalchemy.url", database_url(load_database_config()))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -24,6 +29,12 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
+# tables only migrations write (audit trails of data fixes), never mapped;
+# autogenerate must not offer to drop them
+MIGRATION_ONLY_TABLES = {"auth_identity_email_conflicts"}
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and name in MIGRATION_ONLY_TABLES)
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -47,6 +58,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -56,7 +68,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,69 @@
+"""resolve case variant auth emails
+
+Revision ID: 2f4b9c1d7e36
+Revises: 924eed278d58
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f4b9c1d7e36'
+down_revision: Union[str, Sequence[str], None] = '924eed278d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Emails were stored as typed, so (provider, email) allowed identities that
+    # differ only by case; the next revision makes (provider, lower(email))
+    # unique. Per group the verified (then oldest) identity keeps its email,
+    # the others get an undeliverable placeholder and are recorded here with
+    # their original email for manual follow up (downgrade puts them back).
+    op.create_table(
+        'auth_identity_email_conflicts',
+        sa.Column('auth_id', sa.UUID(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('kept_auth_id', sa.UUID(), nullable=False),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('auth_id'),
+    )
+    op.execute("""
+        INSERT INTO auth_identity_email_conflicts (auth_id, email, kept_auth_id)
+        SELECT auth_id, email, kept_auth_id
+        FROM (
+            SELECT
+                auth_id,
+                email,
+                first_value(auth_id) OVER identities AS kept_auth_id,
+                row_number() OVER identities AS rank
+            FROM auth_identity
+            WINDOW identities AS (
+                PARTITION BY provider, lower(email)
+                ORDER BY is_verified DESC, created_at, auth_id
+            )
+        ) AS ranked
+        WHERE rank > 1
+    """)
+    op.execute("""
+        UPDATE auth_identity
+        SET email = 'duplicate+' || auth_identity.auth_id || '@invalid'
+        FROM auth_identity_email_conflicts AS conflicts
+        WHERE conflicts.auth_id = auth_identity.auth_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        UPDATE auth_identity
+        SET email = conflicts.email
+        FROM auth_identity_email_conflicts AS conflicts
+        WHERE conflicts.auth_id = auth_identity.auth_id
+    """)
+    op.drop_table('auth_identity_email_conflicts')
@@ -0,0 +1,64 @@
+"""add auth query indexes
+
+Revision ID: 5b7c2e9d4a10
+Revises: 2f4b9c1d7e36
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7c2e9d4a10'
+down_revision: Union[str, Sequence[str], None] = '2f4b9c1d7e36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside the migration transaction; case variant
+    # duplicates were resolved by 2f4b9c1d7e36
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_auth_identity_provider_email_lower',
+            'auth_identity',
+            ['provider', sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_refresh_tokens_active_user_id',
+            'refresh_tokens',
+            ['user_id'],
+            unique=False,
+            postgresql_where=sa.text('revoked_at IS NULL AND rotated_at IS NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_refresh_tokens_expires_at',
+            'refresh_tokens',
+            ['expires_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_refresh_tokens_rotated_at',
+            'refresh_tokens',
+            ['rotated_at'],
+            unique=False,
+            postgresql_where=sa.text('rotated_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_refresh_tokens_rotated_at', table_name='refresh_tokens', postgresql_concurrently=True)
+        op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens', postgresql_concurrently=True)
+        op.drop_index('ix_refresh_tokens_active_user_id', table_name='refresh_tokens', postgresql_concurrently=True)
+        op.drop_index('ix_auth_identity_provider_email_lower', table_name='auth_identity', postgresql_concurrently=True)
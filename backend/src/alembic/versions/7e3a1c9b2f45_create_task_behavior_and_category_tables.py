@@ -0,0 +1,108 @@
+"""create task, behavior and category tables
+
+Revision ID: 7e3a1c9b2f45
+Revises: 5b7c2e9d4a10
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3a1c9b2f45'
+down_revision: Union[str, Sequence[str], None] = '5b7c2e9d4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def timestamps() -> list[sa.Column]:
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_edited', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    ]
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tasks',
+    sa.Column('task_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('task_name', sa.String(), nullable=False),
+    sa.Column('task_description', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('COMPLETION', 'PENDING', 'UNDUE', 'CANCELLED', name='task_status'), server_default='PENDING', nullable=False),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=True),
+    *timestamps(),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(op.f('ix_tasks_user_id'), 'tasks', ['user_id'], unique=False)
+    op.create_table('behaviors',
+    sa.Column('behavior_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('task_id', sa.UUID(), nullable=True),
+    sa.Column('behavior_name', sa.String(), nullable=False),
+    sa.Column('behavior_description', sa.String(), nullable=True),
+    sa.Column('category', sa.Enum('DIET', 'EXPENSE', 'WORKOUT', 'TECHWORK', name='behavior_category'), nullable=True),
+    *timestamps(),
+    sa.Column('occured_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('source', sa.Enum('USER_LOGGED', 'TASK_CONFIRMED', name='behavior_source'), server_default='USER_LOGGED', nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.task_id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('behavior_id')
+    )
+    op.create_index('ix_behaviors_user_id_occured_at', 'behaviors', ['user_id', 'occured_at'], unique=False)
+    op.create_table('diets',
+    sa.Column('behavior_id', sa.UUID(), nullable=False),
+    sa.Column('diet_name', sa.String(), nullable=False),
+    sa.Column('diet_description', sa.String(), nullable=True),
+    sa.Column('calories', sa.Integer(), nullable=True),
+    *timestamps(),
+    sa.ForeignKeyConstraint(['behavior_id'], ['behaviors.behavior_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('behavior_id')
+    )
+    op.create_table('expenses',
+    sa.Column('behavior_id', sa.UUID(), nullable=False),
+    sa.Column('expense_name', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('expense_description', sa.String(), nullable=True),
+    *timestamps(),
+    sa.CheckConstraint('amount > 0', name='expenses_amount_positive'),
+    sa.ForeignKeyConstraint(['behavior_id'], ['behaviors.behavior_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('behavior_id')
+    )
+    op.create_table('workouts',
+    sa.Column('behavior_id', sa.UUID(), nullable=False),
+    sa.Column('workout_name', sa.String(), nullable=False),
+    sa.Column('workout_description', sa.String(), nullable=True),
+    *timestamps(),
+    sa.ForeignKeyConstraint(['behavior_id'], ['behaviors.behavior_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('behavior_id')
+    )
+    op.create_table('techworks',
+    sa.Column('behavior_id', sa.UUID(), nullable=False),
+    sa.Column('techwork_name', sa.String(), nullable=False),
+    sa.Column('techwork_description', sa.String(), nullable=True),
+    *timestamps(),
+    sa.ForeignKeyConstraint(['behavior_id'], ['behaviors.behavior_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('behavior_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('techworks')
+    op.drop_table('workouts')
+    op.drop_table('expenses')
+    op.drop_table('diets')
+    op.drop_index('ix_behaviors_user_id_occured_at', table_name='behaviors')
+    op.drop_table('behaviors')
+    op.drop_index(op.f('ix_tasks_user_id'), table_name='tasks')
+    op.drop_table('tasks')
+    sa.Enum(name='behavior_source').drop(op.get_bind())
+    sa.Enum(name='behavior_category').drop(op.get_bind())
+    sa.Enum(name='task_status').drop(op.get_bind())
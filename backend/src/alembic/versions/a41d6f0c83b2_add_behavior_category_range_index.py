@@ -0,0 +1,36 @@
+"""add behavior category range index
+
+Revision ID: a41d6f0c83b2
+Revises: 7e3a1c9b2f45
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d6f0c83b2'
+down_revision: Union[str, Sequence[str], None] = '7e3a1c9b2f45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_behaviors_user_id_category_occured_at',
+            'behaviors',
+            ['user_id', 'category', 'occured_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_behaviors_user_id_category_occured_at', table_name='behaviors', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""add daily user summary
+
+Revision ID: c5f29e1d7a63
+Revises: a41d6f0c83b2
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f29e1d7a63'
+down_revision: Union[str, Sequence[str], None] = 'a41d6f0c83b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_user_summary',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('expense_total', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('calories', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('workout_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('techwork_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tasks_total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tasks_completed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_edited', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    # existing rows are summarized with: python -m app.summaries.rebuild
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_user_summary')
@@ -0,0 +1,92 @@
+import datetime
+import logging
+import time
+import uuid
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.analytics.schemas import ExpenseAnalyticsResponse
+from app.core.setting import settings
+
+logger = logging.getLogger("analytics.cache")
+
+# < ------------- Expense analytics cache --------------->
+# Computed responses are cached per user under the user's current "expense
+# version", which every expense write replaces after its commit:
+# - a reader reads the version before querying postgres, so a response built
+#   from data older than a write is stored under a version nobody reads again
+# - the version key outlives any entry (2x the ttl), a version that expired
+#   can't bring back old entries; versions are unique (ns clock), never reused
+# - the UTC day is part of the key, rolling windows end "today"
+# - any redis failure is logged and treated as a miss
+
+EXPENSE_VERSION_KEY = "analytics:expenses:version:{}"
+EXPENSE_ANALYTICS_KEY = "analytics:expenses:{}:{}:{}:{}"
+
+def _enabled(redis_client : Redis | None) -> bool:
+    return redis_client is not None and settings.expense_analytics_cache_enabled
+
+async def get_expense_version(redis_client : Redis | None, user_id : uuid.UUID) -> str | None:
+    """
+    the user's current version, None when the cache is off or unreachable
+    """
+    if not _enabled(redis_client):
+        return None
+    try:
+        version = await redis_client.get(EXPENSE_VERSION_KEY.format(user_id)) # type: ignore
+    except RedisError:
+        logger.warning("Failed to read expense analytics version", exc_info=True)
+        return None
+    return version or "0"
+
+def _analytics_key(user_id : uuid.UUID, version : str, today : datetime.date, days : int) -> str:
+    return EXPENSE_ANALYTICS_KEY.format(user_id, version, today.isoformat(), days)
+
+async def get_cached_expense_analytics(
+    redis_client : Redis | None,
+    user_id : uuid.UUID,
+    version : str | None,
+    today : datetime.date,
+    days : int,
+) -> ExpenseAnalyticsResponse | None:
+    if version is None:
+        return None
+    try:
+        cached = await redis_client.get(_analytics_key(user_id, version, today, days)) # type: ignore
+    except RedisError:
+        logger.warning("Failed to read expense analytics cache", exc_info=True)
+        return None
+    return ExpenseAnalyticsResponse.model_validate_json(cached) if cached else None
+
+async def cache_expense_analytics(
+    redis_client : Redis | None,
+    user_id : uuid.UUID,
+    version : str | None,
+    today : datetime.date,
+    days : int,
+    response : ExpenseAnalyticsResponse,
+) -> None:
+    if version is None:
+        return
+    try:
+        await redis_client.set( # type: ignore
+            _analytics_key(user_id, version, today, days),
+            response.model_dump_json(),
+            ex=settings.expense_analytics_cache_ttl_seconds,
+        )
+    except RedisError:
+        logger.warning("Failed to cache expense analytics", exc_info=True)
+
+async def invalidate_expense_analytics(redis_client : Redis | None, user_id : uuid.UUID) -> None:
+    """
+    after a committed expense write: move the user to a new version
+    """
+    if not _enabled(redis_client):
+        return
+    try:
+        await redis_client.set( # type: ignore
+            EXPENSE_VERSION_KEY.format(user_id),
+            str(time.time_ns()),
+            ex=2 * settings.expense_analytics_cache_ttl_seconds,
+        )
+    except RedisError:
+        logger.warning("Failed to invalidate expense analytics cache", exc_info=True)
@@ -0,0 +1,44 @@
+import datetime
+import uuid
+from typing import Annotated
+from fastapi import APIRouter, Query
+from app.analytics.cache import (
+    cache_expense_analytics,
+    get_cached_expense_analytics,
+    get_expense_version,
+)
+from app.analytics.schemas import ExpenseAnalyticsResponse
+from app.analytics.service import compute_expense_analytics, fetch_expense_series
+from app.auth.dependencies import current_user, redis_client
+from app.core.enums import EXPENSE_ANALYTICS_DEFAULT_DAYS, EXPENSE_ANALYTICS_MAX_DAYS
+from app.db.config import release_connection
+from app.db.dependencies import DbSession
+
+router = APIRouter()
+
+@router.get('/expenses', response_model=ExpenseAnalyticsResponse)
+async def get_expense_analytics(
+    user_id : current_user,
+    session : DbSession,
+    redis_client : redis_client,
+    days : Annotated[int, Query(ge=1, le=EXPENSE_ANALYTICS_MAX_DAYS)] = EXPENSE_ANALYTICS_DEFAULT_DAYS,
+    ):
+    """
+    Spending of the last ?days= UTC days: daily totals with 7/30 day rolling
+    averages, month over month totals, percentiles per expense name and
+    anomalous expenses. Cached per user until the next expense write.
+    """
+    owner_id = uuid.UUID(user_id)
+    today = datetime.datetime.now(datetime.UTC).date()
+    # read before postgres, see app.analytics.cache
+    version = await get_expense_version(redis_client, owner_id)
+    cached = await get_cached_expense_analytics(redis_client, owner_id, version, today, days)
+    if cached is not None:
+        return cached
+    
+    series = await fetch_expense_series(session, owner_id)
+    # the numpy part needs no connection
+    await release_connection(session)
+    response = compute_expense_analytics(series, today, days)
+    await cache_expense_analytics(redis_client, owner_id, version, today, days, response)
+    return response
@@ -0,0 +1,46 @@
+import datetime
+import uuid
+from typing import Optional
+from pydantic import BaseModel
+
+# amounts are rounded floats: these are statistics, not ledger values
+
+class ExpenseDay(BaseModel):
+    day : datetime.date
+    total : float
+    # mean daily spend of the 7 / 30 days ending on day
+    rolling_7d_avg : float
+    rolling_30d_avg : float
+
+class ExpenseMonth(BaseModel):
+    month : str # YYYY-MM
+    total : float
+    # change from the previous month, delta_pct null when it had no expenses
+    delta : float
+    delta_pct : Optional[float] = None
+
+class ExpenseCategoryStats(BaseModel):
+    name : str
+    count : int
+    total : float
+    p50 : float
+    p90 : float
+    p99 : float
+
+class ExpenseAnomaly(BaseModel):
+    behavior_id : uuid.UUID
+    day : datetime.date
+    name : str
+    amount : float
+    category_median : float
+    # robust z score against the category, median / MAD based
+    score : float
+
+class ExpenseAnalyticsResponse(BaseModel):
+    message : str
+    days : int
+    expense_count : int
+    daily : list[ExpenseDay]
+    monthly : list[ExpenseMonth]
+    categories : list[ExpenseCategoryStats]
+    anomalies : list[ExpenseAnomaly]
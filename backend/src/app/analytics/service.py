@@ -0,0 +1,224 @@
+import datetime
+import uuid
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import Float, Integer, cast, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.analytics.schemas import (
+    ExpenseAnalyticsResponse,
+    ExpenseAnomaly,
+    ExpenseCategoryStats,
+    ExpenseDay,
+    ExpenseMonth,
+)
+from app.behaviors.models import Behavior, Expense
+from app.core.enums import BehaviorCategory
+from app.core.exceptions import ServerError
+
+# < ------------- Expense analytics --------------->
+# A user's expenses are fetched once as a handful of arrays (one array_agg
+# per column, a single row back) and every statistic is computed on those
+# arrays with numpy: bincount for per day / per month totals, cumsum for
+# rolling windows, one sort for all per-category percentiles. Nothing
+# loops over rows in Python, so the cost grows with the number of days and
+# categories in the response, not the number of expenses.
+#
+# "category" is the expense_name, trimmed and lowercased. Postgres sends a
+# 64 bit hash of it along, grouping runs on that int64 array instead of
+# sorting Python strings (which would cost more than every statistic together).
+
+EPOCH = datetime.date(1970, 1, 1)
+ROLLING_WINDOWS = (7, 30)
+CATEGORY_QUANTILES = (0.5, 0.9, 0.99)
+TOP_CATEGORIES = 20
+MONTHS = 12
+# robust z score (median / MAD) above which an expense is an anomaly,
+# only for categories with enough expenses to have a median worth the name
+ANOMALY_SCORE = 3.5
+ANOMALY_MIN_SAMPLES = 8
+MAX_ANOMALIES = 50
+
+@dataclass
+class ExpenseSeries:
+    behavior_ids : np.ndarray # object, uuid.UUID
+    days : np.ndarray # int64, UTC days since 1970-01-01
+    amounts : np.ndarray # float64
+    names : np.ndarray # object, str
+    name_keys : np.ndarray # int64, one per distinct name
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+async def fetch_expense_series(session : AsyncSession, user_id : uuid.UUID) -> ExpenseSeries:
+    """
+    every expense of the user, one query, one row of arrays
+    """
+    name = func.lower(func.btrim(Expense.expense_name))
+    stmt = (
+        select(
+            func.array_agg(Behavior.behavior_id),
+            func.array_agg(cast(func.floor(func.extract("epoch", Behavior.occured_at) / 86400), Integer)),
+            func.array_agg(cast(Expense.amount, Float)),
+            func.array_agg(name),
+            func.array_agg(func.hashtextextended(name, 0)),
+        )
+        .select_from(Behavior)
+        .join(Expense, Expense.behavior_id == Behavior.behavior_id)
+        .where(Behavior.user_id == user_id, Behavior.category == BehaviorCategory.EXPENSE)
+    )
+    try:
+        behavior_ids, days, amounts, names, name_keys = (await session.execute(stmt)).one()
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve expenses : {str(e)}",
+            code="EXPENSE_FETCH_FAILED",
+        )
+    return ExpenseSeries(
+        behavior_ids=np.array(behavior_ids or [], dtype=object),
+        days=np.array(days or [], dtype=np.int64),
+        amounts=np.array(amounts or [], dtype=np.float64),
+        names=np.array(names or [], dtype=object),
+        name_keys=np.array(name_keys or [], dtype=np.int64),
+    )
+
+def group_quantiles(codes : np.ndarray, values : np.ndarray, groups : int, quantiles) -> np.ndarray:
+    """
+    (groups, len(quantiles)) quantiles of values per group code, linear
+    interpolation like np.quantile; every code in range(groups) must occur
+    """
+    # values first (unstable, only equal values trade places), then a stable
+    # sort by group, a radix sort while the codes fit in 16 bits: ~5x lexsort
+    order = np.argsort(values)
+    group_codes = codes.astype(np.int16 if groups <= np.iinfo(np.int16).max else np.int64)
+    order = order[np.argsort(group_codes[order], kind="stable")]
+    ordered = values[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.cumsum(counts) - counts
+    position = starts[:, None] + np.asarray(quantiles)[None, :] * (counts[:, None] - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def rolling_mean(totals : np.ndarray, window : int) -> np.ndarray:
+    """
+    mean of the window days ending at each day, from totals[window - 1] on
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(totals)))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+def daily_stats(series : ExpenseSeries, first_day : int, last_day : int) -> list[ExpenseDay]:
+    longest = max(ROLLING_WINDOWS)
+    start = first_day - longest + 1
+    in_range = (series.days >= start) & (series.days <= last_day)
+    totals = np.bincount(
+        series.days[in_range] - start,
+        weights=series.amounts[in_range],
+        minlength=last_day - start + 1,
+    )
+    shown = slice(longest - 1, None)
+    averages = {window : rolling_mean(totals, window)[longest - window:] for window in ROLLING_WINDOWS}
+    return [
+        ExpenseDay(
+            day=EPOCH + datetime.timedelta(days=int(day)),
+            total=round(float(total), 2),
+            rolling_7d_avg=round(float(avg_7), 2),
+            rolling_30d_avg=round(float(avg_30), 2),
+        )
+        for day, total, avg_7, avg_30 in zip(
+            range(first_day, last_day + 1), totals[shown], averages[7], averages[30],
+        )
+    ]
+
+def monthly_stats(series : ExpenseSeries, last_day : int) -> list[ExpenseMonth]:
+    months = series.days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    last_month = int(np.datetime64(last_day, "D").astype("datetime64[M]").astype(np.int64))
+    # one month more than shown, the first shown month needs its predecessor
+    start = last_month - MONTHS
+    in_range = (months >= start) & (months <= last_month)
+    totals = np.bincount(months[in_range] - start, weights=series.amounts[in_range], minlength=MONTHS + 1)
+    deltas = np.diff(totals)
+    previous = totals[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(previous > 0, deltas / previous, np.nan)
+    return [
+        ExpenseMonth(
+            month=str(np.datetime64(month, "M")),
+            total=round(float(total), 2),
+            delta=round(float(delta), 2),
+            delta_pct=None if np.isnan(ratio) else round(float(ratio) * 100, 2),
+        )
+        for month, total, delta, ratio in zip(range(start + 1, last_month + 1), totals[1:], deltas, ratios)
+    ]
+
+def category_and_anomaly_stats(
+    series : ExpenseSeries,
+    first_day : int,
+) -> tuple[list[ExpenseCategoryStats], list[ExpenseAnomaly]]:
+    _, first, codes = np.unique(series.name_keys, return_index=True, return_inverse=True)
+    names = series.names[first]
+    groups = len(names)
+    counts = np.bincount(codes, minlength=groups)
+    totals = np.bincount(codes, weights=series.amounts, minlength=groups)
+    quantiles = group_quantiles(codes, series.amounts, groups, CATEGORY_QUANTILES)
+    top = np.argsort(-totals, kind="stable")[:TOP_CATEGORIES]
+    categories = [
+        ExpenseCategoryStats(
+            name=str(names[group]),
+            count=int(counts[group]),
+            total=round(float(totals[group]), 2),
+            p50=round(float(quantiles[group, 0]), 2),
+            p90=round(float(quantiles[group, 1]), 2),
+            p99=round(float(quantiles[group, 2]), 2),
+        )
+        for group in top
+    ]
+
+    # robust z score per expense against its own category
+    medians = quantiles[:, 0][codes]
+    deviations = np.abs(series.amounts - medians)
+    mads = group_quantiles(codes, deviations, groups, (0.5,))[:, 0][codes]
+    eligible = (counts[codes] >= ANOMALY_MIN_SAMPLES) & (mads > 0) & (series.days >= first_day)
+    scores = np.zeros(len(series))
+    scores[eligible] = 0.6745 * deviations[eligible] / mads[eligible]
+    flagged = np.flatnonzero(scores > ANOMALY_SCORE)
+    # newest first, then highest score
+    flagged = flagged[np.lexsort((-scores[flagged], -series.days[flagged]))][:MAX_ANOMALIES]
+    anomalies = [
+        ExpenseAnomaly(
+            behavior_id=series.behavior_ids[index],
+            day=EPOCH + datetime.timedelta(days=int(series.days[index])),
+            name=str(series.names[index]),
+            amount=round(float(series.amounts[index]), 2),
+            category_median=round(float(medians[index]), 2),
+            score=round(float(scores[index]), 2),
+        )
+        for index in flagged
+    ]
+    return categories, anomalies
+
+def compute_expense_analytics(
+    series : ExpenseSeries,
+    today : datetime.date,
+    days : int,
+) -> ExpenseAnalyticsResponse:
+    """
+    daily totals and rolling averages for the last `days` days up to today,
+    the last MONTHS months with their change, percentiles per category and
+    anomalies of the last `days` days
+    """
+    last_day = (today - EPOCH).days
+    first_day = last_day - days + 1
+    if len(series) == 0:
+        categories, anomalies = [], []
+    else:
+        categories, anomalies = category_and_anomaly_stats(series, first_day)
+    return ExpenseAnalyticsResponse(
+        message="Expense analytics computed",
+        days=days,
+        expense_count=len(series),
+        daily=daily_stats(series, first_day, last_day),
+        monthly=monthly_stats(series, last_day),
+        categories=categories,
+        anomalies=anomalies,
+    )
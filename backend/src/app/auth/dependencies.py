@@ -1,7 +1,8 @@
 from typing import Annotated
 from fastapi import Depends, Request
 from httpx import AsyncClient
-from app.auth.security import decode_access_token
+from app.auth.security import decode_access_token_cached
+from app.auth.revocation import session_denylist
 from app.core.exceptions import AuthError
 from redis.asyncio import Redis
 
@@ -15,7 +16,7 @@ async def get_current_user(request : Request):
         else:
             raise AuthError("Access token required", code="MISSING_ACCESS_TOKEN")
     
-    payload = decode_access_token(token)
+    payload = decode_access_token_cached(token)
     
     user_id = payload.get("sub")
     session_id = payload.get("session_id")
@@ -24,6 +25,10 @@ async def get_current_user(request : Request):
     if not user_id:
         raise AuthError("Invalid token payload", code="INVALID_ACCESS_TOKEN_PAYLOAD")
     
+    # in-memory check, kept in sync through redis by app.auth.revocation
+    if session_id and session_denylist.is_revoked(session_id):
+        raise AuthError("Session has been revoked", code="SESSION_REVOKED")
+    
     # Inject into request context
     request.state.user_id = user_id
     request.state.session_id = session_id
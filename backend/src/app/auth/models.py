@@ -2,7 +2,7 @@ from tkinter import CASCADE
 from typing import List
 from app.db.base import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import DateTime, ForeignKey, Enum, false, func, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Enum, Index, false, func, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.enums import AuthProvider
 import uuid
@@ -80,6 +80,15 @@ class AuthIdentity(Base):
     )
     
     user : Mapped["User"] = relationship(back_populates="auth_identities")
+
+# email lookups (get_user_by_email) are case insensitive: one identity per
+# provider and lower(email), which also serves them
+Index(
+    "ix_auth_identity_provider_email_lower",
+    AuthIdentity.provider,
+    func.lower(AuthIdentity.email),
+    unique=True,
+)
   
   ## RefreshToken
 
@@ -134,4 +143,18 @@ class RefreshToken(Base):
     ip_address : Mapped[str] = mapped_column(nullable=True)
     user_agent : Mapped[str] = mapped_column(nullable=True)
     
-    user : Mapped["User"] = relationship(back_populates="refresh_tokens")
\ No newline at end of file
+    user : Mapped["User"] = relationship(back_populates="refresh_tokens")
+
+# revoke_all_auth_session only touches active rows
+Index(
+    "ix_refresh_tokens_active_user_id",
+    RefreshToken.user_id,
+    postgresql_where=(RefreshToken.revoked_at.is_(None) & RefreshToken.rotated_at.is_(None)),
+)
+# retention purge (app.auth.retention)
+Index("ix_refresh_tokens_expires_at", RefreshToken.expires_at)
+Index(
+    "ix_refresh_tokens_rotated_at",
+    RefreshToken.rotated_at,
+    postgresql_where=RefreshToken.rotated_at.is_not(None),
+)
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field, replace
+from sqlalchemy import delete, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.auth.models import RefreshToken
+from app.core.exceptions import ServerError
+from app.core.logging import setup_logging
+from app.core.setting import RefreshTokenPurgeConfig, settings
+from app.db.config import dispose_engine, get_sessionmaker
+
+logger = logging.getLogger("auth.retention")
+
+# < ------------- Refresh token retention --------------->
+# Every /refresh leaves the rotated row behind. Rows past expires_at can never
+# be used again, and rotated rows only matter for reuse detection, so both are
+# deleted after config.rotated_grace_minutes. Once a rotated row is purged a
+# replay of that token is "not found" instead of "reuse detected".
+#
+# Deletes run in batches of config.batch_size, one transaction per batch, and
+# pick rows with FOR UPDATE SKIP LOCKED so concurrent purgers (one per api
+# worker) and in-flight rotations never wait on each other.
+
+@dataclass
+class PurgeReport:
+    rows_purged : int = 0
+    batches : int = 0
+    batch_ms : list[float] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(self.batch_ms), 2)
+
+async def purge_refresh_token_batch(
+    session : AsyncSession,
+    batch_size : int,
+    rotated_grace : datetime.timedelta,
+) -> int:
+    """
+    delete up to batch_size expired or long rotated rows, returns rows deleted
+    """
+    now = datetime.datetime.now(datetime.UTC)
+    try:
+        purgeable = (
+            select(RefreshToken.token_id)
+            .where(
+                or_(
+                    RefreshToken.expires_at < now,
+                    RefreshToken.rotated_at < now - rotated_grace,
+                )
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(RefreshToken).where(RefreshToken.token_id.in_(purgeable.scalar_subquery()))
+        result = await session.execute(stmt)
+        await session.commit()
+        return result.rowcount # type: ignore
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to purge refresh tokens : {str(e)}",
+            code="REFRESH_TOKEN_PURGE_FAILED",
+        )
+
+async def purge_refresh_tokens(
+    session_factory : async_sessionmaker,
+    config : RefreshTokenPurgeConfig | None = None,
+    max_batches : int | None = None,
+) -> PurgeReport:
+    """
+    purge batch after batch until a batch comes back short
+    """
+    config = config or settings.refresh_token_purge
+    rotated_grace = datetime.timedelta(minutes=config.rotated_grace_minutes)
+    report = PurgeReport()
+
+    async with session_factory() as session:
+        while max_batches is None or report.batches < max_batches:
+            start = time.perf_counter()
+            purged = await purge_refresh_token_batch(session, config.batch_size, rotated_grace)
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+
+            report.rows_purged += purged
+            report.batches += 1
+            report.batch_ms.append(elapsed_ms)
+            logger.info(
+                "Purged refresh token batch",
+                extra={"rows" : purged, "duration_ms" : elapsed_ms},
+            )
+            if purged < config.batch_size:
+                break
+
+    logger.info(
+        "Refresh token purge finished",
+        extra={
+            "rows" : report.rows_purged,
+            "batches" : report.batches,
+            "duration_ms" : report.total_ms,
+        },
+    )
+    return report
+
+async def purge_refresh_tokens_periodically(session_factory : async_sessionmaker) -> None:
+    """
+    in-app schedule, started from the lifespan when interval_seconds > 0
+    """
+    interval = settings.refresh_token_purge.interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await purge_refresh_tokens(session_factory)
+        except ServerError:
+            logger.exception("Scheduled refresh token purge failed")
+
+async def main(batch_size : int | None, max_batches : int | None) -> None:
+    """
+    one-off purge: python -m app.auth.retention [--batch-size N] [--max-batches N]
+    """
+    setup_logging(settings.log_level, settings.logging)
+    config = settings.refresh_token_purge
+    if batch_size:
+        config = replace(config, batch_size=batch_size)
+    try:
+        report = await purge_refresh_tokens(get_sessionmaker(), config, max_batches)
+    finally:
+        await dispose_engine()
+    print(json.dumps(asdict(report) | {"total_ms" : report.total_ms}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge expired and rotated refresh tokens")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.max_batches))
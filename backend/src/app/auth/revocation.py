@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import time
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.setting import settings
+
+logger = logging.getLogger("auth.revocation")
+
+# < ------------- Revoked session denylist --------------->
+# Access tokens stay valid until exp, so revoking a refresh session alone
+# leaves its access tokens usable. Revoked session_ids are kept in
+# - a redis sorted set (member=session_id, score=unix time after which no
+#   access token of that session can still be valid) as the durable copy
+# - a pub/sub channel to push new revocations to every worker right away
+# and every worker mirrors them in memory, so get_current_user checks a dict
+# without any network I/O. A periodic snapshot of the sorted set covers
+# messages missed while the subscription was down, which bounds the delay
+# to settings.revocation_snapshot_seconds in the worst case.
+
+REVOKED_SESSIONS_KEY = "auth:revoked_sessions"
+REVOKED_SESSIONS_CHANNEL = "auth:revoked_sessions:events"
+
+async def publish_revoked_sessions(
+    redis_client : Redis | None,
+    session_ids : list[str],
+) -> None:
+    """
+    add session_ids to the denylist and notify every worker
+    """
+    if redis_client is None or not session_ids:
+        return
+    now = time.time()
+    # no access token outlives its session's revocation by more than this
+    expires_at = now + settings.access_token_expires_minutes * 60
+    revoked = {session_id : expires_at for session_id in set(session_ids)}
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(REVOKED_SESSIONS_KEY, revoked) # type: ignore
+            pipe.zremrangebyscore(REVOKED_SESSIONS_KEY, "-inf", now)
+            pipe.publish(REVOKED_SESSIONS_CHANNEL, json.dumps(revoked))
+            await pipe.execute()
+    except RedisError:
+        # refresh tokens are already revoked in postgres, access tokens
+        # of these sessions just live until exp as before
+        logger.error("Failed to publish revoked sessions", exc_info=True)
+
+class SessionDenylist:
+    """
+    per worker mirror of the revoked session sorted set
+    """
+    def __init__(self, snapshot_seconds : float | None = None):
+        # None -> settings.revocation_snapshot_seconds, read on first use
+        self._snapshot_seconds = snapshot_seconds
+        self._revoked : dict[str, float] = {}
+        self._tasks : list[asyncio.Task] = []
+
+    @property
+    def snapshot_seconds(self) -> float:
+        if self._snapshot_seconds is None:
+            self._snapshot_seconds = settings.revocation_snapshot_seconds
+        return self._snapshot_seconds
+
+    def is_revoked(self, session_id : str) -> bool:
+        expires_at = self._revoked.get(session_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            self._revoked.pop(session_id, None)
+            return False
+        return True
+
+    def add(self, revoked : dict[str, float]) -> None:
+        self._revoked.update(revoked)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def start(self, redis_client : Redis) -> None:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        # subscribe before the first snapshot so nothing falls in between
+        await pubsub.subscribe(REVOKED_SESSIONS_CHANNEL)
+        await self.snapshot(redis_client)
+        self._tasks = [
+            asyncio.create_task(self._listen(pubsub)),
+            asyncio.create_task(self._snapshot_periodically(redis_client)),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def snapshot(self, redis_client : Redis) -> None:
+        now = time.time()
+        try:
+            entries = await redis_client.zrangebyscore(
+                REVOKED_SESSIONS_KEY, now, "+inf", withscores=True,
+            )
+        except RedisError:
+            logger.warning("Failed to snapshot revoked sessions", exc_info=True)
+            return
+        # revocations are never undone, merging is enough; drop expired ones
+        self._revoked = {
+            session_id : expires_at
+            for session_id, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        self.add(dict(entries))
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.add(json.loads(message["data"]))
+                except RedisError:
+                    # pubsub reconnects and resubscribes on the next read
+                    logger.warning("Revoked session subscription lost", exc_info=True)
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+    async def _snapshot_periodically(self, redis_client : Redis) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            await self.snapshot(redis_client)
+
+session_denylist = SessionDenylist()
@@ -1,5 +1,6 @@
 from fastapi import (
     APIRouter,
+    Depends,
     Request,
     Response, 
     status,
@@ -18,7 +19,6 @@ from app.auth.utils import (
     extract_refresh_token,
     fetch_and_verify_pending_user_from_redis,
     resend_otp_using_redis,
-    send_otp_to_user,
     set_access_and_refresh_token_in_cookie,
     set_new_refresh_token_with_rotation,
     signout_user,
@@ -26,17 +26,21 @@ from app.auth.utils import (
     store_data_in_redis_signup,
     verify_credentinal_for_email_signup,
     verify_credentinal_for_email_signin,
-    authenticate_refresh_token,
+    rotate_and_issue_tokens,
 )
 from app.auth.security import (
     generate_numeric_otp, 
-    hash_password,
+    hash_password_async,
 )
-from app.db.config import DbSession
-from app.auth.dependencies import (
-    redis_client,
-    httpx_client,
+from app.db.dependencies import DbSession
+from app.core.rate_limit import (
+    FixedWindow,
+    SlidingWindow,
+    TokenBucket,
+    rate_limit,
 )
+from app.auth.dependencies import redis_client
+from app.email.outbox import enqueue_otp_email
 
 router = APIRouter()
 ### Server Logic
@@ -65,20 +69,19 @@ async def email_signup(
     session : DbSession, 
     user_data : AuthEmailSignUpInitRequest,
     redis_client : redis_client,
-    httpx_client : httpx_client,
     ):
     
     # check is email exists or not
     await verify_credentinal_for_email_signup(session,user_data)
     
     # hash the password
-    password_hash = hash_password(user_data.password)
+    password_hash = await hash_password_async(user_data.password)
     
     # generate otp
     otp = generate_numeric_otp()
     
-    # send otp to user's email
-    await send_otp_to_user(str(otp), httpx_client, user_data.email)
+    # queue otp email, delivered by app.email.worker
+    await enqueue_otp_email(redis_client, user_data.email, str(otp))
     
     # Store temporary record in redis to remember state 
     # - (verification_id, email, username, password_hash, otp_hash, issued_at ,expired_at, attempts)
@@ -95,12 +98,18 @@ async def email_signup(
         "verification_id" : verification_id,
     }
 
-@router.post('/email/signin', response_model=AuthEmailInitResponse)
+@router.post(
+    '/email/signin', 
+    response_model=AuthEmailInitResponse,
+    dependencies=[
+        Depends(rate_limit("signin:email", SlidingWindow(limit=10, window_seconds=15 * 60), key="email")),
+        Depends(rate_limit("signin:ip", FixedWindow(limit=30, window_seconds=60), key="ip")),
+    ],
+)
 async def email_signin(
     session : DbSession, 
     user_data : AuthEmailSignInInitRequest,
     redis_client : redis_client,
-    httpx_client : httpx_client,
     ):
     
     # Verify credentials
@@ -118,8 +127,8 @@ async def email_signin(
         otp=otp,
         email=user_data.email,
     )
-    # send email to client
-    await send_otp_to_user(str(otp), httpx_client, user_data.email)
+    # queue email to client, delivered by app.email.worker
+    await enqueue_otp_email(redis_client, user_data.email, str(otp))
     
     return {
         "message" : "OTP sent successfully! Please check your email",
@@ -173,6 +182,7 @@ async def verify_otp(
         user_id=user_id, # type: ignore
         user_agent = user_agent,
         rotate=False,
+        redis_client=redis_client,
     )
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
     # Issue session token (cookie)
@@ -185,36 +195,40 @@ async def verify_otp(
     # 7. Return success response with token.
     return response
 
-@router.post('/resend-otp')
+@router.post(
+    '/resend-otp',
+    dependencies=[
+        Depends(rate_limit("resend", FixedWindow(limit=10, window_seconds=15 * 60), key="ip")),
+    ],
+)
 async def resend_otp(
     redis_client : redis_client, 
-    httpx_client : httpx_client, 
     verification_id : str
     ):
     # set up new otp in redis
     new_otp, user_email = await resend_otp_using_redis(redis_client, verification_id)
     
-    # send new otp to the client's email
-    await send_otp_to_user(str(new_otp), httpx_client, user_email)
-    print(new_otp)
+    # queue new otp for the client's email
+    await enqueue_otp_email(redis_client, user_email, str(new_otp))
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
     return response
      
-@router.post('/refresh')
-async def rotate_refresh_token(session : DbSession, request : Request):
+@router.post(
+    '/refresh',
+    dependencies=[
+        Depends(rate_limit("refresh", TokenBucket(capacity=10, refill_per_second=0.2), key="ip")),
+    ],
+)
+async def rotate_refresh_token(
+    session : DbSession, 
+    request : Request,
+    redis_client : redis_client,
+    ):
     # extract refresh token
     refresh_token = await extract_refresh_token(request)
     
-    db_refresh_token = await authenticate_refresh_token(session, refresh_token) # type: ignore
-    
-    new_refresh_token, new_access_token = await set_new_refresh_token_with_rotation(
-        session=session,
-        user_id=db_refresh_token.user_id, # type: ignore
-        session_id=db_refresh_token.session_id, # type: ignore
-        user_agent=db_refresh_token.user_agent, # type: ignore
-        db_refresh_token=db_refresh_token,
-        rotate=True,
-    )
+    # validate, mark rotated and insert the new token in one statement
+    new_refresh_token, new_access_token = await rotate_and_issue_tokens(session, refresh_token, redis_client) # type: ignore
 
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
     # 5. store access_token and new_refresh_token in client's header/cookie and return it.
@@ -228,13 +242,13 @@ async def rotate_refresh_token(session : DbSession, request : Request):
     return response
 
 @router.post('/signout')
-async def signout(session : DbSession, request : Request):
+async def signout(session : DbSession, request : Request, redis_client : redis_client):
     # 1. Extract refresh_token
     refresh_token = await extract_refresh_token(request, not_found_ok=True)
     access_token = request.cookies.get("access_token")
     
     if refresh_token :  
-        await signout_user(session, refresh_token)
+        await signout_user(session, refresh_token, redis_client=redis_client)
         
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
     cookie_payload = {
@@ -256,12 +270,12 @@ async def signout(session : DbSession, request : Request):
     return response
 
 @router.post('/signout-all')
-async def signout_all(session : DbSession, request : Request):
+async def signout_all(session : DbSession, request : Request, redis_client : redis_client):
     refresh_token = await extract_refresh_token(request, not_found_ok=True)
     access_token = request.cookies.get("access_token")
     
     if refresh_token:
-        await signout_user(session, refresh_token, all_session=True)
+        await signout_user(session, refresh_token, all_session=True, redis_client=redis_client)
     
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
     
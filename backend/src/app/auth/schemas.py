@@ -34,11 +34,14 @@ class RedisSignInData(BaseModel):
     user_id : str
     email : str
     otp_hash : str
+    # records written before otp schemes existed are argon2
+    otp_scheme : str = "argon2"
     attempts : int
 
 class RedisSignUpData(BaseModel):
     signup_verification_id : str
     otp_hash : str
+    otp_scheme : str = "argon2"
     username : str
     email : str
     password_hash : str
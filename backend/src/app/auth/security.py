@@ -1,6 +1,12 @@
+import asyncio
 import hashlib
+import hmac
 import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Protocol
 import uuid
 
 import jwt
@@ -45,6 +51,69 @@ def verify_password(password : str, password_hash : str) -> tuple[bool, str | No
     except Exception as e:
         raise Exception(str(e))
 
+#  <---------- Password hashing worker pool ---------->
+# argon2 is CPU bound and holds the event loop for the whole hash, so the
+# async variants below hand the work to a bounded thread/process pool.
+_hash_executor : Executor | None = None
+_hash_pending = 0
+
+def init_hash_executor() -> Executor:
+    """
+    create the password hashing pool configured in settings.hash_pool
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        # LazyCryptContext loads on first use and that load is not thread
+        # safe, so finish it here before any worker thread touches it
+        _pwd_ctx.schemes()
+        config = settings.hash_pool
+        if config.executor == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=config.max_workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=config.max_workers,
+                thread_name_prefix="argon2",
+            )
+    return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True, cancel_futures=True)
+        _hash_executor = None
+
+async def _run_in_hash_pool(func, *args):
+    """
+    run func in the hashing pool; reject when more than
+    max_workers + max_queue jobs are already waiting on it
+    """
+    global _hash_pending
+    config = settings.hash_pool
+    if _hash_pending >= config.max_workers + config.max_queue:
+        raise ServerError(
+            message="Password hashing pool is saturated",
+            code="HASH_POOL_SATURATED",
+            status_code=503,
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(init_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password : str) -> str:
+    """
+    hash_password without blocking the event loop
+    """
+    return await _run_in_hash_pool(hash_password, password)
+
+async def verify_password_async(password : str, password_hash : str) -> tuple[bool, str | None]:
+    """
+    verify_password without blocking the event loop
+    """
+    return await _run_in_hash_pool(verify_password, password, password_hash)
+
 #  <---------- Refresh token ---------->
 def generate_refresh_token() -> str:
     # 265 bits entropy
@@ -99,6 +168,85 @@ def decode_access_token(token : str) -> dict:
     except jwt.InvalidTokenError:
         raise AuthError("Invalid token", code="INVALID_ACCESS_TOKEN")
     
+#  <---------- Verified access token cache ---------->
+# Clients resend the same JWT for its whole lifetime, so keep the verified
+# claims per process and skip the parse + HMAC check on repeat requests.
+class AccessTokenCache:
+    """
+    LRU of verified access token claims, keyed by a digest of the token.
+    An entry is dropped once its token's exp has passed, so expiry is still
+    enforced by decode_access_token on the next lookup.
+    """
+    def __init__(self, max_size : int | None = None):
+        # None -> settings.access_token_cache_size, read on first use so that
+        # importing this module doesn't load the settings
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries : OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+    
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            self._max_size = settings.access_token_cache_size
+        return self._max_size
+    
+    @staticmethod
+    def _key(token : str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, token : str) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, payload = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+    
+    def put(self, token : str, payload : dict) -> None:
+        key = self._key(token)
+        self._entries[key] = (float(payload["exp"]), dict(payload))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+    
+    def stats(self) -> dict:
+        return {
+            "size" : len(self._entries),
+            "max_size" : self.max_size,
+            "hits" : self.hits,
+            "misses" : self.misses,
+        }
+
+access_token_cache = AccessTokenCache()
+
+def decode_access_token_cached(token : str) -> dict:
+    """
+    decode_access_token, served from access_token_cache when enabled
+    (ACCESS_TOKEN_CACHE_ENABLED=false turns the cache off)
+    """
+    if not settings.access_token_cache_enabled:
+        return decode_access_token(token)
+    
+    payload = access_token_cache.get(token)
+    if payload is None:
+        payload = decode_access_token(token)
+        access_token_cache.put(token, payload)
+    return payload
+
 #  <---------- OTP Generation ---------->
 def generate_numeric_otp(length = 6) -> int:
     """
@@ -107,4 +255,71 @@ def generate_numeric_otp(length = 6) -> int:
     otp_range_start = 10**(length-1)
     otp_range_end = 10**length - 1
     
-    return secrets.randbelow(otp_range_end - otp_range_start + 1) + otp_range_start
\ No newline at end of file
+    return secrets.randbelow(otp_range_end - otp_range_start + 1) + otp_range_start
+
+#  <---------- OTP hashing ---------->
+# OTPs are 6 digits, live for minutes and are attempt limited, so argon2 buys
+# little over a keyed digest. The scheme that produced an otp_hash is stored
+# next to it in redis so records survive a change of settings.otp_hash_scheme.
+class OTPHasher(Protocol):
+    scheme : str
+    # same otp -> same hash, so the hash can be compared server side in redis
+    deterministic : bool
+    
+    async def hash(self, otp : str) -> str: ...
+    
+    async def verify(self, otp : str, otp_hash : str) -> bool: ...
+
+class Argon2OTPHasher:
+    scheme = "argon2"
+    deterministic = False
+    
+    async def hash(self, otp : str) -> str:
+        return await hash_password_async(otp)
+    
+    async def verify(self, otp : str, otp_hash : str) -> bool:
+        # no rehash on needs_update, the record is deleted right after
+        valid, _ = await verify_password_async(otp, otp_hash)
+        return valid
+
+class HMACOTPHasher:
+    scheme = "hmac"
+    deterministic = True
+    
+    def __init__(self, key : str):
+        self._key = key.encode("utf-8")
+    
+    async def hash(self, otp : str) -> str:
+        return hmac.new(self._key, otp.encode("utf-8"), hashlib.sha256).hexdigest()
+    
+    async def verify(self, otp : str, otp_hash : str) -> bool:
+        return hmac.compare_digest(await self.hash(otp), otp_hash)
+
+def _otp_hmac_key() -> str:
+    if settings.otp_hmac_key:
+        return settings.otp_hmac_key
+    # domain separated so the jwt key is never used directly for otps
+    return hmac.new(
+        settings.jwt_secret_key.encode("utf-8"),
+        b"life-tracker:otp",
+        hashlib.sha256,
+    ).hexdigest()
+
+# filled on first use, the hmac key comes from the settings
+_otp_hashers : dict[str, OTPHasher] = {}
+
+def get_otp_hasher(scheme : str | None = None) -> OTPHasher:
+    """
+    returns hasher for scheme; defaults to settings.otp_hash_scheme
+    """
+    scheme = scheme or settings.otp_hash_scheme
+    if not _otp_hashers:
+        _otp_hashers[Argon2OTPHasher.scheme] = Argon2OTPHasher()
+        _otp_hashers[HMACOTPHasher.scheme] = HMACOTPHasher(_otp_hmac_key())
+    try:
+        return _otp_hashers[scheme]
+    except KeyError:
+        raise ServerError(
+            message=f"Unknown otp hash scheme : {scheme}",
+            code="UNKNOWN_OTP_HASH_SCHEME",
+        )
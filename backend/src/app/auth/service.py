@@ -5,12 +5,19 @@ from app.auth.models import (
     User,
     RefreshToken,
 )
+from app.auth.session_cache import (
+    cache_refresh_session,
+    mark_cached_refresh_session,
+    revoke_cached_user_sessions,
+)
+from app.auth.revocation import publish_revoked_sessions
 from app.core.enums import AuthProvider
 from app.core.exceptions import DomainError, ServerError
 from app.core.setting import settings
-from sqlalchemy import select, update, func
+from sqlalchemy import insert, literal, select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from redis.asyncio import Redis
 
 
 async def create_user_with_email_identity(
@@ -63,6 +70,7 @@ async def rotate_and_insert_new_refresh_token(
     user_agent : str,
     db_refresh_token : RefreshToken | None= None, 
     rotate : bool = True,
+    redis_client : Redis | None = None,
     ) -> RefreshToken | None:
     # - Insert new refresh token row
     try:
@@ -82,6 +90,15 @@ async def rotate_and_insert_new_refresh_token(
         session.add(new_refresh_token_db)
         await session.commit()
         
+        # write through to the refresh session cache
+        await cache_refresh_session(redis_client, new_refresh_token_hash, new_refresh_token_db)
+        if rotate and db_refresh_token:
+            await mark_cached_refresh_session(
+                redis_client, 
+                db_refresh_token.hashed_refresh_token, 
+                rotated_at=now,
+            )
+        
         return new_refresh_token_db
     except SQLAlchemyError as e:
         await session.rollback()
@@ -95,10 +112,100 @@ async def rotate_and_insert_new_refresh_token(
         await session.refresh(db_refresh_token)
         raise
     
-async def get_user_by_email(session : AsyncSession, email : str) -> AuthIdentity | None:
+async def rotate_refresh_token_atomic(
+    session : AsyncSession,
+    old_refresh_token_hash : str,
+    new_refresh_token_hash : str,
+    redis_client : Redis | None = None,
+    ) -> RefreshToken | None:
+    """
+    rotate a refresh token in one statement:
+        WITH rotated AS (
+            UPDATE refresh_tokens SET rotated_at = now()
+            WHERE hashed_refresh_token = :old
+              AND rotated_at IS NULL AND revoked_at IS NULL AND expires_at > now()
+            RETURNING user_id, session_id, user_agent
+        )
+        INSERT INTO refresh_tokens (...) SELECT ... FROM rotated RETURNING *
+    The UPDATE row lock makes concurrent rotations of the same token
+    serialize; the losers re-check the WHERE, match nothing and insert nothing.
+    Returns the new token row, or None if the old token wasn't rotatable.
+    """
+    try:
+        rotated = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.hashed_refresh_token == old_refresh_token_hash,
+                RefreshToken.rotated_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now(),
+            )
+            .values(rotated_at=func.now())
+            .returning(
+                RefreshToken.user_id,
+                RefreshToken.session_id,
+                RefreshToken.user_agent,
+            )
+            .cte("rotated")
+        )
+        expires_delta = datetime.timedelta(minutes=settings.refresh_token_expires_minutes)
+        stmt = (
+            insert(RefreshToken)
+            .from_select(
+                [
+                    RefreshToken.token_id,
+                    RefreshToken.user_id,
+                    RefreshToken.hashed_refresh_token,
+                    RefreshToken.session_id,
+                    RefreshToken.expires_at,
+                    RefreshToken.user_agent,
+                ],
+                select(
+                    literal(uuid.uuid4(), RefreshToken.token_id.type),
+                    rotated.c.user_id,
+                    literal(new_refresh_token_hash),
+                    rotated.c.session_id,
+                    func.now() + expires_delta,
+                    rotated.c.user_agent,
+                ),
+            )
+            .returning(RefreshToken)
+        )
+        new_refresh_token_db = await session.scalar(stmt)
+        await session.commit()
+        
+        # write through to the refresh session cache
+        if new_refresh_token_db:
+            await cache_refresh_session(redis_client, new_refresh_token_hash, new_refresh_token_db)
+            await mark_cached_refresh_session(
+                redis_client,
+                old_refresh_token_hash,
+                rotated_at=new_refresh_token_db.created_at,
+            )
+        
+        return new_refresh_token_db
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to rotate refresh token : {str(e)}",
+            code="REFRESH_TOKEN_ROTATION_FAILED",
+        )
+    except Exception:
+        await session.rollback()
+        raise
+    
+async def get_user_by_email(
+    session : AsyncSession,
+    email : str,
+    provider : AuthProvider = AuthProvider.EMAIL,
+) -> AuthIdentity | None:
     
     try:
-        stmt = select(AuthIdentity).where(AuthIdentity.email == email)
+        # at most one row: ix_auth_identity_provider_email_lower is unique
+        stmt = select(AuthIdentity).where(
+            AuthIdentity.provider == provider,
+            func.lower(AuthIdentity.email) == email.strip().lower(),
+        )
         result = await session.scalar(stmt)    
         return result
     
@@ -152,20 +259,34 @@ async def update_password_hash(
         
         raise Exception(str(e))
 
-async def revoke_all_auth_session(session : AsyncSession, user_id : uuid.UUID) -> uuid.UUID | None:
+async def revoke_all_auth_session(
+    session : AsyncSession, 
+    user_id : uuid.UUID,
+    redis_client : Redis | None = None,
+    ) -> uuid.UUID | None:
     """
     revoked all session of the user using user_id
     """
     try:
+        now = datetime.datetime.now(datetime.UTC)
         stmt = (
             update(RefreshToken)
-            .where(RefreshToken.user_id == user_id)
-            .values(revoked_at=func.now())
+            # only active rows; served by ix_refresh_tokens_active_user_id
+            .where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.rotated_at.is_(None),
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.session_id)
             )
         
-        await session.execute(stmt)
+        session_ids = (await session.scalars(stmt)).all()
         await session.commit()
         
+        await revoke_cached_user_sessions(redis_client, user_id, now)
+        await publish_revoked_sessions(redis_client, list(session_ids))
+        
         return user_id
     except SQLAlchemyError as e:
         await session.rollback()
@@ -178,11 +299,58 @@ async def revoke_all_auth_session(session : AsyncSession, user_id : uuid.UUID) -
         await session.rollback()
         raise
     
-async def revoke_auth_session_by_token_object(session : AsyncSession, refresh_token_db : RefreshToken):
+async def revoke_auth_session_by_token_object(
+    session : AsyncSession, 
+    refresh_token_db : RefreshToken,
+    redis_client : Redis | None = None,
+    ):
     try:
         refresh_token_db.revoked_at = datetime.datetime.now(datetime.UTC)
         await session.commit()
         
+        await mark_cached_refresh_session(
+            redis_client,
+            refresh_token_db.hashed_refresh_token,
+            revoked_at=refresh_token_db.revoked_at,
+        )
+        await publish_revoked_sessions(redis_client, [refresh_token_db.session_id])
+        
+    except SQLAlchemyError as e:
+        await session.rollback()
+        
+        raise ServerError(
+            message=f"Failed to revoke user sessions due to an internal error: {str(e)}",
+            code="SESSION_REVOCATION_FAILED",
+        )
+    except Exception:
+        await session.rollback()
+        raise
+
+async def revoke_auth_session_by_hashed_token(
+    session : AsyncSession, 
+    hashed_token : str,
+    redis_client : Redis | None = None,
+    ):
+    """
+    revoke one session by token hash without loading the row first
+    """
+    try:
+        now = datetime.datetime.now(datetime.UTC)
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.hashed_refresh_token == hashed_token,
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.session_id)
+        )
+        session_ids = (await session.scalars(stmt)).all()
+        await session.commit()
+        
+        await mark_cached_refresh_session(redis_client, hashed_token, revoked_at=now)
+        await publish_revoked_sessions(redis_client, list(session_ids))
+        
     except SQLAlchemyError as e:
         await session.rollback()
         
@@ -193,4 +361,3 @@ async def revoke_auth_session_by_token_object(session : AsyncSession, refresh_to
     except Exception:
         await session.rollback()
         raise
-    
\ No newline at end of file
@@ -0,0 +1,153 @@
+import datetime
+import logging
+import uuid
+from dataclasses import dataclass
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.auth.models import RefreshToken
+from app.core.setting import settings
+from app.db.redis.scripts import run_redis_script
+
+logger = logging.getLogger("auth.session_cache")
+
+# < ------------- Refresh session cache --------------->
+# Redis copy of refresh_tokens rows, keyed by token hash and expiring with
+# the token. Postgres stays the source of truth:
+# - the cache is written through after every commit that touches a token
+# - only states that can never revert (rotated, revoked, expired) are
+#   trusted from the cache; an "active" entry never grants anything on its
+#   own, /refresh still rotates with the conditional statement in Postgres
+# - any redis failure is logged and treated as a miss
+
+REFRESH_SESSION_KEY = "auth:refresh:session:{}"
+USER_REFRESH_SESSIONS_KEY = "auth:refresh:user:{}"
+
+@dataclass
+class RefreshSession:
+    token_id : uuid.UUID
+    user_id : uuid.UUID
+    session_id : str
+    user_agent : str | None
+    expires_at : datetime.datetime
+    rotated_at : datetime.datetime | None = None
+    revoked_at : datetime.datetime | None = None
+
+    @classmethod
+    def from_db(cls, token : RefreshToken) -> "RefreshSession":
+        return cls(
+            token_id=token.token_id,
+            user_id=token.user_id,
+            session_id=token.session_id,
+            user_agent=token.user_agent,
+            expires_at=token.expires_at,
+            rotated_at=token.rotated_at,
+            revoked_at=token.revoked_at,
+        )
+
+    def to_redis(self) -> dict:
+        return {
+            "token_id" : str(self.token_id),
+            "user_id" : str(self.user_id),
+            "session_id" : self.session_id,
+            "user_agent" : self.user_agent or "",
+            "expires_at" : self.expires_at.isoformat(),
+            "rotated_at" : self.rotated_at.isoformat() if self.rotated_at else "",
+            "revoked_at" : self.revoked_at.isoformat() if self.revoked_at else "",
+        }
+
+    @classmethod
+    def from_redis(cls, data : dict) -> "RefreshSession":
+        def parse(value : str) -> datetime.datetime | None:
+            return datetime.datetime.fromisoformat(value) if value else None
+
+        return cls(
+            token_id=uuid.UUID(data["token_id"]),
+            user_id=uuid.UUID(data["user_id"]),
+            session_id=data["session_id"],
+            user_agent=data["user_agent"] or None,
+            expires_at=parse(data["expires_at"]), # type: ignore
+            rotated_at=parse(data["rotated_at"]),
+            revoked_at=parse(data["revoked_at"]),
+        )
+
+def _enabled(redis_client : Redis | None) -> bool:
+    return redis_client is not None and settings.refresh_session_cache_enabled
+
+async def cache_refresh_session(
+    redis_client : Redis | None,
+    hashed_token : str,
+    session : RefreshSession | RefreshToken,
+) -> None:
+    if not _enabled(redis_client):
+        return
+    if isinstance(session, RefreshToken):
+        session = RefreshSession.from_db(session)
+
+    key = REFRESH_SESSION_KEY.format(hashed_token)
+    user_key = USER_REFRESH_SESSIONS_KEY.format(session.user_id)
+    expire_at = int(session.expires_at.timestamp())
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe: # type: ignore
+            pipe.hset(key, mapping=session.to_redis()) # type: ignore
+            pipe.expireat(key, expire_at)
+            # index for revoke-all; lives as long as the user's newest token
+            pipe.sadd(user_key, hashed_token) # type: ignore
+            pipe.expireat(user_key, expire_at, gt=True)
+            pipe.expireat(user_key, expire_at, nx=True)
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Failed to cache refresh session", exc_info=True)
+
+async def get_cached_refresh_session(
+    redis_client : Redis | None,
+    hashed_token : str,
+) -> RefreshSession | None:
+    if not _enabled(redis_client):
+        return None
+    try:
+        data = await redis_client.hgetall(REFRESH_SESSION_KEY.format(hashed_token)) # type: ignore
+    except RedisError:
+        logger.warning("Failed to read refresh session cache", exc_info=True)
+        return None
+    return RefreshSession.from_redis(data) if data else None
+
+async def mark_cached_refresh_session(
+    redis_client : Redis | None,
+    hashed_token : str,
+    rotated_at : datetime.datetime | None = None,
+    revoked_at : datetime.datetime | None = None,
+) -> None:
+    """
+    set rotated_at/revoked_at on a cached session, if it's cached
+    """
+    if not _enabled(redis_client):
+        return
+    fields = []
+    if rotated_at:
+        fields += ["rotated_at", rotated_at.isoformat()]
+    if revoked_at:
+        fields += ["revoked_at", revoked_at.isoformat()]
+    try:
+        # only touch existing entries, a partial hash would be unreadable
+        await run_redis_script(
+            redis_client=redis_client, # type: ignore
+            name="hset_if_exists",
+            keys=[REFRESH_SESSION_KEY.format(hashed_token)],
+            args=fields,
+        )
+    except RedisError:
+        logger.warning("Failed to update refresh session cache", exc_info=True)
+
+async def revoke_cached_user_sessions(
+    redis_client : Redis | None,
+    user_id : uuid.UUID,
+    revoked_at : datetime.datetime,
+) -> None:
+    if not _enabled(redis_client):
+        return
+    try:
+        hashed_tokens = await redis_client.smembers(USER_REFRESH_SESSIONS_KEY.format(user_id)) # type: ignore
+        for hashed_token in hashed_tokens:
+            await mark_cached_refresh_session(redis_client, hashed_token, revoked_at=revoked_at)
+    except RedisError:
+        logger.warning("Failed to revoke cached refresh sessions", exc_info=True)
@@ -11,17 +11,23 @@ from app.auth.schemas import (
 from app.auth.service import (
     get_user_by_email,
     revoke_all_auth_session,
-    revoke_auth_session_by_token_object,
+    revoke_auth_session_by_hashed_token,
     update_password_hash,
     get_refresh_token_data_by_hashed_token,
-    rotate_and_insert_new_refresh_token
+    rotate_and_insert_new_refresh_token,
+    rotate_refresh_token_atomic,
+)
+from app.auth.session_cache import (
+    RefreshSession,
+    cache_refresh_session,
+    get_cached_refresh_session,
 )
 from app.auth.security import (
     generate_access_token,
     generate_numeric_otp,
     generate_refresh_token,
-    hash_password,
-    verify_password,
+    get_otp_hasher,
+    verify_password_async,
     hash_refresh_token,
 )
 from app.core.enums import (
@@ -29,13 +35,14 @@ from app.core.enums import (
     MAX_OTP_ATTEMPTS, 
     OTP_COOLDOWN_TIME_SECONDS, 
     OTP_EXPIRE_TIME_REDIS_SECONDS, 
-    SENDGRID_URL,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.redis.scripts import run_redis_script
+from app.db.config import release_connection
+from app.core.rate_limit import FixedWindow, hit_rate_limit
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 from typing import Literal
-import httpx
 import datetime
 import logging
 import uuid
@@ -65,6 +72,8 @@ async def verify_credentinal_for_email_signup(session : AsyncSession, data : Aut
                 message="Can't create user. Email already exist",
                 code="EMAIL_ALREADY_EXISTS",
         )
+    # signup hashes the password next, don't hold the connection through it
+    await release_connection(session)
     
 async def verify_credentinal_for_email_signin(session : AsyncSession, data : AuthEmailSignInInitRequest) -> AuthIdentity | None:
     
@@ -76,8 +85,9 @@ async def verify_credentinal_for_email_signin(session : AsyncSession, data : Aut
             message="Email doesn't exists",
             code="EMAIL_DOES_NOT_EXIST",
         )
-    # verify password 
-    valid, new_hash = verify_password(data.password, user.password_hash)
+    # verify password, without holding a connection through argon2
+    await release_connection(session)
+    valid, new_hash = await verify_password_async(data.password, user.password_hash)
     if not valid:
         raise AuthError(
             message="Invalid email or password",
@@ -95,11 +105,39 @@ async def verify_credentinal_for_email_signin(session : AsyncSession, data : Aut
         )
     return user
     
-async def authenticate_refresh_token(session : AsyncSession, token : str) -> RefreshToken | None:
-    # hash refresh token and find it in db
-    refresh_token_hash = hash_refresh_token(token)
-    # find token in DB
+async def get_refresh_session(
+    session : AsyncSession,
+    refresh_token_hash : str,
+    redis_client : Redis | None = None,
+) -> RefreshSession | None:
+    """
+    refresh session by token hash: redis cache first, then postgres
+    (and fill the cache on a postgres hit)
+    """
+    cached = await get_cached_refresh_session(redis_client, refresh_token_hash)
+    if cached:
+        return cached
+    
     db_refresh_token = await get_refresh_token_data_by_hashed_token(session, refresh_token_hash)
+    if not db_refresh_token:
+        return None
+    
+    await cache_refresh_session(redis_client, refresh_token_hash, db_refresh_token)
+    return RefreshSession.from_db(db_refresh_token)
+
+async def authenticate_refresh_token(
+    session : AsyncSession, 
+    token : str,
+    redis_client : Redis | None = None,
+    refresh_session : RefreshSession | None = None,
+) -> RefreshSession | None:
+    # hash refresh token and find it in cache/db
+    refresh_token_hash = hash_refresh_token(token)
+    db_refresh_token = refresh_session or await get_refresh_session(
+        session, 
+        refresh_token_hash, 
+        redis_client,
+    )
 
     # if not found -> reject
     if not db_refresh_token:
@@ -107,10 +145,21 @@ async def authenticate_refresh_token(session : AsyncSession, token : str) -> Ref
             "Invalid or expired refresh token",
             code="REFRESH_TOKEN_INVALID"
         )
+    # - rotated moments ago -> a concurrent refresh lost the race (two tabs),
+    #   the winner's new token stays valid
+    now = datetime.datetime.now(datetime.UTC)
+    if db_refresh_token.rotated_at and (
+        now - db_refresh_token.rotated_at
+    ).total_seconds() <= settings.refresh_rotation_grace_seconds:
+        raise DomainError(
+            "Refresh token was just rotated by a concurrent request",
+            code="REFRESH_TOKEN_ALREADY_ROTATED",
+            status_code=409,
+        )
     # - if rotated_at != NULL -> SECURITY ALERT(reuse detected)
     if db_refresh_token.rotated_at:
         # revoke all session
-        await revoke_all_auth_session(session, db_refresh_token.user_id)
+        await revoke_all_auth_session(session, db_refresh_token.user_id, redis_client)
         
         raise DomainError(
             "Refresh token reuse detected",
@@ -124,7 +173,7 @@ async def authenticate_refresh_token(session : AsyncSession, token : str) -> Ref
             code="REFRESH_TOKEN_REVOKED",
         )
     # - if expired_at < now> -> reject
-    if db_refresh_token.expires_at <= datetime.datetime.now(datetime.UTC):
+    if db_refresh_token.expires_at <= now:
         raise DomainError(
             "Refresh token has expired",
             code="REFRESH_TOKEN_EXPIRED"
@@ -139,6 +188,7 @@ async def set_new_refresh_token_with_rotation(
     session_id : str = "",
     db_refresh_token : RefreshToken | None = None,
     rotate : bool = True,
+    redis_client : Redis | None = None,
     ):
     """
     params:
@@ -160,6 +210,7 @@ async def set_new_refresh_token_with_rotation(
         user_agent=user_agent,
         db_refresh_token=db_refresh_token,
         rotate=rotate,
+        redis_client=redis_client,
     )
     # 4. issue new_access_token
     new_access_token = generate_access_token(
@@ -169,16 +220,78 @@ async def set_new_refresh_token_with_rotation(
     
     return new_refresh_token, new_access_token
 
-async def signout_user(session : AsyncSession, token : str, all_session : bool = False):
+async def rotate_and_issue_tokens(
+    session : AsyncSession, 
+    token : str,
+    redis_client : Redis | None = None,
+) -> tuple[str, str]:
+    """
+    /refresh: atomically rotate token and issue a new refresh + access token.
+    A cached rotated/revoked/expired session is rejected without touching
+    postgres; otherwise the conditional rotation decides, and only if it
+    matched nothing is the old row read from postgres (never the cache), to
+    report why: a concurrent refresh that lost the race within
+    refresh_rotation_grace_seconds gets a 409 and keeps the sessions, later
+    reuse revokes everything.
+    """
     refresh_token_hash = hash_refresh_token(token)
-    # find token in DB
-    db_refresh_token = await get_refresh_token_data_by_hashed_token(session, refresh_token_hash)
+    cached = await get_cached_refresh_session(redis_client, refresh_token_hash)
+    if cached and (
+        cached.rotated_at 
+        or cached.revoked_at 
+        or cached.expires_at <= datetime.datetime.now(datetime.UTC)
+    ):
+        await authenticate_refresh_token(session, token, redis_client, refresh_session=cached)
+    
+    new_refresh_token = generate_refresh_token()
+    new_refresh_token_db = await rotate_refresh_token_atomic(
+        session=session,
+        old_refresh_token_hash=refresh_token_hash,
+        new_refresh_token_hash=hash_refresh_token(new_refresh_token),
+        redis_client=redis_client,
+    )
+    if not new_refresh_token_db:
+        # postgres only: the cache may still hold the row as active (a failed
+        # write-through, a read-through fill that raced the rotation), which
+        # would hide reuse; the fresh row is written back through the cache
+        db_refresh_token = await get_refresh_session(session, refresh_token_hash)
+        if not db_refresh_token:
+            raise DomainError(
+                "Invalid or expired refresh token",
+                code="REFRESH_TOKEN_INVALID"
+            )
+        await cache_refresh_session(redis_client, refresh_token_hash, db_refresh_token)
+        # raises reuse detected / revoked / expired
+        await authenticate_refresh_token(
+            session, token, redis_client, refresh_session=db_refresh_token,
+        )
+        # valid again by the time we looked, e.g. clock skew on expires_at
+        raise DomainError(
+            "Invalid or expired refresh token",
+            code="REFRESH_TOKEN_INVALID"
+        )
     
-    if db_refresh_token and all_session:
-        await revoke_all_auth_session(session, db_refresh_token.user_id)
-    elif db_refresh_token and not db_refresh_token.revoked_at:
+    new_access_token = generate_access_token(
+        user_id=new_refresh_token_db.user_id,
+        session_id=new_refresh_token_db.session_id,
+    )
+    return new_refresh_token, new_access_token
+
+async def signout_user(
+    session : AsyncSession, 
+    token : str, 
+    all_session : bool = False,
+    redis_client : Redis | None = None,
+):
+    refresh_token_hash = hash_refresh_token(token)
+    # find token in cache/DB
+    refresh_session = await get_refresh_session(session, refresh_token_hash, redis_client)
+    
+    if refresh_session and all_session:
+        await revoke_all_auth_session(session, refresh_session.user_id, redis_client)
+    elif refresh_session and not refresh_session.revoked_at:
         # 2. set revoke_at : now() (through token) in database
-        await revoke_auth_session_by_token_object(session, db_refresh_token)
+        await revoke_auth_session_by_hashed_token(session, refresh_token_hash, redis_client)
 
 async def set_access_and_refresh_token_in_cookie(
     response : Response,
@@ -209,44 +322,33 @@ async def rate_limit_otp_redis(
     email : str,
     flow : Literal["signup", "signin", "resend"],
 ):
-    try:
-        cooldown_key = f"auth:{flow}:otp:cooldown:{email}"
-        count_key = f"auth:{flow}:otp:attempts:{email}"
+    cooldown_key = f"auth:{flow}:otp:cooldown:{email}"
+    count_key = f"auth:{flow}:otp:attempts:{email}"
+    
+    # at most 5 otps per 15 minutes
+    attempts = await hit_rate_limit(
+        redis_client=redis_client,
+        key=count_key,
+        policy=FixedWindow(limit=5, window_seconds=15 * 60),
+    )
+    if not attempts.allowed:
+        raise ClientError(
+            message="Too many attmepts within 15 minutes. Please try again after some time.",
+            code="TOO_MANY_ATTEMPTS",
+        )
         
-        # increment count_key by 1
-        count = await redis_client.incrby(count_key, 1)
-        # if does not exist, create with value 1 and attach expire time 15 minutes
-        if count == 1:
-            await redis_client.expire(
-                count_key,
-                time=15 * 60,
-            )
-        # if count_key > 5 within 15 minutes -> raise error with msg = "To many attempts"
-        if count > 5:
-            raise ClientError(
-                message="Too many attmepts within 15 minutes. Please try again after some time.",
-                code="TOO_MANY_ATTEMPTS",
-            )
-            
-        # if cooldown_key exists: -> too many requests within OTP_COOLDOWN_TIME_SECONDS
-        cooldown_set = await redis_client.set(
-            cooldown_key,
-            "1",
-            ex=OTP_COOLDOWN_TIME_SECONDS,
-            nx=True,
+    # if cooldown_key exists: -> too many requests within OTP_COOLDOWN_TIME_SECONDS
+    cooldown = await hit_rate_limit(
+        redis_client=redis_client,
+        key=cooldown_key,
+        policy=FixedWindow(limit=1, window_seconds=OTP_COOLDOWN_TIME_SECONDS),
+    )
+    if not cooldown.allowed:
+        raise ClientError(
+            message=f"Too many request! Wait at least {OTP_COOLDOWN_TIME_SECONDS} seconds",
+            code = "TOO_MANY_REQUESTS",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
         )
-        if not cooldown_set:
-            raise ClientError(
-                message=f"Too many request! Wait at least {OTP_COOLDOWN_TIME_SECONDS} seconds",
-                code = "TOO_MANY_REQUESTS",
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            )
-    
-    except RedisError as e:
-        raise ServerError(str(e))
-    
-    except Exception:
-        raise
 
 async def get_redis_hash_data(
     redis_client : Redis,
@@ -313,10 +415,12 @@ async def store_data_in_redis_signup(
     """
     
     signup_verification_id = "auth:otp:signup:" + generate_refresh_token()
+    otp_hasher = get_otp_hasher()
     
     data = RedisSignUpData(
         signup_verification_id=signup_verification_id,
-        otp_hash= hash_password(str(otp)),
+        otp_hash= await otp_hasher.hash(str(otp)),
+        otp_scheme=otp_hasher.scheme,
         username=username,
         email=email.strip().lower(),
         password_hash=password_hash,
@@ -344,11 +448,13 @@ async def store_data_in_redis_signin(
 ) -> str:
     # - (verification_id, user_id, otp_hash, issued_at ,expired_at, attempts)
     signin_verification_id = "auth:otp:signin:" + generate_refresh_token()
+    otp_hasher = get_otp_hasher()
     data = RedisSignInData(
         signin_verification_id = signin_verification_id,
         user_id = user_id,
         email=email.strip().lower(),
-        otp_hash = hash_password(str(otp)),
+        otp_hash = await otp_hasher.hash(str(otp)),
+        otp_scheme = otp_hasher.scheme,
         attempts = 0,    
     )
     
@@ -378,43 +484,66 @@ async def fetch_and_verify_pending_user_from_redis(
         - increment attempts
         - if attempts exceed threshold → delete record
         - return error
+    Steps 1-4 and consuming the record run as one redis script (verify_otp).
+    For deterministic otp schemes the OTP is compared inside the script too;
+    otherwise the script returns the record, the OTP is verified here and
+    the record is consumed with a DELETE that only one caller can win.
     """
-    redis_data = await get_redis_hash_data(
-        redis_client=redis_client,
-        verification_id=verification_id,
-    )
+    candidate_hasher = get_otp_hasher()
+    candidate_scheme = candidate_digest = ""
+    if candidate_hasher.deterministic:
+        candidate_scheme = candidate_hasher.scheme
+        candidate_digest = await candidate_hasher.hash(user_otp)
     try:
-        # increment attempts
-        user_attempts = await redis_client.hincrby(
-            verification_id,
-            "attempts",
-            1,
-        ) # type: ignore
-        # if attempts exceed threshold → delete record
-        if user_attempts > MAX_OTP_ATTEMPTS :
-            await redis_client.delete(verification_id)
+        result = await run_redis_script(
+            redis_client=redis_client,
+            name="verify_otp",
+            keys=[verification_id],
+            args=[MAX_OTP_ATTEMPTS, candidate_scheme, candidate_digest],
+        )
+        status = result[0]
+        if status == "EXPIRED":
+            raise ClientError(
+                message="Verification expired! Please signin/signup again.",
+                code="VERIFICATION_EXPIRED",
+            )
+        if status == "INVALID":
+            raise ClientError(
+                "Invalid verification id",
+                "INVALID_VERIFICATION_ID"
+            )
+        # if attempts exceed threshold → record already deleted by the script
+        if status == "TOO_MANY":
             raise ClientError(
                 "Too many invalid verification attempts. Please restart the signup/signin process.",
                 "TOO_MANY_OTP_ATTMPTS",
                 400,
             )
-        valid, new_hash = verify_password(user_otp, redis_data["otp_hash"])
-        if not valid:
+        if status == "MISMATCH":
             raise ClientError(
                 "Invalid or expired OTP",
                 "INVALID_OR_EXPIRED_OTP",
             )
-        if new_hash:
-            redis_data["otp_hash"] = new_hash
-            await redis_client.hset(
-                verification_id, 
-                mapping={
-                    "otp_hash" : new_hash,
-                }) # type: ignore
-            
         
-        # After successful verification delete the key
-        await redis_client.delete(verification_id)
+        fields = result[1]
+        redis_data = dict(zip(fields[::2], fields[1::2]))
+        
+        if status == "CHECK":
+            # records without otp_scheme predate pluggable otp hashing
+            otp_hasher = get_otp_hasher(redis_data.get("otp_scheme", "argon2"))
+            valid = await otp_hasher.verify(user_otp, redis_data["otp_hash"])
+            if not valid:
+                raise ClientError(
+                    "Invalid or expired OTP",
+                    "INVALID_OR_EXPIRED_OTP",
+                )
+            # After successful verification delete the key; a concurrent
+            # verify that got here first has already consumed it
+            if not await redis_client.delete(verification_id):
+                raise ClientError(
+                    message="Verification expired! Please signin/signup again.",
+                    code="VERIFICATION_EXPIRED",
+                )
         
         return redis_data
     except RedisError as e:
@@ -440,11 +569,13 @@ async def resend_otp_using_redis(
     # generate otp
     new_otp = generate_numeric_otp()
     # store it in redis:
-    # create otp_hash
-    new_otp_hash = hash_password(str(new_otp))
+    # create otp_hash with the currently configured scheme
+    otp_hasher = get_otp_hasher()
+    new_otp_hash = await otp_hasher.hash(str(new_otp))
     # change otp_hash, reset attempts to zero and reset expire time
     data = {
         "otp_hash" : new_otp_hash,
+        "otp_scheme" : otp_hasher.scheme,
         "attempts" : 0,
     }
     await set_hash_with_verification_id(
@@ -454,59 +585,3 @@ async def resend_otp_using_redis(
         DATA_EXPIRE_TIME_REDIS_IN_SECOND=15 * 60
     )  
     return new_otp, redis_data["email"]
-        
-# < -------------SendGrid Utilities --------------->
-def create_payload_and_headers_for_sendgrid(
-    receiver_email : str, 
-    otp : str
-) -> tuple[dict, dict]:
-    payload = {
-        "personalizations" : [
-            {
-                "to" : [
-                    {
-                        "email" : receiver_email,
-                        "name": "Optional",
-                    },
-                    
-                ],
-            },
-        ],
-        "from" : {"email" : settings.SENDGRID.SENDGRID_SENDER_EMAIL},
-        "subject" : "OTP Verification",
-        "content" : [
-            {
-                "type" : "text/plain",
-                "value" : f"Your OTP is {otp}",
-            },
-        ],
-    }
-    headers = {
-        "Authorization" : f"Bearer {settings.SENDGRID.SENDGRID_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    return payload, headers
-
-async def send_otp_to_user(
-    otp : str,
-    httpx_client : httpx.AsyncClient,
-    receiver_email : str,
-):
-    
-    payload, headers = create_payload_and_headers_for_sendgrid(receiver_email, otp)
-    try:
-        response = await httpx_client.post(
-            url = SENDGRID_URL,
-            headers=headers,
-            json = payload,
-        )
-        print(response.status_code)
-        print(response.text)
-        if response.status_code != 202:
-            raise ServerError(
-                message="OTP email delivery failed",
-                code=  "OTP_EMAIL_DELIVERY_FAILED"
-            )
-        return response
-    except Exception:
-        raise
\ No newline at end of file
@@ -0,0 +1,211 @@
+from decimal import Decimal
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Enum, Index, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.enums import BehaviorCategory, BehaviorSource
+import uuid
+import datetime
+
+## Behavior
+# - behavior_id(PK, Text)(default uid)
+# - uid(not null, FK->User.uid)
+# - task_id(FK->Task.task_id)(nullable)
+# - behavior_name(not null, Text)
+# - behavior_description(Optional)(Text,nullable)
+# - category(Text)(default none)(Fix enum values)
+# - created_at(not null)
+# - last_edited(not null)
+# - occured_at(not null, timestamp)
+# - source(default user)(USER_LOGGED | TASK_CONFIRMED)
+
+class Behavior(Base):
+    __tablename__ = "behaviors"
+
+    behavior_id : Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    task_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("tasks.task_id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    behavior_name : Mapped[str] = mapped_column(nullable=False)
+    behavior_description : Mapped[str] = mapped_column(nullable=True)
+    category : Mapped[BehaviorCategory] = mapped_column(
+        Enum(
+            BehaviorCategory,
+            name="behavior_category",
+            native_enum=True,
+            create_type=True,
+        ),
+        nullable=True,
+    )
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    occured_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    source : Mapped[BehaviorSource] = mapped_column(
+        Enum(
+            BehaviorSource,
+            name="behavior_source",
+            native_enum=True,
+            create_type=True,
+        ),
+        nullable=False,
+        default=BehaviorSource.USER_LOGGED,
+        server_default=BehaviorSource.USER_LOGGED.name,
+    )
+
+# list_behaviors: one user's behaviors by date/range, and by category
+Index("ix_behaviors_user_id_occured_at", Behavior.user_id, Behavior.occured_at)
+Index(
+    "ix_behaviors_user_id_category_occured_at",
+    Behavior.user_id,
+    Behavior.category,
+    Behavior.occured_at,
+)
+
+## Diet
+# - behavior_id(PK,  FK->Behavior.id)
+# - diet_name(not null, Text)
+# - diet_description(Optional)(Text,nullable)
+# - calories(Optional, nullable)
+# - created_at(not null)
+# - last_edited(not null)
+
+class Diet(Base):
+    __tablename__ = "diets"
+
+    behavior_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("behaviors.behavior_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    diet_name : Mapped[str] = mapped_column(nullable=False)
+    diet_description : Mapped[str] = mapped_column(nullable=True)
+    calories : Mapped[int] = mapped_column(nullable=True)
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+## Expense
+# - behavior_id(PK,  FK->Behavior.id)
+# - expense_name(not null, Text)
+# - Amount(not null, Text)
+# - expense_description(Text, nullable)(Optional)
+# - created_at (not null)
+# - last_edited (not null)
+# amount is numeric, not text: an expense is always a positive number (invariants.md)
+
+class Expense(Base):
+    __tablename__ = "expenses"
+    __table_args__ = (
+        CheckConstraint("amount > 0", name="expenses_amount_positive"),
+    )
+
+    behavior_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("behaviors.behavior_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    expense_name : Mapped[str] = mapped_column(nullable=False)
+    amount : Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    expense_description : Mapped[str] = mapped_column(nullable=True)
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+## WorkOut
+# - behavior_id(PK,  FK->Behavior.id)
+# - workout_name(not null, Text)
+# - workout_description(Optional)(Text)
+# - created_at(not null)
+# - last_edited(not null)
+
+class WorkOut(Base):
+    __tablename__ = "workouts"
+
+    behavior_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("behaviors.behavior_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    workout_name : Mapped[str] = mapped_column(nullable=False)
+    workout_description : Mapped[str] = mapped_column(nullable=True)
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+## TechWork
+# - behavior_id(PK, FK->Behavior.id)
+# - techwork_name(not null, text)
+# - techwork_description(Text, nullable)(Optional)
+# - created_at(not null)
+# - last_edited(not null)
+
+class TechWork(Base):
+    __tablename__ = "techworks"
+
+    behavior_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("behaviors.behavior_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    techwork_name : Mapped[str] = mapped_column(nullable=False)
+    techwork_description : Mapped[str] = mapped_column(nullable=True)
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+# category -> its table, every categorized behavior has exactly one row there
+CATEGORY_MODELS : dict[BehaviorCategory, type[Base]] = {
+    BehaviorCategory.DIET : Diet,
+    BehaviorCategory.EXPENSE : Expense,
+    BehaviorCategory.WORKOUT : WorkOut,
+    BehaviorCategory.TECHWORK : TechWork,
+}
@@ -0,0 +1,195 @@
+import datetime
+import uuid
+from typing import Annotated, Optional
+from fastapi import APIRouter, Path, Query
+from pydantic import ValidationError
+from app.analytics.cache import invalidate_expense_analytics
+from app.auth.dependencies import current_user, redis_client
+from app.behaviors.models import Behavior
+from app.behaviors.schemas import (
+    CATEGORY_DETAILS,
+    BehaviorBatchItemResult,
+    BehaviorBatchRequest,
+    BehaviorBatchResponse,
+    BehaviorCreateRequest,
+    BehaviorIdResponse,
+    BehaviorPageResponse,
+    BehaviorResponse,
+    BehaviorUpdateRequest,
+)
+from app.behaviors.service import (
+    create_behaviors_batch,
+    delete_behavior,
+    get_behavior,
+    get_category_details,
+    get_user_task_ids,
+    list_behaviors,
+    update_behavior,
+)
+from app.core.enums import (
+    BEHAVIOR_PAGE_DEFAULT_LIMIT,
+    BEHAVIOR_PAGE_MAX_LIMIT,
+    BehaviorCategory,
+)
+from app.core.exceptions import ClientError, DomainError
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.dependencies import DbSession
+from app.summaries.service import utc_day_start
+
+router = APIRouter()
+
+@router.post('/batch', response_model=BehaviorBatchResponse)
+async def create_behavior_batch(
+    user_id : current_user,
+    session : DbSession,
+    redis_client : redis_client,
+    batch : BehaviorBatchRequest,
+    ):
+    """
+    Offline clients upload their queued behaviors in one request.
+    - every item is validated on its own, invalid items are reported with
+      their errors and skipped
+    - valid items are written in one transaction, one multi-row INSERT per
+      table; if it fails nothing of the batch is written
+    """
+    results : list[BehaviorBatchItemResult | None] = [None] * len(batch.items)
+    valid : list[tuple[int, BehaviorCreateRequest]] = []
+    for index, item in enumerate(batch.items):
+        try:
+            valid.append((index, BehaviorCreateRequest.model_validate(item)))
+        except ValidationError as e:
+            results[index] = BehaviorBatchItemResult(
+                index=index,
+                status="invalid",
+                errors=e.errors(include_url=False, include_context=False, include_input=False), # type: ignore
+            )
+    
+    owner_id = uuid.UUID(user_id)
+    # referenced tasks must be the user's, checked with one query for the batch
+    task_ids = {behavior.task_id for _, behavior in valid if behavior.task_id}
+    own_task_ids = await get_user_task_ids(session, owner_id, task_ids)
+    insertable = []
+    for index, behavior in valid:
+        if behavior.task_id and behavior.task_id not in own_task_ids:
+            results[index] = BehaviorBatchItemResult(
+                index=index,
+                status="invalid",
+                errors=[{"loc" : ["task_id"], "msg" : "Task not found", "type" : "task_not_found"}],
+            )
+        else:
+            insertable.append((index, behavior))
+    
+    if insertable:
+        behavior_ids = await create_behaviors_batch(
+            session, owner_id, [behavior for _, behavior in insertable],
+        )
+        for (index, _), behavior_id in zip(insertable, behavior_ids):
+            results[index] = BehaviorBatchItemResult(index=index, status="created", behavior_id=behavior_id)
+        if any(behavior.category == BehaviorCategory.EXPENSE for _, behavior in insertable):
+            await invalidate_expense_analytics(redis_client, owner_id)
+    
+    return BehaviorBatchResponse(
+        message="Behaviors created" if insertable else "No valid behaviors",
+        created=len(insertable),
+        invalid=len(batch.items) - len(insertable),
+        results=results, # type: ignore
+    )
+
+def behavior_response(behavior : Behavior, detail : object | None) -> BehaviorResponse:
+    response = BehaviorResponse.model_validate(behavior, from_attributes=True)
+    if behavior.category is not None and detail is not None:
+        response.category_specific_detail = CATEGORY_DETAILS[behavior.category].model_validate(
+            detail, from_attributes=True,
+        ) # type: ignore
+    return response
+
+@router.get('', response_model=BehaviorPageResponse)
+async def list_behavior_page(
+    user_id : current_user,
+    session : DbSession,
+    date : Annotated[Optional[datetime.date], Query()] = None,
+    category : Annotated[Optional[BehaviorCategory], Query()] = None,
+    from_date : Annotated[Optional[datetime.date], Query(alias="from")] = None,
+    to_date : Annotated[Optional[datetime.date], Query(alias="to")] = None,
+    cursor : Annotated[Optional[str], Query()] = None,
+    limit : Annotated[int, Query(ge=1, le=BEHAVIOR_PAGE_MAX_LIMIT)] = BEHAVIOR_PAGE_DEFAULT_LIMIT,
+    ):
+    """
+    ?date=YYYY-MM-DD or ?from=&to= (inclusive UTC days), optionally ?category=,
+    newest first. Pages are keyset based: follow next_cursor, no offsets.
+    """
+    if date and (from_date or to_date):
+        raise ClientError("Use either date or from/to", code="INVALID_DATE_RANGE")
+    if date:
+        from_date = to_date = date
+    if from_date and to_date and from_date > to_date:
+        raise ClientError("from must not be after to", code="INVALID_DATE_RANGE")
+    
+    # one extra row tells whether there's a next page
+    behaviors = await list_behaviors(
+        session,
+        uuid.UUID(user_id),
+        limit + 1,
+        start=utc_day_start(from_date) if from_date else None,
+        end=utc_day_start(to_date + datetime.timedelta(days=1)) if to_date else None,
+        category=category,
+        after=decode_cursor(cursor) if cursor else None,
+    )
+    next_cursor = None
+    if len(behaviors) > limit:
+        behaviors = behaviors[:limit]
+        next_cursor = encode_cursor(behaviors[-1].occured_at, behaviors[-1].behavior_id)
+    
+    details = await get_category_details(session, behaviors)
+    return BehaviorPageResponse(
+        message="Behaviors fetched",
+        items=[behavior_response(behavior, details.get(behavior.behavior_id)) for behavior in behaviors],
+        next_cursor=next_cursor,
+    )
+
+@router.get('/{behavior_id}', response_model=BehaviorResponse)
+async def get_behavior_by_id(
+    user_id : current_user,
+    session : DbSession,
+    behavior_id : Annotated[uuid.UUID, Path()],
+    ):
+    behavior = await get_behavior(session, uuid.UUID(user_id), behavior_id)
+    if behavior is None:
+        raise DomainError("Behavior not found", code="BEHAVIOR_NOT_FOUND", status_code=404)
+    details = await get_category_details(session, [behavior])
+    return behavior_response(behavior, details.get(behavior.behavior_id))
+
+@router.patch('/{behavior_id}', response_model=BehaviorIdResponse)
+async def update_behavior_by_id(
+    user_id : current_user,
+    session : DbSession,
+    redis_client : redis_client,
+    behavior_id : Annotated[uuid.UUID, Path()],
+    changes : BehaviorUpdateRequest,
+    ):
+    """
+    name, description, occured_at and the category detail fields can change;
+    category, source and task_id can't
+    """
+    owner_id = uuid.UUID(user_id)
+    behavior = await update_behavior(session, owner_id, behavior_id, changes)
+    if behavior is None:
+        raise DomainError("Behavior not found", code="BEHAVIOR_NOT_FOUND", status_code=404)
+    if behavior.category == BehaviorCategory.EXPENSE:
+        await invalidate_expense_analytics(redis_client, owner_id)
+    return BehaviorIdResponse(message="Behavior updated", behavior_id=behavior_id)
+
+@router.delete('/{behavior_id}', response_model=BehaviorIdResponse)
+async def delete_behavior_by_id(
+    user_id : current_user,
+    session : DbSession,
+    redis_client : redis_client,
+    behavior_id : Annotated[uuid.UUID, Path()],
+    ):
+    owner_id = uuid.UUID(user_id)
+    behavior = await delete_behavior(session, owner_id, behavior_id)
+    if behavior is None:
+        raise DomainError("Behavior not found", code="BEHAVIOR_NOT_FOUND", status_code=404)
+    if behavior.category == BehaviorCategory.EXPENSE:
+        await invalidate_expense_analytics(redis_client, owner_id)
+    return BehaviorIdResponse(message="Behavior deleted", behavior_id=behavior_id)
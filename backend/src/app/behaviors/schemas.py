@@ -0,0 +1,117 @@
+import uuid
+from decimal import Decimal
+from typing import Any, Literal, Optional
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field, model_validator
+from app.core.enums import BEHAVIOR_BATCH_MAX_ITEMS, BehaviorCategory, BehaviorSource
+
+# < ------------- Category specific details --------------->
+# extra="forbid" so a detail only ever matches the model of its own category
+
+class DietDetail(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    diet_name : str
+    diet_description : Optional[str] = None
+    calories : Optional[int] = Field(default=None, ge=0)
+
+class ExpenseDetail(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    expense_name : str
+    amount : Decimal = Field(gt=0, max_digits=12, decimal_places=2)
+    expense_description : Optional[str] = None
+
+class WorkOutDetail(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    workout_name : str
+    workout_description : Optional[str] = None
+
+class TechWorkDetail(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    techwork_name : str
+    techwork_description : Optional[str] = None
+
+CATEGORY_DETAILS : dict[BehaviorCategory, type[BaseModel]] = {
+    BehaviorCategory.DIET : DietDetail,
+    BehaviorCategory.EXPENSE : ExpenseDetail,
+    BehaviorCategory.WORKOUT : WorkOutDetail,
+    BehaviorCategory.TECHWORK : TechWorkDetail,
+}
+
+# < ------------- Create --------------->
+class BehaviorCreateRequest(BaseModel):
+    behavior_name : str = Field(min_length=5)
+    behavior_description : Optional[str] = Field(default=None, min_length=5)
+    occured_at : AwareDatetime
+    category : Optional[BehaviorCategory] = None
+    source : BehaviorSource = BehaviorSource.USER_LOGGED
+    task_id : Optional[uuid.UUID] = None
+    category_specific_detail : Optional[DietDetail | ExpenseDetail | WorkOutDetail | TechWorkDetail] = None
+
+    @model_validator(mode="after")
+    def check_category(self):
+        detail = self.category_specific_detail
+        if self.category is None:
+            if detail is not None:
+                raise ValueError("category_specific_detail given without category")
+        elif not isinstance(detail, CATEGORY_DETAILS[self.category]):
+            raise ValueError(f"category {self.category.value} needs its category_specific_detail")
+        if self.source == BehaviorSource.TASK_CONFIRMED and self.task_id is None:
+            raise ValueError("TASK_CONFIRMED behaviors need a task_id")
+        return self
+
+class BehaviorBatchRequest(BaseModel):
+    # items are validated one by one so one bad entry doesn't reject the batch
+    items : list[dict[str, Any]] = Field(min_length=1, max_length=BEHAVIOR_BATCH_MAX_ITEMS)
+
+class BehaviorBatchItemResult(BaseModel):
+    index : int
+    status : Literal["created", "invalid"]
+    behavior_id : Optional[uuid.UUID] = None
+    errors : Optional[list[dict[str, Any]]] = None
+
+class BehaviorBatchResponse(BaseModel):
+    message : str
+    created : int
+    invalid : int
+    results : list[BehaviorBatchItemResult]
+
+# < ------------- Update / Delete --------------->
+class BehaviorUpdateRequest(BaseModel):
+    # category, source and task_id are fixed once a behavior is logged
+    model_config = ConfigDict(extra="forbid")
+    behavior_name : Optional[str] = Field(default=None, min_length=5)
+    behavior_description : Optional[str] = Field(default=None, min_length=5)
+    occured_at : Optional[AwareDatetime] = None
+    # only the fields to change, merged into the behavior's category row
+    category_specific_detail : Optional[dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def check_changes(self):
+        if not self.model_fields_set:
+            raise ValueError("nothing to update")
+        for name in ("behavior_name", "occured_at"):
+            if name in self.model_fields_set and getattr(self, name) is None:
+                raise ValueError(f"{name} can't be null")
+        return self
+
+class BehaviorIdResponse(BaseModel):
+    message : str
+    behavior_id : uuid.UUID
+
+# < ------------- Read --------------->
+class BehaviorResponse(BaseModel):
+    behavior_id : uuid.UUID
+    task_id : Optional[uuid.UUID] = None
+    behavior_name : str
+    behavior_description : Optional[str] = None
+    category : Optional[BehaviorCategory] = None
+    occured_at : AwareDatetime
+    source : BehaviorSource
+    created_at : AwareDatetime
+    last_edited : AwareDatetime
+    category_specific_detail : Optional[DietDetail | ExpenseDetail | WorkOutDetail | TechWorkDetail] = None
+
+class BehaviorPageResponse(BaseModel):
+    message : str
+    items : list[BehaviorResponse]
+    # pass back as ?cursor= for the next (older) page, null on the last page
+    next_cursor : Optional[str] = None
@@ -0,0 +1,321 @@
+import datetime
+import uuid
+from collections import defaultdict
+from pydantic import ValidationError
+from app.behaviors.models import Behavior, CATEGORY_MODELS
+from app.behaviors.schemas import CATEGORY_DETAILS, BehaviorCreateRequest, BehaviorUpdateRequest
+from app.summaries.service import SummaryDeltas, apply_summary_deltas
+from app.tasks.models import Task
+from app.core.enums import BehaviorCategory
+from app.core.exceptions import ClientError, DomainError, ServerError
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+
+async def get_user_task_ids(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    task_ids : set[uuid.UUID],
+) -> set[uuid.UUID]:
+    """
+    the subset of task_ids that exist and belong to user_id
+    """
+    if not task_ids:
+        return set()
+    try:
+        stmt = select(Task.task_id).where(Task.user_id == user_id, Task.task_id.in_(task_ids))
+        result = await session.scalars(stmt)
+        return set(result)
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve tasks : {str(e)}",
+            code="TASK_FETCH_FAILED",
+        )
+
+async def create_behaviors_batch(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    behaviors : list[BehaviorCreateRequest],
+) -> list[uuid.UUID]:
+    """
+    insert behaviors and their category rows in one transaction:
+        INSERT INTO behaviors (...) VALUES (...), (...), ... RETURNING behavior_id
+        INSERT INTO <category table> (...) VALUES (...), ... RETURNING behavior_id
+    one statement per table touched instead of a round trip per row, plus
+    one upsert of the batch's daily_user_summary deltas.
+    behavior_ids are generated here so category rows don't depend on the
+    order of RETURNING; returns them in input order.
+    """
+    behavior_rows = []
+    category_rows = defaultdict(list)
+    deltas = SummaryDeltas()
+    for behavior in behaviors:
+        behavior_id = uuid.uuid4()
+        behavior_rows.append({
+            "behavior_id" : behavior_id,
+            "user_id" : user_id,
+            "task_id" : behavior.task_id,
+            "behavior_name" : behavior.behavior_name,
+            "behavior_description" : behavior.behavior_description,
+            "category" : behavior.category,
+            "occured_at" : behavior.occured_at,
+            "source" : behavior.source,
+        })
+        if behavior.category is not None:
+            category_rows[behavior.category].append(
+                {"behavior_id" : behavior_id} | behavior.category_specific_detail.model_dump() # type: ignore
+            )
+        deltas.add_behavior(user_id, behavior.category, behavior.occured_at, behavior.category_specific_detail)
+    try:
+        inserted = await session.scalars(
+            insert(Behavior).values(behavior_rows).returning(Behavior.behavior_id)
+        )
+        inserted_count = len(inserted.all())
+        for category, rows in category_rows.items():
+            model = CATEGORY_MODELS[category]
+            result = await session.scalars(
+                insert(model).values(rows).returning(model.behavior_id) # type: ignore
+            )
+            inserted_count += len(result.all())
+        
+        expected = len(behavior_rows) + sum(len(rows) for rows in category_rows.values())
+        if inserted_count != expected:
+            raise ServerError(
+                message=f"Inserted {inserted_count} behavior rows, expected {expected}",
+                code="BEHAVIOR_BATCH_INSERT_FAILED",
+            )
+        await apply_summary_deltas(session, deltas)
+        await session.commit()
+        return [row["behavior_id"] for row in behavior_rows]
+    
+    except IntegrityError:
+        await session.rollback()
+        raise DomainError(
+            message="Behavior batch violates a constraint",
+            code="BEHAVIOR_CONSTRAINT_VIOLATION",
+            status_code=409,
+        )
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to insert behavior batch : {str(e)}",
+            code="BEHAVIOR_BATCH_INSERT_FAILED",
+        )
+    except Exception:
+        await session.rollback()
+        raise
+
+async def list_behaviors(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    limit : int,
+    start : datetime.datetime | None = None,
+    end : datetime.datetime | None = None,
+    category : BehaviorCategory | None = None,
+    after : tuple[datetime.datetime, uuid.UUID] | None = None,
+) -> list[Behavior]:
+    """
+    one page of a user's behaviors, newest first, occured_at in [start, end);
+    after is the (occured_at, behavior_id) of the previous page's last row.
+    Served by ix_behaviors_user_id_occured_at, or
+    ix_behaviors_user_id_category_occured_at with a category: every bound,
+    the cursor included, is a range on occured_at inside one user (+ category),
+    so a page is an index seek plus limit rows whatever its depth.
+    """
+    conditions = [Behavior.user_id == user_id]
+    if category is not None:
+        conditions.append(Behavior.category == category)
+    if start is not None:
+        conditions.append(Behavior.occured_at >= start)
+    if end is not None:
+        conditions.append(Behavior.occured_at < end)
+    if after is not None:
+        occured_at, behavior_id = after
+        # spelled out instead of a row comparison: the occured_at <= part is
+        # the index condition, behavior_id only breaks ties
+        conditions.append(Behavior.occured_at <= occured_at)
+        conditions.append(or_(
+            Behavior.occured_at < occured_at,
+            and_(Behavior.occured_at == occured_at, Behavior.behavior_id < behavior_id),
+        ))
+    try:
+        stmt = (
+            select(Behavior)
+            .where(*conditions)
+            .order_by(Behavior.occured_at.desc(), Behavior.behavior_id.desc())
+            .limit(limit)
+        )
+        result = await session.scalars(stmt)
+        return list(result)
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve behaviors : {str(e)}",
+            code="BEHAVIOR_FETCH_FAILED",
+        )
+
+async def get_behavior(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    behavior_id : uuid.UUID,
+) -> Behavior | None:
+    try:
+        stmt = select(Behavior).where(
+            Behavior.behavior_id == behavior_id,
+            Behavior.user_id == user_id,
+        )
+        return await session.scalar(stmt)
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve behavior : {str(e)}",
+            code="BEHAVIOR_FETCH_FAILED",
+        )
+
+async def get_category_details(
+    session : AsyncSession,
+    behaviors : list[Behavior],
+) -> dict[uuid.UUID, object]:
+    """
+    behavior_id -> its category row, one primary key lookup per category present
+    """
+    by_category = defaultdict(list)
+    for behavior in behaviors:
+        if behavior.category is not None:
+            by_category[behavior.category].append(behavior.behavior_id)
+    details = {}
+    try:
+        for category, behavior_ids in by_category.items():
+            model = CATEGORY_MODELS[category]
+            result = await session.scalars(
+                select(model).where(model.behavior_id.in_(behavior_ids)) # type: ignore
+            )
+            details.update({row.behavior_id : row for row in result}) # type: ignore
+        return details
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve behavior details : {str(e)}",
+            code="BEHAVIOR_FETCH_FAILED",
+        )
+
+async def get_behavior_for_update(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    behavior_id : uuid.UUID,
+) -> tuple[Behavior, object | None] | None:
+    """
+    the behavior and its category row, both locked until the transaction ends
+    """
+    behavior = await session.scalar(
+        select(Behavior)
+        .where(Behavior.behavior_id == behavior_id, Behavior.user_id == user_id)
+        .with_for_update()
+    )
+    if behavior is None:
+        return None
+    detail = None
+    if behavior.category is not None:
+        model = CATEGORY_MODELS[behavior.category]
+        detail = await session.scalar(
+            select(model).where(model.behavior_id == behavior_id).with_for_update() # type: ignore
+        )
+    return behavior, detail
+
+async def update_behavior(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    behavior_id : uuid.UUID,
+    changes : BehaviorUpdateRequest,
+) -> Behavior | None:
+    """
+    apply the given fields to the behavior and its category row in one
+    transaction, with the daily_user_summary change (old values out, new in);
+    returns the updated behavior, None if the user has no such behavior
+    """
+    try:
+        locked = await get_behavior_for_update(session, user_id, behavior_id)
+        if locked is None:
+            await session.rollback()
+            return None
+        behavior, detail = locked
+        deltas = SummaryDeltas()
+        deltas.add_behavior(user_id, behavior.category, behavior.occured_at, detail, sign=-1)
+
+        for name, value in changes.model_dump(exclude_unset=True, exclude={"category_specific_detail"}).items():
+            setattr(behavior, name, value)
+        if changes.category_specific_detail is not None:
+            if behavior.category is None:
+                raise ClientError(
+                    "Behavior has no category to update details of",
+                    code="INVALID_BEHAVIOR_UPDATE",
+                )
+            schema = CATEGORY_DETAILS[behavior.category]
+            if detail is None:
+                detail = CATEGORY_MODELS[behavior.category](behavior_id=behavior_id)
+                session.add(detail)
+                current = {}
+            else:
+                current = schema.model_validate(detail, from_attributes=True).model_dump()
+            try:
+                merged = schema.model_validate(current | changes.category_specific_detail)
+            except ValidationError:
+                raise ClientError(
+                    f"Invalid category_specific_detail for {behavior.category.value}",
+                    code="INVALID_BEHAVIOR_UPDATE",
+                )
+            for name, value in merged.model_dump().items():
+                setattr(detail, name, value)
+
+        deltas.add_behavior(user_id, behavior.category, behavior.occured_at, detail)
+        await session.flush()
+        await apply_summary_deltas(session, deltas)
+        await session.commit()
+        return behavior
+
+    except IntegrityError:
+        await session.rollback()
+        raise DomainError(
+            message="Behavior update violates a constraint",
+            code="BEHAVIOR_CONSTRAINT_VIOLATION",
+            status_code=409,
+        )
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to update behavior : {str(e)}",
+            code="BEHAVIOR_UPDATE_FAILED",
+        )
+    except Exception:
+        await session.rollback()
+        raise
+
+async def delete_behavior(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    behavior_id : uuid.UUID,
+) -> Behavior | None:
+    """
+    delete the behavior (its category row goes with it, ON DELETE CASCADE) and
+    take it out of daily_user_summary in the same transaction;
+    returns the deleted behavior, None if the user has no such behavior
+    """
+    try:
+        locked = await get_behavior_for_update(session, user_id, behavior_id)
+        if locked is None:
+            await session.rollback()
+            return None
+        behavior, detail = locked
+        deltas = SummaryDeltas()
+        deltas.add_behavior(user_id, behavior.category, behavior.occured_at, detail, sign=-1)
+        await session.execute(
+            delete(Behavior).where(Behavior.behavior_id == behavior_id, Behavior.user_id == user_id)
+        )
+        await apply_summary_deltas(session, deltas)
+        await session.commit()
+        return behavior
+
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to delete behavior : {str(e)}",
+            code="BEHAVIOR_DELETE_FAILED",
+        )
@@ -17,8 +17,44 @@ class ENV(str, enum.Enum):
     PRODUCTION = "PRODUCTION"
     DEVELOPMENT = "DEVELOPMENT"
     TESTING = "TESTING"
+
+class TaskStatus(str, enum.Enum):
+    COMPLETION = "COMPLETION"
+    PENDING = "PENDING"
+    UNDUE = "UNDUE"
+    CANCELLED = "CANCELLED"
+
+class BehaviorCategory(str, enum.Enum):
+    DIET = "Diet"
+    EXPENSE = "Expense"
+    WORKOUT = "WorkOut"
+    TECHWORK = "TechWork"
+
+class BehaviorSource(str, enum.Enum):
+    USER_LOGGED = "USER_LOGGED"
+    TASK_CONFIRMED = "TASK_CONFIRMED"
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
     
 MAX_OTP_ATTEMPTS = 5
 OTP_EXPIRE_TIME_REDIS_SECONDS = 5 * 60
 SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
-OTP_COOLDOWN_TIME_SECONDS = 60
\ No newline at end of file
+OTP_COOLDOWN_TIME_SECONDS = 60
+EMAIL_OUTBOX_STREAM = "email:outbox"
+EMAIL_OUTBOX_DEAD_LETTER_STREAM = "email:outbox:dead"
+EMAIL_OUTBOX_GROUP = "email-workers"
+EMAIL_OUTBOX_MAXLEN = 100_000
+BEHAVIOR_BATCH_MAX_ITEMS = 500
+BEHAVIOR_PAGE_DEFAULT_LIMIT = 50
+BEHAVIOR_PAGE_MAX_LIMIT = 200
+SUMMARY_MAX_RANGE_DAYS = 366
+EXPENSE_ANALYTICS_DEFAULT_DAYS = 90
+EXPENSE_ANALYTICS_MAX_DAYS = 366
+EXPORT_FETCH_SIZE = 1000
+BEHAVIOR_IMPORT_MAX_ROWS = 1_000_000
+BEHAVIOR_IMPORT_MAX_RECORD_CHARS = 1 << 20
+BEHAVIOR_IMPORT_PROGRESS_ROWS = 50_000
+BEHAVIOR_IMPORT_MAX_REPORTED_ERRORS = 100
+BEHAVIOR_IMPORT_READ_SIZE = 1 << 16
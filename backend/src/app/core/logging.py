@@ -1,41 +1,127 @@
-
+import atexit
+import json
 import logging
-import logging.config
+import logging.handlers
+import queue
+import random
+import sys
 from app.core.log_context import request_id_ctx
+from app.core.metrics import LOG_RECORDS_DROPPED
+from app.core.setting import LoggingConfig
+
+# < ------------- Logging pipeline --------------->
+# The event loop thread only filters a record, stamps the request id (a
+# contextvar, so it has to happen on the loop) and puts it on a queue. A
+# QueueListener thread does the formatting and the write to stdout, so a slow
+# or blocked stdout never stalls request handling. When the queue is full
+# records are dropped instead of blocking, and counted in log_records_dropped
+# (/metrics) by level.
+
+# extras worth a key of their own in json output
+JSON_EXTRA_FIELDS = ("status_code", "duration_ms", "error_code")
+
+_listener : logging.handlers.QueueListener | None = None
+
 class RequestIdFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool | logging.LogRecord:
         record.request_id = request_id_ctx.get(None)
         return True
-    
-def setup_logging(log_level : str) -> None:
-    logging_config = {
-        "version" : 1,
-        "disable_existing_loggers" : False,
-        "formatters" : {
-            "default" : {
-                "format" : (
-                    "%(asctime)s | %(levelname)s | %(name)s | req_id=%(request_id)s | %(message)s"
-                )
-            }
-        },
-        "filters" : {
-            "request_id" : {
-                "()" : "app.core.logging.RequestIdFilter"
-            }
-        },
-        "handlers" : {
-            "console": {
-                "class" : "logging.StreamHandler",
-                "formatter": "default",
-                "filters" : ["request_id"],
-                "stream"  : "ext://sys.stdout",
-            }
-        },
-        "root" : {
-            "level" : log_level,
-            "handlers" : ["console"],
-        },
-        
-    }
-    
-    logging.config.dictConfig(logging_config)
\ No newline at end of file
+
+class SamplingFilter(logging.Filter):
+    """
+    keep only a share of INFO and lower records of the configured loggers,
+    WARNING and above always pass
+    """
+    def __init__(self, sample_rates : dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record : logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.sample_rates.get(record.name)
+        return rate is None or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """
+    one json object per line: ts, level, logger, message, request_id,
+    status_code/duration_ms/error_code when set, exc_info when present
+    """
+    def format(self, record : logging.LogRecord) -> str:
+        payload = {
+            "ts" : round(record.created, 3),
+            "level" : record.levelname,
+            "logger" : record.name,
+            "message" : record.getMessage(),
+            "request_id" : getattr(record, "request_id", None),
+        }
+        for key in JSON_EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s | %(levelname)s | %(name)s | req_id=%(request_id)s | %(message)s"
+        )
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves all formatting to the listener thread and
+    drops records instead of raising when the queue is full
+    """
+    dropped = 0
+
+    def prepare(self, record : logging.LogRecord) -> logging.LogRecord:
+        # the stock prepare formats the record (traceback included) here, on
+        # the caller's thread; only resolve %-args so mutable args can't change
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record : logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+            LOG_RECORDS_DROPPED.labels(record.levelname).inc()
+
+def stop_logging() -> None:
+    """
+    flush queued records and stop the writer thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(log_level : str, config : LoggingConfig | None = None) -> None:
+    global _listener
+    config = config or LoggingConfig()
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if config.format == "json" else TextFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=config.queue_size))
+    # sampling first, so dropped records skip the contextvar lookup too
+    if config.sample_rates:
+        handler.addFilter(SamplingFilter(config.sample_rates))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(log_level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+atexit.register(stop_logging)
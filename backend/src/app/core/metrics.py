@@ -0,0 +1,116 @@
+"""
+Prometheus metrics, served at GET /metrics (app.core.router) in the text
+exposition format. No fastapi import here: workers and CLIs record metrics too.
+
+Single process: metrics live in the default registry of this process.
+Several uvicorn workers: set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory shared by the workers (wipe it before the server starts, e.g.
+`rm -rf "$PROMETHEUS_MULTIPROC_DIR"/* && uvicorn ... --workers 4`). Every
+worker then writes its samples to mmap files there and /metrics aggregates
+the files of all workers, whichever worker serves the scrape.
+
+Recording is a dict lookup for the label set plus a locked float add
+(an mmap write in multiprocess mode), a few microseconds per call; see
+benchmarks/metrics_overhead.py.
+"""
+import os
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# request latencies, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+# redis/db calls and pool waits are much shorter
+CALL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# < ------------- HTTP --------------->
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+APP_ERRORS = Counter(
+    "app_errors",
+    "Error responses by AppError.code",
+    ["code"],
+)
+
+# < ------------- Redis / DB --------------->
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round trips by command (PIPELINE for a whole pipeline)",
+    ["command"],
+    buckets=CALL_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Statement execution time by statement type",
+    ["operation"],
+    buckets=CALL_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=CALL_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts",
+    "Checkouts that failed waiting for a connection",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_SESSION_REQUESTS = Counter(
+    "db_session_requests",
+    "Requests that declared a db session, by whether it ever checked out a connection",
+    ["route", "connected"],
+)
+DB_POOL_CONNECTIONS = Counter(
+    "db_pool_connections",
+    "Pool connection lifecycle events",
+    ["event"], # created | recycled | invalidated | closed
+)
+
+# < ------------- Logging --------------->
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped",
+    "Log records dropped because the logging queue was full",
+    ["level"],
+)
+
+def observe_request(method : str, route : str, status : int, seconds : float) -> None:
+    HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(seconds)
+
+def count_error(code : str) -> None:
+    APP_ERRORS.labels(code).inc()
+
+def render_metrics() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def mark_process_dead() -> None:
+    """
+    drop this worker's live gauges, call on shutdown
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,36 +1,76 @@
-from fastapi import Request
 import logging
 import time
 import uuid
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.log_context import request_id_ctx
+from app.core.metrics import HTTP_REQUESTS_IN_FLIGHT, observe_request
 
 logger = logging.getLogger("http.request")
 
-async def logging_middleware(request : Request, call_next):
-    start_time = time.monotonic()
-    
-    req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-    request.state.request_id = req_id
-    token = request_id_ctx.set(req_id)
-    response = None
-    
-    try:
-        response = await call_next(request)
-        return response
-    except Exception:
-        logger.exception("Unhandled exception")
-        raise
-    finally:
-        duration = time.monotonic() - start_time 
-        status_code = response.status_code if response is not None else 500
-        
-        logger.info(
-            "%s %s",
-            request.method,
-            request.url.path,
-            extra={
-                "status_code" : status_code,
-                "duration_ms" : round(duration*1000, 2),
-            }
-        )
-        request_id_ctx.reset(token)
\ No newline at end of file
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware: request id, timing, metrics and the request log line.
+    - request_id_ctx is set once, in the request's own task, so everything
+      below (handlers, dependencies, exception handlers) sees it without
+      re-binding; request.state.request_id is kept for code reading it there
+    - the status code is taken from http.response.start on the way out
+    """
+    def __init__(self, app : ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope : Scope, receive : Receive, send : Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        req_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                req_id = value.decode("latin-1")
+                break
+        req_id = req_id or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = req_id
+        token = request_id_ctx.set(req_id)
+
+        status_code = 500
+        async def send_with_status(message : Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            # recorded as a 500 here; the traceback is logged once, by the
+            # unhandled error handler. request_id_ctx stays set for it: it
+            # runs in ServerErrorMiddleware, outside this one, in the same task
+            status_code = 500
+            token = None
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            in_flight.dec()
+            # label by route template, raw paths would be unbounded
+            route = scope.get("route")
+            observe_request(
+                method,
+                route.path if route is not None else "unmatched",
+                status_code,
+                duration,
+            )
+            logger.info(
+                "%s %s",
+                method,
+                scope["path"],
+                extra={
+                    "status_code" : status_code,
+                    "duration_ms" : round(duration*1000, 2),
+                }
+            )
+            if token is not None:
+                request_id_ctx.reset(token)
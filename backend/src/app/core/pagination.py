@@ -0,0 +1,27 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from app.core.exceptions import ClientError
+
+# < ------------- Keyset cursors --------------->
+# A page ends at some (timestamp, id); the next page is everything strictly
+# before it in (timestamp DESC, id DESC) order. The cursor is that pair,
+# base64url encoded so clients treat it as opaque. Unlike OFFSET, fetching
+# page n costs the same as page 1: the index seeks straight to the pair.
+
+def encode_cursor(timestamp : datetime.datetime, row_id : uuid.UUID) -> str:
+    raw = json.dumps({"t" : timestamp.isoformat(), "id" : str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor : str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        timestamp = datetime.datetime.fromisoformat(data["t"])
+        if timestamp.tzinfo is None:
+            raise ValueError("naive timestamp")
+        return timestamp, uuid.UUID(data["id"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ClientError("Invalid cursor", code="INVALID_CURSOR")
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from typing import Literal
+from fastapi import Request, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.exceptions import ClientError, ServerError
+from app.core.setting import settings
+from app.db.redis.scripts import run_redis_script
+
+# < ------------- Policies --------------->
+# Each policy maps to one lua script in app.db.redis.scripts, so a limit
+# check is a single atomic round trip whatever the policy.
+
+@dataclass(frozen=True)
+class FixedWindow:
+    """
+    at most `limit` hits per `window_seconds`, counter resets at window end
+    """
+    limit : int
+    window_seconds : int
+    script = "rate_limit_fixed_window"
+
+    def args(self) -> list:
+        return [self.limit, self.window_seconds * 1000]
+
+@dataclass(frozen=True)
+class SlidingWindow:
+    """
+    at most `limit` hits within any `window_seconds` long interval
+    """
+    limit : int
+    window_seconds : int
+    script = "rate_limit_sliding_window"
+
+    def args(self) -> list:
+        return [self.limit, self.window_seconds * 1000]
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """
+    bursts up to `capacity`, refilled at `refill_per_second`
+    """
+    capacity : int
+    refill_per_second : float
+    cost : int = 1
+    script = "rate_limit_token_bucket"
+
+    def args(self) -> list:
+        return [self.capacity, self.refill_per_second, self.cost]
+
+RateLimitPolicy = FixedWindow | SlidingWindow | TokenBucket
+
+@dataclass
+class RateLimitResult:
+    allowed : bool
+    retry_after_ms : int
+    remaining : int
+
+async def hit_rate_limit(
+    redis_client : Redis,
+    key : str,
+    policy : RateLimitPolicy,
+) -> RateLimitResult:
+    """
+    record one hit against key and return whether it's within the policy
+    """
+    try:
+        allowed, retry_after_ms, remaining = await run_redis_script(
+            redis_client=redis_client,
+            name=policy.script,
+            keys=[key],
+            args=policy.args(),
+        )
+    except RedisError as e:
+        raise ServerError(str(e))
+
+    return RateLimitResult(
+        allowed=bool(allowed),
+        retry_after_ms=max(int(retry_after_ms), 0),
+        remaining=int(remaining),
+    )
+
+# < ------------- Route dependency --------------->
+RateLimitKey = Literal["ip", "email", "user_id"]
+
+def _client_ip(request : Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+async def _resolve_key(request : Request, key : RateLimitKey) -> str:
+    if key == "email":
+        # starlette caches the body, the route can still parse it afterwards
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        email = body.get("email") if isinstance(body, dict) else None
+        if isinstance(email, str) and email:
+            return f"email:{email.strip().lower()}"
+
+    elif key == "user_id":
+        # set by get_current_user, so declare that dependency first
+        user_id = getattr(request.state, "user_id", None)
+        if user_id:
+            return f"user_id:{user_id}"
+
+    if key == "ip":
+        return f"ip:{_client_ip(request)}"
+    # a fallback bucket of its own, never the plain ip key another limiter counts in
+    return f"no-{key}:{_client_ip(request)}"
+
+def rate_limit(name : str, policy : RateLimitPolicy, key : RateLimitKey = "ip"):
+    """
+    build a FastAPI dependency enforcing policy per ip, email or user_id.
+    email/user_id fall back to the client ip when the request doesn't carry them,
+    counted apart from key="ip". The policy is part of the redis key: every
+    script owns its own data type, two limiters never share a key.
+
+    usage:
+        @router.post('/x', dependencies=[Depends(rate_limit("x", FixedWindow(5, 60)))])
+    """
+    async def dependency(request : Request) -> None:
+        if not settings.rate_limit_enabled:
+            return
+        subject = await _resolve_key(request, key)
+        result = await hit_rate_limit(
+            redis_client=request.app.state.redis,
+            key=f"ratelimit:{name}:{policy.script.removeprefix('rate_limit_')}:{subject}",
+            policy=policy,
+        )
+        if not result.allowed:
+            retry_after = -(-result.retry_after_ms // 1000)
+            raise ClientError(
+                message=f"Too many requests! Try again in {retry_after} seconds",
+                code="TOO_MANY_REQUESTS",
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+    return dependency
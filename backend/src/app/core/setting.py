@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from app.core.enums import ENV
+from dataclasses import dataclass, field
+from functools import cache
+from typing import cast
+from app.core.enums import ENV, SENDGRID_URL
 import os
 from pathlib import Path
 
@@ -11,37 +13,114 @@ class DatabaseConfig:
     POSTGRES_USER : str
     POSTGRES_PORT : str = "5432"
     POSTGRES_HOST : str = "postgresql"
+
+@dataclass
+class DatabasePoolConfig:
+    pool_size : int = 10
+    max_overflow : int = 10
+    # seconds to wait for a free connection before failing the checkout
+    pool_timeout : float = 30
+    # reconnect connections older than this, -1 never
+    pool_recycle : int = 30 * 60
+    pool_pre_ping : bool = True
+    # prepared statements kept per connection, 0 disables (needed behind pgbouncer in transaction mode)
+    statement_cache_size : int = 500
+
 @dataclass
 class SendGridConfig:
     SENDGRID_API_KEY : str
     SENDGRID_SENDER_EMAIL : str
+    # overridable so a local stub can stand in for sendgrid
+    SENDGRID_URL : str = SENDGRID_URL
+
+@dataclass
+class EmailOutboxConfig:
+    concurrency : int = 8
+    max_attempts : int = 5
+    backoff_base_seconds : float = 1.0
+    # run a worker inside every api process, disable when running app.email.worker
+    in_process_worker : bool = True
+
+@dataclass
+class RefreshTokenPurgeConfig:
+    # 0 disables the in-app scheduled purge
+    interval_seconds : float = 60 * 60
+    batch_size : int = 1000
+    # rotated rows are kept this long for reuse detection
+    rotated_grace_minutes : float = 24 * 60
+
+@dataclass
+class LoggingConfig:
+    format : str = "text" # text | json
+    # logger name -> share of its INFO and lower records kept, e.g. {"http.request" : 0.1}
+    sample_rates : dict[str, float] = field(default_factory=dict)
+    # records waiting for the writer thread, dropped beyond that
+    queue_size : int = 10_000
+
+@dataclass
+class HashPoolConfig:
+    executor : str = "thread" # thread | process
+    max_workers : int = 4
+    max_queue : int = 64
     
 @dataclass
 class Setting:
     app_env : ENV
     log_level : str
+    logging : LoggingConfig
     database : DatabaseConfig
+    database_pool : DatabasePoolConfig
     REDIS_PASSWORD : str
     SENDGRID : SendGridConfig
     jwt_secret_key : str
     access_token_expires_minutes : float
     refresh_token_expires_minutes : float
+    refresh_rotation_grace_seconds : float
+    hash_pool : HashPoolConfig
+    otp_hash_scheme : str
+    otp_hmac_key : str
+    email_outbox : EmailOutboxConfig
+    access_token_cache_enabled : bool
+    access_token_cache_size : int
+    refresh_session_cache_enabled : bool
+    revocation_snapshot_seconds : float
+    refresh_token_purge : RefreshTokenPurgeConfig
+    rate_limit_enabled : bool
+    expense_analytics_cache_enabled : bool
+    expense_analytics_cache_ttl_seconds : int
 
-def read_secret(name : str):
-    path = Path('/run/secrets') / name
+def read_secret(name : str, default : str | None = None):
+    """
+    first of: env var NAME, the file at NAME_FILE, SECRETS_DIR/NAME
+    (SECRETS_DIR defaults to /run/secrets), default
+    """
+    value = os.getenv(name)
+    if value is not None:
+        return value.strip()
+    
+    file_override = os.getenv(f"{name}_FILE")
+    path = Path(file_override) if file_override else Path(os.getenv("SECRETS_DIR", "/run/secrets")) / name
     if not path.exists():
+        if default is not None:
+            return default
         raise RuntimeError(f"secret {name} not found")
     return path.read_text().strip()
+
+def load_database_config() -> DatabaseConfig:
+    """
+    only the postgres secrets, for tools that need nothing else (alembic)
+    """
+    return DatabaseConfig(
+        POSTGRES_DB=read_secret("POSTGRES_DB"),
+        POSTGRES_PASSWORD=read_secret("POSTGRES_PASSWORD"),
+        POSTGRES_USER=read_secret("POSTGRES_USER"),
+    )
   
 def load_settings() -> Setting:
-    database = {
-        "POSTGRES_DB" : read_secret("POSTGRES_DB"),
-        "POSTGRES_PASSWORD" : read_secret("POSTGRES_PASSWORD"),
-        "POSTGRES_USER" : read_secret("POSTGRES_USER"),
-    }
     SENDGRID = SendGridConfig(
         SENDGRID_API_KEY=read_secret("SENDGRID_API_KEY"),
         SENDGRID_SENDER_EMAIL=read_secret("SENDGRID_SENDER_EMAIL"),
+        SENDGRID_URL=os.getenv("SENDGRID_URL", SENDGRID_URL),
     )
     
     raw_env = os.getenv("APP_ENV", ENV.PRODUCTION.value)
@@ -54,20 +133,127 @@ def load_settings() -> Setting:
     if not log_level:
         log_level = "DEBUG" if app_env == ENV.DEVELOPMENT else "INFO"
     
+    log_format = os.getenv("LOG_FORMAT", "text" if app_env == ENV.DEVELOPMENT else "json").lower()
+    if log_format not in ("text", "json"):
+        raise RuntimeError(f"Invalid LOG_FORMAT: {log_format}")
+    # LOG_SAMPLE_RATES="http.request=0.1,httpx=0"
+    log_sample_rates = {}
+    for entry in filter(None, os.getenv("LOG_SAMPLE_RATES", "").split(",")):
+        name, _, rate = entry.partition("=")
+        try:
+            log_sample_rates[name.strip()] = float(rate)
+        except ValueError:
+            raise RuntimeError(f"Invalid LOG_SAMPLE_RATES entry: {entry}")
+    logging_config = LoggingConfig(
+        format=log_format,
+        sample_rates=log_sample_rates,
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", 10_000)),
+    )
+    
+    database_pool = DatabasePoolConfig(
+        pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE_SECONDS", 30 * 60)),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500)),
+    )
+    
     REDIS_PASSWORD = read_secret("REDIS_PASSWORD")
     jwt_secret_key = read_secret("JWT_SECRET_KEY")
     access_token_expires_minutes = float(os.getenv("access_token_expires_minutes", 30.0))
-    refresh_token_expires_minutes = float(os.getenv("access_token_expires_minutes", 7 * 24 * 60))
+    refresh_token_expires_minutes = float(os.getenv("refresh_token_expires_minutes", 7 * 24 * 60))
+    # a token rotated this recently is a concurrent refresh (two tabs), not reuse
+    refresh_rotation_grace_seconds = float(os.getenv("REFRESH_ROTATION_GRACE_SECONDS", 10))
+    
+    hash_executor = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").lower()
+    if hash_executor not in ("thread", "process"):
+        raise RuntimeError(f"Invalid PASSWORD_HASH_EXECUTOR: {hash_executor}")
+    hash_pool = HashPoolConfig(
+        executor=hash_executor,
+        max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", 4)),
+        max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64)),
+    )
+    
+    otp_hash_scheme = os.getenv("OTP_HASH_SCHEME", "hmac").lower()
+    if otp_hash_scheme not in ("argon2", "hmac"):
+        raise RuntimeError(f"Invalid OTP_HASH_SCHEME: {otp_hash_scheme}")
+    # empty -> derived from the jwt secret in app.auth.security
+    otp_hmac_key = read_secret("OTP_HMAC_KEY", default="")
+    
+    email_outbox = EmailOutboxConfig(
+        concurrency=int(os.getenv("EMAIL_WORKER_CONCURRENCY", 8)),
+        max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", 5)),
+        backoff_base_seconds=float(os.getenv("EMAIL_BACKOFF_BASE_SECONDS", 1.0)),
+        in_process_worker=os.getenv("EMAIL_IN_PROCESS_WORKER", "true").lower() == "true",
+    )
+    
+    access_token_cache_enabled = os.getenv("ACCESS_TOKEN_CACHE_ENABLED", "true").lower() == "true"
+    access_token_cache_size = int(os.getenv("ACCESS_TOKEN_CACHE_SIZE", 10_000))
+    refresh_session_cache_enabled = os.getenv("REFRESH_SESSION_CACHE_ENABLED", "true").lower() == "true"
+    # worst case delay for a revocation to reach a worker that missed the pub/sub message
+    revocation_snapshot_seconds = float(os.getenv("REVOCATION_SNAPSHOT_SECONDS", 30))
+    refresh_token_purge = RefreshTokenPurgeConfig(
+        interval_seconds=float(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", 60 * 60)),
+        batch_size=int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", 1000)),
+        rotated_grace_minutes=float(os.getenv("REFRESH_TOKEN_ROTATED_GRACE_MINUTES", 24 * 60)),
+    )
+    
+    # off only for load tests, where every request comes from one ip
+    rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    
+    expense_analytics_cache_enabled = os.getenv("EXPENSE_ANALYTICS_CACHE_ENABLED", "true").lower() == "true"
+    expense_analytics_cache_ttl_seconds = int(os.getenv("EXPENSE_ANALYTICS_CACHE_TTL_SECONDS", 24 * 60 * 60))
     
     return Setting(
         app_env = app_env,
         log_level=log_level,
-        database = DatabaseConfig(**database),
+        logging=logging_config,
+        database = load_database_config(),
+        database_pool=database_pool,
         REDIS_PASSWORD=REDIS_PASSWORD,
         jwt_secret_key = jwt_secret_key,
         access_token_expires_minutes=access_token_expires_minutes,
         refresh_token_expires_minutes=refresh_token_expires_minutes,
+        refresh_rotation_grace_seconds=refresh_rotation_grace_seconds,
         SENDGRID=SENDGRID,
+        hash_pool=hash_pool,
+        otp_hash_scheme=otp_hash_scheme,
+        otp_hmac_key=otp_hmac_key,
+        email_outbox=email_outbox,
+        access_token_cache_enabled=access_token_cache_enabled,
+        access_token_cache_size=access_token_cache_size,
+        refresh_session_cache_enabled=refresh_session_cache_enabled,
+        revocation_snapshot_seconds=revocation_snapshot_seconds,
+        refresh_token_purge=refresh_token_purge,
+        rate_limit_enabled=rate_limit_enabled,
+        expense_analytics_cache_enabled=expense_analytics_cache_enabled,
+        expense_analytics_cache_ttl_seconds=expense_analytics_cache_ttl_seconds,
     )
+
+# < ------------- Lazy settings --------------->
+# Nothing is read at import: the env and secrets are loaded on the first
+# attribute access of `settings` (or get_settings() call) and cached for
+# the process. Importing the app, alembic or a worker module needs no secrets.
+
+@cache
+def get_settings() -> Setting:
+    return load_settings()
+
+def reset_settings() -> None:
+    """
+    drop the cached settings, the next access reloads env and secrets
+    """
+    get_settings.cache_clear()
+
+class LazySettings:
+    """
+    stands in for the Setting instance, loads it on first attribute access
+    """
+    def __getattr__(self, name : str):
+        return getattr(get_settings(), name)
     
-settings = load_settings()
\ No newline at end of file
+    def __setattr__(self, name : str, value) -> None:
+        setattr(get_settings(), name, value)
+
+settings = cast(Setting, LazySettings())
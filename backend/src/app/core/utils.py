@@ -1,9 +1,10 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 import httpx
-from app.core.middleware import logging_middleware
+from app.core.middleware import RequestContextMiddleware
 from app.core.exceptions import AppError
 from app.core.exception_handler import (
     handle_app_error, 
@@ -11,12 +12,20 @@ from app.core.exception_handler import (
     validation_error_handler,
 )
 from app.db.redis.config import create_redis
+from app.db.redis.scripts import load_redis_scripts
+from app.auth.security import init_hash_executor, shutdown_hash_executor
+from app.core.setting import settings
+from app.email.worker import EmailOutboxWorker
+from app.auth.revocation import session_denylist
+from app.auth.retention import purge_refresh_tokens_periodically
+from app.db.config import dispose_engine, get_sessionmaker
+from app.core.metrics import mark_process_dead
 
 logger = logging.getLogger("redis_logger")
 
 
 def add_all_middlewares(app : FastAPI):
-    app.middleware("http")(logging_middleware)
+    app.add_middleware(RequestContextMiddleware)
     
 def register_exception_handlers(app : FastAPI):
     app.exception_handler(AppError)(handle_app_error)
@@ -28,8 +37,23 @@ async def app_lifespan(app : FastAPI):
     # before startup
     # create redis client and store it in app state
     app.state.redis = create_redis()
+    # register lua scripts once, handlers call them by sha
+    await load_redis_scripts(app.state.redis)
+    # mirror revoked sessions in memory for get_current_user
+    await session_denylist.start(app.state.redis)
     # storehttpx client in app state
     app.state.httpx_client = httpx.AsyncClient(timeout=10)
+    # argon2 worker pool used by the *_async password helpers
+    init_hash_executor()
+    # deliver queued emails from this process unless a standalone worker does
+    email_worker = email_worker_task = None
+    if settings.email_outbox.in_process_worker:
+        email_worker = EmailOutboxWorker(app.state.redis, app.state.httpx_client)
+        email_worker_task = asyncio.create_task(email_worker.run())
+    # batched cleanup of expired/rotated refresh tokens
+    purge_task = None
+    if settings.refresh_token_purge.interval_seconds > 0:
+        purge_task = asyncio.create_task(purge_refresh_tokens_periodically(get_sessionmaker()))
      
     logger.log(
         level=logging.INFO,
@@ -37,8 +61,18 @@ async def app_lifespan(app : FastAPI):
     )
     yield
     # Shutdown
+    if purge_task:
+        purge_task.cancel()
+        await asyncio.gather(purge_task, return_exceptions=True)
+    await session_denylist.stop()
+    if email_worker and email_worker_task:
+        email_worker.stop()
+        await email_worker_task
     await app.state.redis.aclose()
     await app.state.httpx_client.aclose()
+    shutdown_hash_executor()
+    await dispose_engine()
+    mark_process_dead()
     logger.log(
         level=logging.INFO,
         msg="Redis client has been shutdown successfully",
@@ -1,25 +1,80 @@
-from typing import Annotated
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from fastapi import Depends
-from app.core.setting import settings
+from functools import cache
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
+from app.core.setting import DatabaseConfig, settings
 from app.core.enums import ENV
+from app.db.pool_metrics import InstrumentedAsyncPool, instrument_engine
 
-database = settings.database
+# The engine and session factory are built on first use, not at import, so
+# importing models/routers (alembic, workers, scripts) reads no secrets.
+# The request dependency lives in app.db.dependencies, away from fastapi here.
 
-POSTGRES_DB = database.POSTGRES_DB
-POSTGRES_PASSWORD = database.POSTGRES_PASSWORD
-POSTGRES_USER = database.POSTGRES_USER
-POSTGRES_PORT = database.POSTGRES_PORT
-POSTGRES_HOST = database.POSTGRES_HOST
+def database_url(database : DatabaseConfig | None = None) -> str:
+    database = database or settings.database
+    return (
+        f"postgresql+asyncpg://{database.POSTGRES_USER}:{database.POSTGRES_PASSWORD}"
+        f"@{database.POSTGRES_HOST}:{database.POSTGRES_PORT}/{database.POSTGRES_DB}"
+    )
 
-DB_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+@cache
+def get_engine() -> AsyncEngine:
+    pool_config = settings.database_pool
+    engine = create_async_engine(
+        database_url(),
+        echo = settings.app_env == ENV.DEVELOPMENT,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=pool_config.pool_size,
+        max_overflow=pool_config.max_overflow,
+        pool_timeout=pool_config.pool_timeout,
+        pool_recycle=pool_config.pool_recycle,
+        pool_pre_ping=pool_config.pool_pre_ping,
+        connect_args={
+            # sqlalchemy's per connection prepared statement cache (the asyncpg
+            # dialect prepares every statement through it)
+            "prepared_statement_cache_size" : pool_config.statement_cache_size,
+            # asyncpg's own cache, only used by raw asyncpg calls
+            "statement_cache_size" : pool_config.statement_cache_size,
+        },
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
 
-engine = create_async_engine(DB_URL, echo = settings.app_env == ENV.DEVELOPMENT)
+class TrackedSession(Session):
+    """
+    Session that sets info["connected"] once it checks out a connection.
+    A session only checks one out when its first query begins a transaction,
+    so a request that fails before touching postgres never holds one.
+    """
 
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+@event.listens_for(TrackedSession, "after_begin")
+def _mark_connected(session, transaction, connection):
+    session.info["connected"] = True
 
-async def get_db_session():
-    async with async_session() as session:
-        yield session
+@cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_engine(), expire_on_commit=False, sync_session_class=TrackedSession)
 
-DbSession = Annotated[AsyncSession, Depends(get_db_session)]
\ No newline at end of file
+def async_session() -> AsyncSession:
+    """
+    new session from the lazily built sessionmaker
+    """
+    return get_sessionmaker()()
+
+async def release_connection(session : AsyncSession) -> None:
+    """
+    end the session's transaction so its connection goes back to the pool
+    before a slow step that doesn't need it (argon2); loaded objects stay
+    usable (expire_on_commit=False), the next query checks out a connection again
+    """
+    if session.in_transaction():
+        await session.commit()
+
+async def dispose_engine() -> None:
+    """
+    close the pool if the engine was ever built, the next use builds a new one
+    """
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+    get_sessionmaker.cache_clear()
+    get_engine.cache_clear()
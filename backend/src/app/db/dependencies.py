@@ -0,0 +1,22 @@
+from typing import Annotated
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.config import async_session
+from app.db.pool_metrics import pool_metrics
+
+async def get_db_session(request : Request):
+    """
+    request scoped session; no pooled connection is checked out until its
+    first query. Counted per route in db_session_requests{connected}.
+    """
+    async with async_session() as session:
+        try:
+            yield session
+        finally:
+            route = request.scope.get("route")
+            pool_metrics.observe_session(
+                route.path if route is not None else "unmatched",
+                session.sync_session.info.get("connected", False),
+            )
+
+DbSession = Annotated[AsyncSession, Depends(get_db_session)]
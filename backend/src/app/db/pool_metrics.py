@@ -0,0 +1,154 @@
+import bisect
+import time
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CONNECTIONS,
+    DB_POOL_IN_USE,
+    DB_QUERY_DURATION,
+    DB_SESSION_REQUESTS,
+)
+
+# < ------------- DB pool instrumentation --------------->
+# Splits request latency into "waiting for a connection" and "running the
+# query". Counters are plain attributes bumped from pool events, cheap enough
+# for every checkout; pool_stats() reads them together with the live pool
+# status. Everything is mirrored into the prometheus metrics (app.core.metrics)
+# so /metrics has it aggregated over all workers.
+
+# statement types with their own label, anything else is OTHER
+# (CTEs are WITH)
+QUERY_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+# checkout wait histogram buckets, seconds
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+@dataclass
+class PoolMetrics:
+    checkouts : int = 0
+    checkout_timeouts : int = 0
+    wait_seconds_total : float = 0.0
+    wait_seconds_max : float = 0.0
+    # one count per WAIT_BUCKETS entry plus +Inf, not cumulative
+    wait_buckets : list[int] = field(default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1))
+    connections_created : int = 0
+    connections_recycled : int = 0
+    connections_invalidated : int = 0
+    connections_closed : int = 0
+    # request scoped sessions (app.db.dependencies), and those that never
+    # ran a query, so the pool can be sized for the requests that do
+    sessions : int = 0
+    sessions_unused : int = 0
+
+    def observe_wait(self, seconds : float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+        DB_POOL_CHECKOUT_WAIT.observe(seconds)
+
+    def observe_session(self, route : str, connected : bool) -> None:
+        self.sessions += 1
+        if not connected:
+            self.sessions_unused += 1
+        DB_SESSION_REQUESTS.labels(route, "true" if connected else "false").inc()
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that times how long each checkout waits
+    (pool events fire only once a connection is handed out, so the wait
+    itself can't be measured from them)
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeoutError:
+            # pool_timeout passed with every connection in use; connect
+            # failures (refused, auth) propagate uncounted
+            pool_metrics.checkout_timeouts += 1
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - start)
+        return entry
+
+def instrument_engine(engine : Engine) -> None:
+    """
+    register pool and statement timing listeners (pass engine.sync_engine
+    for an AsyncEngine)
+    """
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # a record that already had a connection is replacing a recycled or
+        # invalidated one, a fresh record is a new pool slot
+        if connection_record.record_info.get("instrumented"):
+            pool_metrics.connections_recycled += 1
+            DB_POOL_CONNECTIONS.labels("recycled").inc()
+        else:
+            connection_record.record_info["instrumented"] = True
+            pool_metrics.connections_created += 1
+            DB_POOL_CONNECTIONS.labels("created").inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_IN_USE.inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_IN_USE.dec()
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.connections_invalidated += 1
+        DB_POOL_CONNECTIONS.labels("invalidated").inc()
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        pool_metrics.connections_closed += 1
+        DB_POOL_CONNECTIONS.labels("closed").inc()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        operation = statement.lstrip()[:6].upper()
+        if operation not in QUERY_OPERATIONS:
+            operation = "WITH" if operation.startswith("WITH") else "OTHER"
+        DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+def pool_stats(engine : Engine) -> dict:
+    """
+    counters plus the current pool status, for logs, metrics and debugging
+    """
+    pool = engine.pool
+    checkouts = pool_metrics.checkouts
+    return {
+        "pool_size" : pool.size(), # type: ignore
+        "in_use" : pool.checkedout(), # type: ignore
+        "idle" : pool.checkedin(), # type: ignore
+        # negative while the pool hasn't opened pool_size connections yet
+        "overflow" : pool.overflow(), # type: ignore
+        "checkouts" : checkouts,
+        "checkout_timeouts" : pool_metrics.checkout_timeouts,
+        "wait_ms_avg" : round(pool_metrics.wait_seconds_total / checkouts * 1000, 3) if checkouts else 0.0,
+        "wait_ms_max" : round(pool_metrics.wait_seconds_max * 1000, 3),
+        "connections_created" : pool_metrics.connections_created,
+        "connections_recycled" : pool_metrics.connections_recycled,
+        "connections_invalidated" : pool_metrics.connections_invalidated,
+        "connections_closed" : pool_metrics.connections_closed,
+        "sessions" : pool_metrics.sessions,
+        "sessions_unused" : pool_metrics.sessions_unused,
+    }
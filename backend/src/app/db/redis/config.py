@@ -1,12 +1,41 @@
+import time
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from app.core.metrics import REDIS_COMMAND_DURATION
 from app.core.setting import settings
 
+class InstrumentedPipeline(Pipeline):
+    """
+    one redis_command_duration_seconds{command="PIPELINE"} sample per execute
+    """
+    async def execute(self, raise_on_error : bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.labels("PIPELINE").observe(time.perf_counter() - start)
+
+class InstrumentedRedis(Redis):
+    """
+    Redis client that times every round trip into redis_command_duration_seconds
+    """
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction : bool = True, shard_hint : str | None = None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 def create_redis():
-    return Redis(
+    return InstrumentedRedis(
         host="redis",
         port=6379,
         password=settings.REDIS_PASSWORD,
         decode_responses=True,
         max_connections=20,
     )
-
@@ -0,0 +1,171 @@
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
+
+# < ------------- Lua scripts --------------->
+# Every script runs atomically on the redis server, so a multi step
+# read-modify-write costs one round trip and can't interleave with
+# another client doing the same thing.
+
+# KEYS[1] = verification_id
+# ARGV[1] = max attempts
+# ARGV[2] = otp scheme the candidate digest was produced with ("" if none)
+# ARGV[3] = candidate otp digest (only for deterministic schemes)
+# returns {status} or {status, flat hash fields}
+#   EXPIRED   -> key does not exist
+#   INVALID   -> key is not a hash
+#   TOO_MANY  -> attempts exceeded, key deleted
+#   MISMATCH  -> candidate digest didn't match
+#   OK        -> candidate digest matched, key deleted (consumed)
+#   CHECK     -> stored scheme can't be compared here, caller must verify
+VERIFY_OTP = """
+-- no early exit on the first differing byte, so the compare doesn't leak timing
+local function equal(a, b)
+    if #a ~= #b then
+        return false
+    end
+    local diff = 0
+    for i = 1, #a do
+        if a:byte(i) ~= b:byte(i) then
+            diff = diff + 1
+        end
+    end
+    return diff == 0
+end
+
+local key_type = redis.call('TYPE', KEYS[1])['ok']
+if key_type == 'none' then
+    return {'EXPIRED'}
+end
+if key_type ~= 'hash' then
+    return {'INVALID'}
+end
+
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[1]) then
+    redis.call('DEL', KEYS[1])
+    return {'TOO_MANY'}
+end
+
+local data = redis.call('HGETALL', KEYS[1])
+local scheme = redis.call('HGET', KEYS[1], 'otp_scheme') or 'argon2'
+if ARGV[2] ~= '' and scheme == ARGV[2] then
+    local stored = redis.call('HGET', KEYS[1], 'otp_hash') or ''
+    if equal(stored, ARGV[3]) then
+        redis.call('DEL', KEYS[1])
+        return {'OK', data}
+    end
+    return {'MISMATCH'}
+end
+return {'CHECK', data}
+"""
+
+# Rate limit scripts share one reply shape: {allowed(0|1), retry_after_ms, remaining}
+
+# KEYS[1] = counter key
+# ARGV[1] = limit, ARGV[2] = window in ms
+# INCR and PEXPIRE in one script, so the counter can never be left without a ttl
+RATE_LIMIT_FIXED_WINDOW = """
+local limit = tonumber(ARGV[1])
+local count = redis.call('INCR', KEYS[1])
+if count == 1 or redis.call('PTTL', KEYS[1]) < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if count > limit then
+    return {0, redis.call('PTTL', KEYS[1]), 0}
+end
+return {1, 0, limit - count}
+"""
+
+# KEYS[1] = sorted set of hit timestamps
+# ARGV[1] = limit, ARGV[2] = window in ms
+RATE_LIMIT_SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now, 0}
+end
+-- member must be unique even for hits in the same millisecond
+redis.call('ZADD', KEYS[1], now, t[1] .. t[2] .. ':' .. count)
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0, limit - count - 1}
+"""
+
+# KEYS[1] = bucket hash {tokens, ts}
+# ARGV[1] = capacity, ARGV[2] = refill tokens per second, ARGV[3] = cost
+RATE_LIMIT_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) / 1000 * rate)
+
+local allowed = 0
+local retry_after = math.ceil((cost - tokens) / rate * 1000)
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+    retry_after = 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+-- a full bucket carries no state, let it expire once it would be refilled
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, retry_after, math.floor(tokens)}
+"""
+
+# KEYS[1] = hash key, ARGV = field, value, field, value...
+# HSET only if the key still exists, so an update racing the key's expiry
+# can't leave a partial hash without a ttl behind
+HSET_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], unpack(ARGV))
+    return 1
+end
+return 0
+"""
+
+SCRIPTS = {
+    "verify_otp" : VERIFY_OTP,
+    "rate_limit_fixed_window" : RATE_LIMIT_FIXED_WINDOW,
+    "rate_limit_sliding_window" : RATE_LIMIT_SLIDING_WINDOW,
+    "rate_limit_token_bucket" : RATE_LIMIT_TOKEN_BUCKET,
+    "hset_if_exists" : HSET_IF_EXISTS,
+}
+
+_script_shas : dict[str, str] = {}
+
+async def load_redis_scripts(redis_client : Redis) -> None:
+    """
+    SCRIPT LOAD every script once; called from the app lifespan
+    """
+    for name, source in SCRIPTS.items():
+        _script_shas[name] = await redis_client.script_load(source)
+
+async def run_redis_script(
+    redis_client : Redis,
+    name : str,
+    keys : list[str],
+    args : list,
+):
+    """
+    EVALSHA a registered script; reloads it if redis lost its script cache
+    (restart, failover, SCRIPT FLUSH) or it was never loaded
+    """
+    sha = _script_shas.get(name)
+    if sha is not None:
+        try:
+            return await redis_client.evalsha(sha, len(keys), *keys, *args) # type: ignore
+        except NoScriptError:
+            pass
+    sha = _script_shas[name] = await redis_client.script_load(SCRIPTS[name])
+    return await redis_client.evalsha(sha, len(keys), *keys, *args) # type: ignore
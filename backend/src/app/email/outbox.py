@@ -0,0 +1,33 @@
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.enums import EMAIL_OUTBOX_MAXLEN, EMAIL_OUTBOX_STREAM
+from app.core.exceptions import ServerError
+
+# < ------------- Email outbox --------------->
+# Handlers only XADD the message and return; app.email.worker delivers it.
+# Entries are XDEL'd once delivered or dead lettered, so OTPs don't linger.
+
+async def enqueue_otp_email(
+    redis_client : Redis,
+    receiver_email : str,
+    otp : str,
+) -> str:
+    """
+    queue an otp email for delivery, returns the stream entry id
+    """
+    try:
+        return await redis_client.xadd(
+            EMAIL_OUTBOX_STREAM,
+            {
+                "kind" : "otp",
+                "to" : receiver_email,
+                "otp" : otp,
+            },
+            maxlen=EMAIL_OUTBOX_MAXLEN,
+            approximate=True,
+        )
+    except RedisError as e:
+        raise ServerError(
+            message=f"Failed to queue otp email : {str(e)}",
+            code="OTP_EMAIL_ENQUEUE_FAILED",
+        )
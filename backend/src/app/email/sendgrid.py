@@ -0,0 +1,66 @@
+import logging
+
+import httpx
+from app.core.exceptions import ServerError
+from app.core.setting import settings
+
+logger = logging.getLogger("email.sendgrid")
+
+# < -------------SendGrid Utilities --------------->
+def create_payload_and_headers_for_sendgrid(
+    receiver_email : str, 
+    otp : str
+) -> tuple[dict, dict]:
+    payload = {
+        "personalizations" : [
+            {
+                "to" : [
+                    {
+                        "email" : receiver_email,
+                        "name": "Optional",
+                    },
+                    
+                ],
+            },
+        ],
+        "from" : {"email" : settings.SENDGRID.SENDGRID_SENDER_EMAIL},
+        "subject" : "OTP Verification",
+        "content" : [
+            {
+                "type" : "text/plain",
+                "value" : f"Your OTP is {otp}",
+            },
+        ],
+    }
+    headers = {
+        "Authorization" : f"Bearer {settings.SENDGRID.SENDGRID_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    return payload, headers
+
+async def send_otp_to_user(
+    otp : str,
+    httpx_client : httpx.AsyncClient,
+    receiver_email : str,
+):
+    
+    payload, headers = create_payload_and_headers_for_sendgrid(receiver_email, otp)
+    try:
+        response = await httpx_client.post(
+            url = settings.SENDGRID.SENDGRID_URL,
+            headers=headers,
+            json = payload,
+        )
+        logger.debug("SendGrid responded", extra={"status_code" : response.status_code})
+        if response.status_code != 202:
+            logger.warning(
+                "SendGrid rejected the OTP email",
+                extra={"status_code" : response.status_code, "response" : response.text[:500]},
+            )
+            raise ServerError(
+                message="OTP email delivery failed",
+                code=  "OTP_EMAIL_DELIVERY_FAILED"
+            )
+        return response
+    except Exception:
+        raise
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Local stand-in for the SendGrid mail send API, for offline delivery and retry tests.
+
+    uvicorn app.email.stub_sendgrid:app --port 8025
+    SENDGRID_URL=http://localhost:8025/v3/mail/send
+
+STUB_SENDGRID_FAIL_FIRST=n  -> the first n sends to every recipient return 500
+STUB_SENDGRID_FAIL_RATE=p   -> any send fails with probability p
+STUB_SENDGRID_DELAY_MS=ms   -> added latency per send
+"""
+import asyncio
+import os
+import random
+import re
+from collections import defaultdict
+from fastapi import FastAPI, Request, Response, status
+
+app = FastAPI()
+
+FAIL_FIRST = int(os.getenv("STUB_SENDGRID_FAIL_FIRST", 0))
+FAIL_RATE = float(os.getenv("STUB_SENDGRID_FAIL_RATE", 0))
+DELAY_MS = float(os.getenv("STUB_SENDGRID_DELAY_MS", 0))
+
+_attempts : dict[str, int] = defaultdict(int)
+_delivered : dict[str, list[dict]] = defaultdict(list)
+_otp_pattern = re.compile(r"\b(\d{6})\b")
+
+@app.post('/v3/mail/send')
+async def mail_send(request : Request):
+    payload = await request.json()
+    receiver = payload["personalizations"][0]["to"][0]["email"]
+    _attempts[receiver] += 1
+
+    if DELAY_MS:
+        await asyncio.sleep(DELAY_MS / 1000)
+    if _attempts[receiver] <= FAIL_FIRST or random.random() < FAIL_RATE:
+        return Response(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    body = payload["content"][0]["value"]
+    match = _otp_pattern.search(body)
+    _delivered[receiver].append({
+        "subject" : payload.get("subject"),
+        "body" : body,
+        "otp" : match.group(1) if match else None,
+    })
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+@app.get('/messages/{email}')
+async def messages(email : str):
+    return {
+        "attempts" : _attempts.get(email, 0),
+        "messages" : _delivered.get(email, []),
+    }
+
+@app.get('/messages/{email}/latest-otp')
+async def latest_otp(email : str):
+    delivered = _delivered.get(email)
+    return {"otp" : delivered[-1]["otp"] if delivered else None}
+
+@app.delete('/messages')
+async def reset():
+    _attempts.clear()
+    _delivered.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import random
+import signal
+import socket
+import os
+import httpx
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from app.email.sendgrid import send_otp_to_user
+from app.core.enums import (
+    EMAIL_OUTBOX_DEAD_LETTER_STREAM,
+    EMAIL_OUTBOX_GROUP,
+    EMAIL_OUTBOX_MAXLEN,
+    EMAIL_OUTBOX_STREAM,
+)
+from app.core.logging import setup_logging
+from app.core.setting import EmailOutboxConfig, settings
+from app.db.redis.config import create_redis
+
+logger = logging.getLogger("email.worker")
+
+class EmailOutboxWorker:
+    """
+    Consumes the email outbox stream as part of EMAIL_OUTBOX_GROUP.
+    - at most config.concurrency deliveries in flight
+    - failed deliveries retried with exponential backoff + jitter
+    - after config.max_attempts the entry goes to the dead letter stream
+    - entries left pending by a crashed consumer are reclaimed after claim_idle_ms
+    An entry is only acked once it's delivered or dead lettered.
+    """
+    def __init__(
+        self,
+        redis_client : Redis,
+        httpx_client : httpx.AsyncClient,
+        config : EmailOutboxConfig | None = None,
+        consumer_name : str | None = None,
+        claim_idle_ms : int = 5 * 60 * 1000,
+        block_ms : int = 2000,
+    ):
+        self.redis_client = redis_client
+        self.httpx_client = httpx_client
+        self.config = config or settings.email_outbox
+        self.consumer_name = consumer_name or f"{socket.gethostname()}:{os.getpid()}"
+        self.claim_idle_ms = claim_idle_ms
+        self.block_ms = block_ms
+
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.config.concurrency)
+        self._in_flight : dict[str, asyncio.Task] = {}
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis_client.xgroup_create(
+                EMAIL_OUTBOX_STREAM,
+                EMAIL_OUTBOX_GROUP,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        await self.ensure_group()
+        logger.info("Email outbox worker started", extra={"consumer" : self.consumer_name})
+
+        while not self._stopping.is_set():
+            try:
+                entries = await self._claim_stale() + await self._read_new()
+            except RedisError:
+                logger.exception("Failed to read email outbox")
+                await asyncio.sleep(1)
+                continue
+
+            for entry_id, fields in entries:
+                if entry_id in self._in_flight:
+                    continue
+                await self._slots.acquire()
+                self._in_flight[entry_id] = asyncio.create_task(
+                    self._deliver(entry_id, fields)
+                )
+
+        # let in flight deliveries finish, unacked ones get reclaimed anyway
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+        logger.info("Email outbox worker stopped", extra={"consumer" : self.consumer_name})
+
+    async def _read_new(self) -> list:
+        response = await self.redis_client.xreadgroup(
+            EMAIL_OUTBOX_GROUP,
+            self.consumer_name,
+            {EMAIL_OUTBOX_STREAM : ">"},
+            count=self.config.concurrency,
+            block=self.block_ms,
+        )
+        return [entry for _, entries in response for entry in entries] if response else []
+
+    async def _claim_stale(self) -> list:
+        _, entries, *_ = await self.redis_client.xautoclaim(
+            EMAIL_OUTBOX_STREAM,
+            EMAIL_OUTBOX_GROUP,
+            self.consumer_name,
+            min_idle_time=self.claim_idle_ms,
+            start_id="0-0",
+            count=self.config.concurrency,
+        )
+        # trimmed entries come back without fields
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+    async def _deliver(self, entry_id : str, fields : dict) -> None:
+        try:
+            error = None
+            for attempt in range(1, self.config.max_attempts + 1):
+                try:
+                    await send_otp_to_user(fields["otp"], self.httpx_client, fields["to"])
+                    await self._ack(entry_id)
+                    return
+                except Exception as e:
+                    error = e
+                    logger.warning(
+                        "Email delivery failed",
+                        extra={"entry_id" : entry_id, "attempt" : attempt},
+                    )
+                    if attempt < self.config.max_attempts:
+                        backoff = self.config.backoff_base_seconds * 2 ** (attempt - 1)
+                        await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+
+            await self._dead_letter(entry_id, fields, error)
+        except RedisError:
+            # not acked, it will be reclaimed and retried
+            logger.exception("Failed to ack email outbox entry", extra={"entry_id" : entry_id})
+        finally:
+            self._in_flight.pop(entry_id, None)
+            self._slots.release()
+
+    async def _ack(self, entry_id : str) -> None:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.xack(EMAIL_OUTBOX_STREAM, EMAIL_OUTBOX_GROUP, entry_id)
+            pipe.xdel(EMAIL_OUTBOX_STREAM, entry_id)
+            await pipe.execute()
+
+    async def _dead_letter(self, entry_id : str, fields : dict, error : Exception | None) -> None:
+        logger.error(
+            "Email delivery dead lettered",
+            extra={"entry_id" : entry_id, "error" : repr(error)},
+        )
+        # the otp is useless by the time anyone looks at the dead letters
+        dead = {key : value for key, value in fields.items() if key != "otp"}
+        dead.update(entry_id=entry_id, error=repr(error))
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                EMAIL_OUTBOX_DEAD_LETTER_STREAM,
+                dead,
+                maxlen=EMAIL_OUTBOX_MAXLEN,
+                approximate=True,
+            )
+            pipe.xack(EMAIL_OUTBOX_STREAM, EMAIL_OUTBOX_GROUP, entry_id)
+            pipe.xdel(EMAIL_OUTBOX_STREAM, entry_id)
+            await pipe.execute()
+
+async def main() -> None:
+    """
+    standalone worker: python -m app.email.worker
+    (set EMAIL_IN_PROCESS_WORKER=false on the api when running this)
+    """
+    setup_logging(settings.log_level, settings.logging)
+    redis_client = create_redis()
+    httpx_client = httpx.AsyncClient(timeout=10)
+    worker = EmailOutboxWorker(redis_client, httpx_client)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await redis_client.aclose()
+        await httpx_client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
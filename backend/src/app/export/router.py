@@ -0,0 +1,27 @@
+import datetime
+import uuid
+from typing import Annotated
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from app.auth.dependencies import current_user
+from app.core.enums import ExportFormat
+from app.export.service import EXPORT_ENCODERS, export_partitions
+
+router = APIRouter()
+
+@router.get('')
+async def export_history(
+    user_id : current_user,
+    export_format : Annotated[ExportFormat, Query(alias="format")] = ExportFormat.NDJSON,
+    ):
+    """
+    ?format=ndjson|csv, every task and behavior (with its category detail) the
+    user logged, streamed from server side cursors in constant memory
+    """
+    media_type, encode = EXPORT_ENCODERS[export_format]
+    filename = f"life-tracker-export-{datetime.datetime.now(datetime.UTC):%Y%m%d}.{export_format.value}"
+    return StreamingResponse(
+        encode(export_partitions(uuid.UUID(user_id))),
+        media_type=media_type,
+        headers={"Content-Disposition" : f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,207 @@
+import csv
+import datetime
+import enum
+import io
+import json
+import logging
+import uuid
+from decimal import Decimal
+from typing import AsyncIterator, Sequence
+from sqlalchemy import Row, select
+from sqlalchemy.exc import SQLAlchemyError
+from app.behaviors.models import Behavior, CATEGORY_MODELS
+from app.behaviors.schemas import CATEGORY_DETAILS
+from app.core.enums import EXPORT_FETCH_SIZE, BehaviorCategory, ExportFormat
+from app.db.config import async_session
+from app.tasks.models import Task
+
+logger = logging.getLogger("export")
+
+# < ------------- Full history export --------------->
+# Everything a user logged, streamed: one server side cursor per table
+# (tasks, then behaviors LEFT JOINed to the four category tables), read
+# EXPORT_FETCH_SIZE rows at a time and encoded chunk by chunk into the
+# response. Memory stays at one partition of rows plus its encoded text
+# whatever the size of the history.
+#
+# The generator owns its session (and so one pooled connection) for as long
+# as the client reads; both queries run in one REPEATABLE READ transaction
+# so tasks and behaviors come from the same snapshot. Once the first chunk
+# is sent the status is 200, an error after that ends the body early and is
+# only logged.
+
+TASK_COLUMNS = (
+    Task.task_id,
+    Task.task_name,
+    Task.task_description,
+    Task.status,
+    Task.category,
+    Task.scheduled_at,
+    Task.due_at,
+    Task.completed_at,
+    Task.created_at,
+    Task.last_edited,
+)
+BEHAVIOR_COLUMNS = (
+    Behavior.behavior_id,
+    Behavior.task_id,
+    Behavior.behavior_name,
+    Behavior.behavior_description,
+    Behavior.category,
+    Behavior.occured_at,
+    Behavior.source,
+    Behavior.created_at,
+    Behavior.last_edited,
+)
+# category -> the detail fields it exports, as named in its schema and table
+DETAIL_FIELDS : dict[BehaviorCategory, tuple[str, ...]] = {
+    category : tuple(schema.model_fields) for category, schema in CATEGORY_DETAILS.items()
+}
+
+def task_query(user_id : uuid.UUID):
+    return (
+        select(*TASK_COLUMNS)
+        .where(Task.user_id == user_id)
+        .order_by(Task.created_at, Task.task_id)
+    )
+
+def behavior_query(user_id : uuid.UUID):
+    stmt = select(
+        *BEHAVIOR_COLUMNS,
+        *(
+            getattr(CATEGORY_MODELS[category], name)
+            for category, names in DETAIL_FIELDS.items()
+            for name in names
+        ),
+    ).select_from(Behavior)
+    for model in CATEGORY_MODELS.values():
+        stmt = stmt.outerjoin(model, model.behavior_id == Behavior.behavior_id) # type: ignore
+    return stmt.where(Behavior.user_id == user_id).order_by(Behavior.occured_at, Behavior.behavior_id)
+
+async def export_partitions(user_id : uuid.UUID) -> AsyncIterator[tuple[str, Sequence[Row]]]:
+    """
+    ("task" | "behavior", up to EXPORT_FETCH_SIZE rows) until the history is exhausted
+    """
+    async with async_session() as session:
+        try:
+            await session.connection(execution_options={"isolation_level" : "REPEATABLE READ"})
+            for kind, stmt in (("task", task_query(user_id)), ("behavior", behavior_query(user_id))):
+                result = await session.stream(stmt.execution_options(yield_per=EXPORT_FETCH_SIZE))
+                async for partition in result.partitions():
+                    yield kind, partition
+            await session.commit()
+        except SQLAlchemyError:
+            logger.exception("Export stream failed", extra={"user_id" : str(user_id)})
+            raise
+
+# < ------------- Encoders --------------->
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def task_record(row) -> dict:
+    return {"type" : "task"} | {column.key : getattr(row, column.key) for column in TASK_COLUMNS}
+
+def behavior_record(row) -> dict:
+    record = {"type" : "behavior"} | {column.key : getattr(row, column.key) for column in BEHAVIOR_COLUMNS}
+    record["category_specific_detail"] = (
+        {name : getattr(row, name) for name in DETAIL_FIELDS[row.category]}
+        if row.category is not None else None
+    )
+    return record
+
+RECORD_BUILDERS = {"task" : task_record, "behavior" : behavior_record}
+
+async def ndjson_chunks(partitions : AsyncIterator[tuple[str, Sequence]]) -> AsyncIterator[str]:
+    """
+    one JSON object per line, {"type" : "task" | "behavior", ...}
+    """
+    encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False, separators=(",", ":"))
+    async for kind, rows in partitions:
+        build = RECORD_BUILDERS[kind]
+        yield "".join(encoder.encode(build(row)) + "\n" for row in rows)
+
+# one flat table for both kinds, cells that don't apply to a row are empty
+CSV_HEADER = (
+    "record_type",
+    "id",
+    "task_id",
+    "name",
+    "description",
+    "category",
+    "status",
+    "source",
+    "occured_at",
+    "scheduled_at",
+    "due_at",
+    "completed_at",
+    "created_at",
+    "last_edited",
+    *(name for names in DETAIL_FIELDS.values() for name in names),
+)
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+def task_csv_row(row) -> list:
+    cells = dict(
+        record_type="task",
+        id=row.task_id,
+        task_id=row.task_id,
+        name=row.task_name,
+        description=row.task_description,
+        category=row.category,
+        status=row.status,
+        scheduled_at=row.scheduled_at,
+        due_at=row.due_at,
+        completed_at=row.completed_at,
+        created_at=row.created_at,
+        last_edited=row.last_edited,
+    )
+    return [_cell(cells.get(name)) for name in CSV_HEADER]
+
+def behavior_csv_row(row) -> list:
+    cells = dict(
+        record_type="behavior",
+        id=row.behavior_id,
+        task_id=row.task_id,
+        name=row.behavior_name,
+        description=row.behavior_description,
+        category=row.category,
+        source=row.source,
+        occured_at=row.occured_at,
+        created_at=row.created_at,
+        last_edited=row.last_edited,
+    )
+    if row.category is not None:
+        cells |= {name : getattr(row, name) for name in DETAIL_FIELDS[row.category]}
+    return [_cell(cells.get(name)) for name in CSV_HEADER]
+
+CSV_ROW_BUILDERS = {"task" : task_csv_row, "behavior" : behavior_csv_row}
+
+async def csv_chunks(partitions : AsyncIterator[tuple[str, Sequence]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield buffer.getvalue()
+    async for kind, rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        build = CSV_ROW_BUILDERS[kind]
+        writer.writerows(build(row) for row in rows)
+        yield buffer.getvalue()
+
+EXPORT_ENCODERS = {
+    ExportFormat.NDJSON : ("application/x-ndjson", ndjson_chunks),
+    ExportFormat.CSV : ("text/csv; charset=utf-8", csv_chunks),
+}
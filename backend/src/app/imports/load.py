@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from typing import AsyncIterator, BinaryIO
+from app.analytics.cache import invalidate_expense_analytics
+from app.core.enums import BEHAVIOR_IMPORT_READ_SIZE
+from app.core.logging import setup_logging
+from app.core.setting import settings
+from app.db.config import async_session, dispose_engine
+from app.db.redis.config import create_redis
+from app.imports.service import ImportReport, import_behaviors
+
+logger = logging.getLogger("imports.load")
+
+# < ------------- Bulk import from a file --------------->
+# The import endpoint for files too big (or too many) to upload: same
+# parsing, COPY and merge (app.imports.service), read from disk or stdin.
+
+async def file_chunks(file : BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(file.read, BEHAVIOR_IMPORT_READ_SIZE):
+        yield chunk
+
+def print_progress(report : ImportReport) -> None:
+    print(json.dumps(report.counts()), file=sys.stderr, flush=True)
+
+async def main(user_id : uuid.UUID, file : BinaryIO, quiet : bool) -> ImportReport:
+    """
+    python -m app.imports.load --user-id ID FILE.csv (or - for stdin)
+    prints the report, exit code 1 when rows were invalid (the valid ones are imported)
+    """
+    setup_logging(settings.log_level, settings.logging)
+    redis_client = create_redis()
+    try:
+        async with async_session() as session:
+            report = await import_behaviors(
+                session, user_id, file_chunks(file), None if quiet else print_progress,
+            )
+        if report.expenses:
+            await invalidate_expense_analytics(redis_client, user_id)
+    finally:
+        await redis_client.aclose()
+        await dispose_engine()
+    logger.info("Behavior import finished", extra={"user_id" : str(user_id)} | report.counts())
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import behaviors from a CSV file")
+    parser.add_argument("file", type=argparse.FileType("rb"), help="CSV path, - for stdin")
+    parser.add_argument("--user-id", type=uuid.UUID, required=True)
+    parser.add_argument("--quiet", action="store_true", help="no progress lines on stderr")
+    args = parser.parse_args()
+    report = asyncio.run(main(args.user_id, args.file, args.quiet))
+    print(json.dumps(report.counts() | {"errors" : report.errors}, default=str))
+    sys.exit(1 if report.invalid else 0)
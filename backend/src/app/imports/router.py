@@ -0,0 +1,46 @@
+import logging
+import uuid
+from fastapi import APIRouter, Request
+from app.analytics.cache import invalidate_expense_analytics
+from app.auth.dependencies import current_user, redis_client
+from app.db.dependencies import DbSession
+from app.imports.schemas import BehaviorImportResponse
+from app.imports.service import ImportReport, import_behaviors
+
+logger = logging.getLogger("imports")
+
+router = APIRouter()
+
+def log_progress(user_id : str):
+    def progress(report : ImportReport) -> None:
+        logger.info("Behavior import progress", extra={"user_id" : user_id} | report.counts())
+    return progress
+
+@router.post('/behaviors', response_model=BehaviorImportResponse)
+async def import_behavior_csv(
+    user_id : current_user,
+    session : DbSession,
+    redis_client : redis_client,
+    request : Request,
+    ):
+    """
+    The body is a UTF-8 CSV (text/csv), the format GET /api/v1/export?format=csv
+    writes: a header row with at least name and occured_at, then category,
+    description and the category detail columns as needed.
+    - read and loaded while it uploads, never held in memory whole
+    - invalid rows are reported (the first few with their errors) and skipped
+    - valid rows are written in one transaction, all or nothing
+    """
+    owner_id = uuid.UUID(user_id)
+    report = await import_behaviors(session, owner_id, request.stream(), log_progress(user_id))
+    if report.expenses:
+        await invalidate_expense_analytics(redis_client, owner_id)
+    return BehaviorImportResponse(
+        message="Behaviors imported" if report.imported else "No valid behaviors",
+        rows=report.rows,
+        imported=report.imported,
+        invalid=report.invalid,
+        skipped=report.skipped,
+        errors=report.errors, # type: ignore
+        duration_ms=report.duration_ms,
+    )
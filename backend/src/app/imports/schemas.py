@@ -0,0 +1,17 @@
+from typing import Any
+from pydantic import BaseModel
+
+class ImportRowError(BaseModel):
+    # 1 based data row, the header not counted
+    row : int
+    errors : list[dict[str, Any]]
+
+class BehaviorImportResponse(BaseModel):
+    message : str
+    rows : int
+    imported : int
+    invalid : int
+    skipped : int
+    # the first BEHAVIOR_IMPORT_MAX_REPORTED_ERRORS invalid rows
+    errors : list[ImportRowError]
+    duration_ms : float
@@ -0,0 +1,307 @@
+import codecs
+import csv
+import io
+import time
+import uuid
+from operator import itemgetter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+from asyncpg import InterfaceError, PostgresError
+from pydantic import ValidationError
+from sqlalchemy import Column, DateTime, Enum, MetaData, Table, Text, insert, literal, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+from app.behaviors.models import Behavior, CATEGORY_MODELS
+from app.behaviors.schemas import CATEGORY_DETAILS, BehaviorCreateRequest
+from app.core.enums import (
+    BEHAVIOR_IMPORT_MAX_RECORD_CHARS,
+    BEHAVIOR_IMPORT_MAX_REPORTED_ERRORS,
+    BEHAVIOR_IMPORT_MAX_ROWS,
+    BEHAVIOR_IMPORT_PROGRESS_ROWS,
+    BehaviorCategory,
+)
+from app.core.exceptions import ClientError, ServerError
+from app.export.service import DETAIL_FIELDS
+from app.summaries.service import SummaryDeltas, apply_summary_deltas
+
+# < ------------- Bulk CSV import --------------->
+# The CSV an export writes (GET /api/v1/export?format=csv) is the CSV an
+# import reads: name, description, category, occured_at and the category
+# detail columns; other columns are ignored, "task" records are skipped.
+# Imported behaviors are USER_LOGGED with new behavior_ids.
+#
+# The body is parsed as it arrives, every row validated like a
+# BehaviorCreateRequest and sent straight into one binary COPY
+# (asyncpg copy_records_to_table) to a temporary staging table. Then one
+# INSERT ... SELECT per table moves the staged rows into behaviors and the
+# category tables, and the daily_user_summary deltas are applied, all in the
+# transaction of the COPY: an import lands entirely or not at all. Invalid
+# rows are counted, reported (the first few) and skipped.
+
+DETAIL_COLUMNS = tuple(name for names in DETAIL_FIELDS.values() for name in names)
+IMPORT_COLUMNS = ("name", "description", "category", "occured_at", *DETAIL_COLUMNS)
+REQUIRED_COLUMNS = ("name", "occured_at")
+REQUEST_COLUMNS = {"behavior_name" : "name", "behavior_description" : "description"}
+# "Expense", "EXPENSE", "expense" all name the same category
+CATEGORY_NAMES = {
+    alias.lower() : category
+    for category in BehaviorCategory
+    for alias in (category.name, category.value)
+}
+
+def _staging_column(column : Column) -> Column:
+    return Column(column.name, column.type)
+
+# dropped with the transaction, never part of Base.metadata (or alembic)
+BEHAVIOR_STAGING = Table(
+    "behavior_import",
+    MetaData(),
+    Column("behavior_id", UUID(as_uuid=True), nullable=False),
+    Column("behavior_name", Text, nullable=False),
+    Column("behavior_description", Text),
+    Column("category", Enum(BehaviorCategory, name="behavior_category", create_type=False)),
+    Column("occured_at", DateTime(timezone=True), nullable=False),
+    *(
+        _staging_column(CATEGORY_MODELS[category].__table__.c[name]) # type: ignore
+        for category, names in DETAIL_FIELDS.items()
+        for name in names
+    ),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+@dataclass
+class ImportReport:
+    rows : int = 0
+    imported : int = 0
+    invalid : int = 0
+    skipped : int = 0
+    expenses : int = 0
+    errors : list[dict[str, Any]] = field(default_factory=list)
+    duration_ms : float = 0.0
+
+    def counts(self) -> dict[str, int | float]:
+        """
+        everything but the row errors, for logs and progress lines
+        """
+        return {name : value for name, value in vars(self).items() if name != "errors"}
+
+# < ------------- Parsing --------------->
+
+def _records_end(text : str) -> int:
+    """
+    end of the last complete CSV record in text: its last line break with an
+    even number of quotes before it (not inside a quoted field), 0 if none
+    """
+    end = text.rfind("\n") + 1
+    quotes = text.count('"', 0, end)
+    while end and quotes % 2:
+        previous = text.rfind("\n", 0, end - 1) + 1
+        quotes -= text.count('"', previous, end)
+        end = previous
+    return end
+
+async def csv_records(chunks : AsyncIterator[bytes]) -> AsyncIterator[list[list[str]]]:
+    """
+    the records of a UTF-8 CSV byte stream, a batch per chunk that completes
+    at least one; a record split across chunks waits for its end
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            end = _records_end(pending)
+            if end:
+                yield list(csv.reader(io.StringIO(pending[:end], newline=""), strict=True))
+                pending = pending[end:]
+            elif len(pending) > BEHAVIOR_IMPORT_MAX_RECORD_CHARS:
+                raise ClientError("CSV record too long (unclosed quote?)", code="IMPORT_INVALID_CSV")
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield list(csv.reader(io.StringIO(pending, newline=""), strict=True))
+    except UnicodeDecodeError:
+        raise ClientError("CSV must be UTF-8", code="IMPORT_INVALID_CSV")
+    except csv.Error as e:
+        raise ClientError(f"Malformed CSV : {str(e)}", code="IMPORT_INVALID_CSV")
+
+def header_positions(header : list[str]) -> dict[str, int]:
+    positions = {name.strip().lower() : index for index, name in enumerate(header)}
+    missing = [name for name in REQUIRED_COLUMNS if name not in positions]
+    if missing:
+        raise ClientError(f"CSV header misses {', '.join(missing)}", code="IMPORT_INVALID_HEADER")
+    return {name : positions[name] for name in (*IMPORT_COLUMNS, "record_type") if name in positions}
+
+def behavior_request(cells : dict[str, str]) -> BehaviorCreateRequest:
+    """
+    validate one row as the create flow would, missing cells are missing
+    values; the detail is checked against its own category's schema only
+    """
+    category = cells.get("category")
+    detail = None
+    if category:
+        category = CATEGORY_NAMES.get(category.lower(), category)
+        if category in DETAIL_FIELDS:
+            detail = CATEGORY_DETAILS[category].model_validate( # type: ignore
+                {name : cells[name] for name in DETAIL_FIELDS[category] if name in cells} # type: ignore
+            )
+    return BehaviorCreateRequest.model_validate({
+        "behavior_name" : cells.get("name"),
+        "behavior_description" : cells.get("description"),
+        "occured_at" : cells.get("occured_at"),
+        "category" : category,
+        "category_specific_detail" : detail,
+    })
+
+def row_errors(error : ValidationError) -> list[dict[str, Any]]:
+    """
+    pydantic's errors, loc named after the CSV columns
+    """
+    errors = error.errors(include_url=False, include_context=False, include_input=False)
+    for entry in errors:
+        entry["loc"] = tuple(REQUEST_COLUMNS.get(part, part) for part in entry["loc"]) # type: ignore
+    return errors # type: ignore
+
+def staging_record(behavior : BehaviorCreateRequest) -> tuple:
+    """
+    one BEHAVIOR_STAGING row, the enum as its postgres label
+    """
+    details = dict.fromkeys(DETAIL_COLUMNS)
+    if behavior.category is not None:
+        for name in DETAIL_FIELDS[behavior.category]:
+            details[name] = getattr(behavior.category_specific_detail, name)
+    return (
+        uuid.uuid4(),
+        behavior.behavior_name,
+        behavior.behavior_description,
+        behavior.category.name if behavior.category is not None else None,
+        behavior.occured_at,
+        *details.values(),
+    )
+
+async def staging_records(
+    user_id : uuid.UUID,
+    chunks : AsyncIterator[bytes],
+    report : ImportReport,
+    deltas : SummaryDeltas,
+    progress : Callable[[ImportReport], None] | None = None,
+) -> AsyncIterator[tuple]:
+    """
+    the valid rows of the CSV as staging records, counting into report and deltas
+    """
+    names = None
+    async for records in csv_records(chunks):
+        for record in records:
+            if not record:
+                continue
+            if names is None:
+                positions = header_positions(record)
+                names = tuple(positions)
+                # at least name and occured_at, itemgetter returns a tuple
+                pick = itemgetter(*positions.values())
+                width = max(positions.values()) + 1
+                continue
+            if progress is not None and report.rows and report.rows % BEHAVIOR_IMPORT_PROGRESS_ROWS == 0:
+                progress(report)
+            report.rows += 1
+            if report.rows > BEHAVIOR_IMPORT_MAX_ROWS:
+                raise ClientError(
+                    f"An import holds at most {BEHAVIOR_IMPORT_MAX_ROWS} rows",
+                    code="IMPORT_TOO_LARGE",
+                )
+            if len(record) < width:
+                record += [""] * (width - len(record))
+            cells = {name : value for name, cell in zip(names, pick(record)) if cell and (value := cell.strip())}
+            if cells.get("record_type", "behavior").lower() != "behavior":
+                report.skipped += 1
+                continue
+            try:
+                behavior = behavior_request(cells)
+            except ValidationError as e:
+                report.invalid += 1
+                if len(report.errors) < BEHAVIOR_IMPORT_MAX_REPORTED_ERRORS:
+                    report.errors.append({
+                        "row" : report.rows,
+                        "errors" : row_errors(e),
+                    })
+                continue
+            report.imported += 1
+            if behavior.category == BehaviorCategory.EXPENSE:
+                report.expenses += 1
+            deltas.add_behavior(user_id, behavior.category, behavior.occured_at, behavior.category_specific_detail)
+            yield staging_record(behavior)
+    if names is None:
+        raise ClientError("CSV is empty", code="IMPORT_INVALID_HEADER")
+
+# < ------------- Loading --------------->
+
+def merge_statements(user_id : uuid.UUID) -> list:
+    """
+    staging -> behaviors, then staging -> each category table
+    """
+    staged = BEHAVIOR_STAGING.c
+    statements = [
+        insert(Behavior).from_select(
+            ["behavior_id", "user_id", "behavior_name", "behavior_description", "category", "occured_at"],
+            select(
+                staged.behavior_id,
+                literal(user_id, UUID(as_uuid=True)),
+                staged.behavior_name,
+                staged.behavior_description,
+                staged.category,
+                staged.occured_at,
+            ),
+        )
+    ]
+    for category, names in DETAIL_FIELDS.items():
+        statements.append(
+            insert(CATEGORY_MODELS[category]).from_select( # type: ignore
+                ["behavior_id", *names],
+                select(staged.behavior_id, *(staged[name] for name in names)).where(staged.category == category),
+            )
+        )
+    return statements
+
+async def import_behaviors(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    chunks : AsyncIterator[bytes],
+    progress : Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    COPY the CSV's valid rows into the staging table while it's read, merge
+    them and the summary deltas, commit; progress gets the running report
+    every BEHAVIOR_IMPORT_PROGRESS_ROWS rows
+    """
+    report = ImportReport()
+    deltas = SummaryDeltas()
+    begin = time.perf_counter()
+    try:
+        await session.execute(CreateTable(BEHAVIOR_STAGING))
+        connection = await session.connection()
+        driver = (await connection.get_raw_connection()).driver_connection
+        await driver.copy_records_to_table( # type: ignore
+            BEHAVIOR_STAGING.name,
+            records=staging_records(user_id, chunks, report, deltas, progress),
+            columns=[column.name for column in BEHAVIOR_STAGING.c],
+        )
+        if report.imported:
+            for stmt in merge_statements(user_id):
+                await session.execute(stmt)
+            await apply_summary_deltas(session, deltas)
+        await session.commit()
+    except (SQLAlchemyError, PostgresError, InterfaceError) as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to import behaviors : {str(e)}",
+            code="BEHAVIOR_IMPORT_FAILED",
+        )
+    except Exception:
+        await session.rollback()
+        raise
+    report.duration_ms = round((time.perf_counter() - begin) * 1000, 2)
+    if progress is not None:
+        progress(report)
+    return report
@@ -1,43 +1,91 @@
-from app.core.setting import settings
 from fastapi import FastAPI
-from app.core.logging import setup_logging
 import logging
 
-# load all envs and secrets
-setup_logging(settings.log_level)
 logger = logging.getLogger(__name__)
-logger.info("Applicaton starting", extra={"env" : settings.app_env})
 
 
 def create_app() -> FastAPI:
-    
+    """
+    build the app; settings (env + secrets) and logging are loaded here,
+    not when app.main is imported.
+    uvicorn app.main:app works as before, or: uvicorn --factory app.main:create_app
+    """
+    from app.core.setting import settings
+    from app.core.logging import setup_logging
+
+    # load all envs and secrets
+    setup_logging(settings.log_level, settings.logging)
+    logger.info("Applicaton starting", extra={"env" : settings.app_env})
+
     from app.auth.router import router as auth_router
+    from app.behaviors.router import router as behaviors_router
+    from app.summaries.router import router as summaries_router
+    from app.analytics.router import router as analytics_router
+    from app.export.router import router as export_router
+    from app.imports.router import router as imports_router
     from app.test.router import router as test_router
+    from app.core.router import router as metrics_router
     from app.core.utils import (
         add_all_middlewares,
         register_exception_handlers,
     )
     from app.core.utils import app_lifespan
-    
+
     app = FastAPI(lifespan=app_lifespan)
-    
+
     add_all_middlewares(app)
     register_exception_handlers(app)
-    
+
     app.include_router(
-        router=auth_router, 
-        prefix="/api/v1/auth", 
+        router=auth_router,
+        prefix="/api/v1/auth",
         tags=["auth"]
     )
+    app.include_router(
+        router=behaviors_router,
+        prefix="/api/v1/behaviors",
+        tags=["behaviors"]
+    )
+    app.include_router(
+        router=summaries_router,
+        prefix="/api/v1/summaries",
+        tags=["summaries"]
+    )
+    app.include_router(
+        router=analytics_router,
+        prefix="/api/v1/analytics",
+        tags=["analytics"]
+    )
+    app.include_router(
+        router=export_router,
+        prefix="/api/v1/export",
+        tags=["export"]
+    )
+    app.include_router(
+        router=imports_router,
+        prefix="/api/v1/import",
+        tags=["import"]
+    )
     app.include_router(
         router=test_router,
         tags=["test"],
     )
-    
-    return app
+    app.include_router(
+        router=metrics_router,
+        tags=["metrics"],
+    )
 
-app = create_app()   
+    @app.get('/')
+    def home():
+        return {'msg' : 'Hi'}
+
+    return app
 
-@app.get('/')
-def home():
-    return {'msg' : 'Hi'}
\ No newline at end of file
+def __getattr__(name : str):
+    # `app` is built on first access (uvicorn app.main:app), so importing
+    # this module stays free of side effects
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,40 @@
+from decimal import Decimal
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Date, DateTime, ForeignKey, Numeric, func
+import uuid
+import datetime
+
+## DailyUserSummary
+# - user_id(PK, FK->User.uid)
+# - day(PK, date, UTC)
+# - expense_total(not null, sum of Expense.amount)
+# - calories(not null, sum of Diet.calories)
+# - workout_count(not null)
+# - techwork_count(not null)
+# - tasks_total(not null, tasks due that day)
+# - tasks_completed(not null, of those, status COMPLETION)
+# - last_edited(not null)
+# Rollup of the behavior/category/task tables, kept in step by every write
+# to them (app.summaries.service.SummaryDeltas), rebuilt by app.summaries.rebuild.
+
+class DailyUserSummary(Base):
+    __tablename__ = "daily_user_summary"
+
+    user_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day : Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    expense_total : Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, server_default="0")
+    calories : Mapped[int] = mapped_column(nullable=False, server_default="0")
+    workout_count : Mapped[int] = mapped_column(nullable=False, server_default="0")
+    techwork_count : Mapped[int] = mapped_column(nullable=False, server_default="0")
+    tasks_total : Mapped[int] = mapped_column(nullable=False, server_default="0")
+    tasks_completed : Mapped[int] = mapped_column(nullable=False, server_default="0")
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
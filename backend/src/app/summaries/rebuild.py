@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.auth.models import User
+from app.core.logging import setup_logging
+from app.core.setting import settings
+from app.db.config import dispose_engine, get_sessionmaker
+from app.summaries.service import rebuild_daily_summaries
+
+logger = logging.getLogger("summaries.rebuild")
+
+# < ------------- Rollup backfill / repair --------------->
+# Recomputes daily_user_summary from the raw tables, one user per transaction
+# so a full backfill never holds more than one user's rows. Safe while the
+# api is running: a user's rebuild waits for that user's in-flight writes and
+# holds back new ones until it commits (see app.summaries.service).
+
+@dataclass
+class RebuildReport:
+    users : int = 0
+    days : int = 0
+    duration_ms : float = 0.0
+
+async def rebuild_all(
+    session_factory : async_sessionmaker,
+    user_ids : list[uuid.UUID] | None = None,
+    start : datetime.date | None = None,
+    end : datetime.date | None = None,
+) -> RebuildReport:
+    """
+    rebuild the given users, every user when None, days in [start, end)
+    """
+    report = RebuildReport()
+    begin = time.perf_counter()
+    async with session_factory() as session:
+        if user_ids is None:
+            user_ids = list(await session.scalars(select(User.user_id).order_by(User.user_id)))
+            await session.commit()
+        for user_id in user_ids:
+            report.days += await rebuild_daily_summaries(session, user_id, start, end)
+            report.users += 1
+    report.duration_ms = round((time.perf_counter() - begin) * 1000, 2)
+    logger.info("Daily summary rebuild finished", extra=asdict(report))
+    return report
+
+async def main(user_ids : list[uuid.UUID] | None, start : datetime.date | None, end : datetime.date | None) -> None:
+    """
+    python -m app.summaries.rebuild [--user-id ID ...] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+    """
+    setup_logging(settings.log_level, settings.logging)
+    try:
+        report = await rebuild_all(get_sessionmaker(), user_ids, start, end)
+    finally:
+        await dispose_engine()
+    print(json.dumps(asdict(report)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or repair daily_user_summary")
+    parser.add_argument("--user-id", type=uuid.UUID, action="append", help="repeatable, default every user")
+    parser.add_argument("--from", dest="from_date", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="to_date", type=datetime.date.fromisoformat, default=None, help="inclusive")
+    args = parser.parse_args()
+    end = args.to_date + datetime.timedelta(days=1) if args.to_date else None
+    asyncio.run(main(args.user_id, args.from_date, end))
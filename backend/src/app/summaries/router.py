@@ -0,0 +1,47 @@
+import datetime
+import uuid
+from typing import Annotated
+from fastapi import APIRouter, Query
+from app.auth.dependencies import current_user
+from app.core.enums import SUMMARY_MAX_RANGE_DAYS
+from app.core.exceptions import ClientError
+from app.db.dependencies import DbSession
+from app.summaries.schemas import DailySummary, DailySummaryResponse
+from app.summaries.service import get_daily_summaries
+
+router = APIRouter()
+
+@router.get('/daily', response_model=DailySummaryResponse)
+async def get_daily_summary(
+    user_id : current_user,
+    session : DbSession,
+    from_date : Annotated[datetime.date, Query(alias="from")],
+    to_date : Annotated[datetime.date, Query(alias="to")],
+    ):
+    """
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive UTC days), one entry per day,
+    days without activity are zeros. Read from daily_user_summary only,
+    never aggregated from the behavior/task tables.
+    """
+    if from_date > to_date:
+        raise ClientError("from must not be after to", code="INVALID_DATE_RANGE")
+    days = (to_date - from_date).days + 1
+    if days > SUMMARY_MAX_RANGE_DAYS:
+        raise ClientError(f"At most {SUMMARY_MAX_RANGE_DAYS} days per request", code="INVALID_DATE_RANGE")
+    
+    rows = await get_daily_summaries(
+        session, uuid.UUID(user_id), from_date, to_date + datetime.timedelta(days=1),
+    )
+    by_day = {row.day : row for row in rows}
+    summaries = []
+    for offset in range(days):
+        day = from_date + datetime.timedelta(days=offset)
+        row = by_day.get(day)
+        if row is None:
+            summaries.append(DailySummary(day=day))
+            continue
+        summary = DailySummary.model_validate(row, from_attributes=True)
+        if row.tasks_total > 0:
+            summary.task_completion_ratio = round(row.tasks_completed / row.tasks_total, 4)
+        summaries.append(summary)
+    return DailySummaryResponse(message="Daily summaries fetched", days=summaries)
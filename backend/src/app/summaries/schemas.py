@@ -0,0 +1,19 @@
+import datetime
+from decimal import Decimal
+from typing import Optional
+from pydantic import BaseModel
+
+class DailySummary(BaseModel):
+    day : datetime.date
+    expense_total : Decimal = Decimal("0.00")
+    calories : int = 0
+    workout_count : int = 0
+    techwork_count : int = 0
+    tasks_total : int = 0
+    tasks_completed : int = 0
+    # tasks_completed / tasks_total, null on days without tasks
+    task_completion_ratio : Optional[float] = None
+
+class DailySummaryResponse(BaseModel):
+    message : str
+    days : list[DailySummary]
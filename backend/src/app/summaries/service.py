@@ -0,0 +1,236 @@
+import datetime
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import Date, Select, case, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.behaviors.models import Behavior, Diet, Expense
+from app.core.enums import BehaviorCategory, TaskStatus
+from app.core.exceptions import ServerError
+from app.summaries.models import DailyUserSummary
+from app.tasks.models import Task
+
+# < ------------- Daily rollup --------------->
+# daily_user_summary holds per user, per UTC day totals so dashboards never
+# aggregate the raw tables. Every write to behaviors, their category rows or
+# tasks collects its +/- contribution in SummaryDeltas and applies it with
+# apply_summary_deltas before its own commit, so the rollup moves in the same
+# transaction as the rows it summarizes. An update is the old row at -1 plus
+# the new row at +1.
+#
+# Writers take a shared advisory lock per user, a rebuild takes it exclusive:
+# a rebuild never races a delta of the user it recomputes, writers of the same
+# user never wait on each other (only on the rollup rows they both touch).
+
+SUMMARY_COLUMNS = (
+    "expense_total",
+    "calories",
+    "workout_count",
+    "techwork_count",
+    "tasks_total",
+    "tasks_completed",
+)
+
+def utc_day(moment : datetime.datetime) -> datetime.date:
+    return moment.astimezone(datetime.UTC).date()
+
+def utc_day_start(day : datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.UTC)
+
+def summary_lock_key(user_id : uuid.UUID):
+    return func.hashtextextended(str(user_id), 0)
+
+class SummaryDeltas:
+    """
+    changes to daily_user_summary collected during one write, keyed by (user_id, day)
+    """
+    def __init__(self):
+        self.rows : dict[tuple[uuid.UUID, datetime.date], dict[str, int | Decimal]] = defaultdict(
+            lambda : dict.fromkeys(SUMMARY_COLUMNS, 0)
+        )
+
+    def add_behavior(
+        self,
+        user_id : uuid.UUID,
+        category : BehaviorCategory | None,
+        occured_at : datetime.datetime,
+        detail : object | None,
+        sign : int = 1,
+    ) -> None:
+        """
+        detail is the category row or its schema, anything with its attributes
+        """
+        if category is None:
+            return
+        row = self.rows[(user_id, utc_day(occured_at))]
+        if category == BehaviorCategory.EXPENSE:
+            row["expense_total"] += sign * (getattr(detail, "amount", None) or 0)
+        elif category == BehaviorCategory.DIET:
+            row["calories"] += sign * (getattr(detail, "calories", None) or 0)
+        elif category == BehaviorCategory.WORKOUT:
+            row["workout_count"] += sign
+        elif category == BehaviorCategory.TECHWORK:
+            row["techwork_count"] += sign
+
+    def add_task(self, task : Task, sign : int = 1) -> None:
+        """
+        a task counts on the UTC day it's due (else scheduled, else created);
+        cancelled tasks don't count
+        """
+        if task.status == TaskStatus.CANCELLED:
+            return
+        row = self.rows[(task.user_id, utc_day(task.due_at or task.scheduled_at or task.created_at))]
+        row["tasks_total"] += sign
+        if task.status == TaskStatus.COMPLETION:
+            row["tasks_completed"] += sign
+
+    def changed(self) -> list[dict]:
+        """
+        rows with a non zero change, sorted so concurrent writers lock rollup rows in one order
+        """
+        return [
+            {"user_id" : user_id, "day" : day} | values
+            for (user_id, day), values in sorted(self.rows.items())
+            if any(values.values())
+        ]
+
+async def apply_summary_deltas(session : AsyncSession, deltas : SummaryDeltas) -> None:
+    """
+    INSERT ... ON CONFLICT (user_id, day) DO UPDATE SET col = col + excluded.col
+    in the caller's transaction; the caller commits (or rolls back) and maps errors
+    """
+    rows = deltas.changed()
+    if not rows:
+        return
+    for user_id in sorted({row["user_id"] for row in rows}):
+        await session.execute(select(func.pg_advisory_xact_lock_shared(summary_lock_key(user_id))))
+    stmt = pg_insert(DailyUserSummary).values(rows)
+    columns = DailyUserSummary.__table__.c
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[columns.user_id, columns.day],
+            set_={name : columns[name] + stmt.excluded[name] for name in SUMMARY_COLUMNS}
+            | {"last_edited" : func.now()},
+        )
+    )
+
+def daily_summary_aggregate(
+    user_id : uuid.UUID,
+    start : datetime.date | None = None,
+    end : datetime.date | None = None,
+) -> Select:
+    """
+    the rollup computed from the raw tables, days in [start, end):
+    what a rebuild writes and what the rollup replaces on reads
+    """
+    behavior_day = cast(func.timezone("UTC", Behavior.occured_at), Date)
+    behavior_conditions = [Behavior.user_id == user_id, Behavior.category.is_not(None)]
+    if start is not None:
+        behavior_conditions.append(Behavior.occured_at >= utc_day_start(start))
+    if end is not None:
+        behavior_conditions.append(Behavior.occured_at < utc_day_start(end))
+    behaviors = (
+        select(
+            behavior_day.label("day"),
+            func.coalesce(Expense.amount, 0).label("expense_total"),
+            func.coalesce(Diet.calories, 0).label("calories"),
+            case((Behavior.category == BehaviorCategory.WORKOUT, 1), else_=0).label("workout_count"),
+            case((Behavior.category == BehaviorCategory.TECHWORK, 1), else_=0).label("techwork_count"),
+            literal(0).label("tasks_total"),
+            literal(0).label("tasks_completed"),
+        )
+        .outerjoin(Expense, Expense.behavior_id == Behavior.behavior_id)
+        .outerjoin(Diet, Diet.behavior_id == Behavior.behavior_id)
+        .where(*behavior_conditions)
+    )
+
+    task_day = cast(
+        func.timezone("UTC", func.coalesce(Task.due_at, Task.scheduled_at, Task.created_at)), Date,
+    )
+    task_conditions = [Task.user_id == user_id, Task.status != TaskStatus.CANCELLED]
+    if start is not None:
+        task_conditions.append(task_day >= start)
+    if end is not None:
+        task_conditions.append(task_day < end)
+    tasks = select(
+        task_day.label("day"),
+        literal(0),
+        literal(0),
+        literal(0),
+        literal(0),
+        literal(1),
+        case((Task.status == TaskStatus.COMPLETION, 1), else_=0),
+    ).where(*task_conditions)
+
+    parts = union_all(behaviors, tasks).subquery()
+    return (
+        select(
+            literal(user_id).label("user_id"),
+            parts.c.day,
+            *(func.sum(parts.c[name]).label(name) for name in SUMMARY_COLUMNS),
+        )
+        .group_by(parts.c.day)
+        .order_by(parts.c.day)
+    )
+
+async def rebuild_daily_summaries(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    start : datetime.date | None = None,
+    end : datetime.date | None = None,
+) -> int:
+    """
+    recompute one user's rollup rows for days in [start, end) from the raw
+    tables in one transaction, returns the number of days written
+    """
+    try:
+        await session.execute(select(func.pg_advisory_xact_lock(summary_lock_key(user_id))))
+        conditions = [DailyUserSummary.user_id == user_id]
+        if start is not None:
+            conditions.append(DailyUserSummary.day >= start)
+        if end is not None:
+            conditions.append(DailyUserSummary.day < end)
+        await session.execute(delete(DailyUserSummary).where(*conditions))
+        result = await session.execute(
+            insert(DailyUserSummary).from_select(
+                ["user_id", "day", *SUMMARY_COLUMNS],
+                daily_summary_aggregate(user_id, start, end),
+            )
+        )
+        await session.commit()
+        return result.rowcount # type: ignore
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise ServerError(
+            message=f"Failed to rebuild daily summaries : {str(e)}",
+            code="SUMMARY_REBUILD_FAILED",
+        )
+
+async def get_daily_summaries(
+    session : AsyncSession,
+    user_id : uuid.UUID,
+    start : datetime.date,
+    end : datetime.date,
+) -> list[DailyUserSummary]:
+    """
+    the user's rollup rows for days in [start, end), a primary key range scan
+    """
+    try:
+        stmt = (
+            select(DailyUserSummary)
+            .where(
+                DailyUserSummary.user_id == user_id,
+                DailyUserSummary.day >= start,
+                DailyUserSummary.day < end,
+            )
+            .order_by(DailyUserSummary.day)
+        )
+        result = await session.scalars(stmt)
+        return list(result)
+    except SQLAlchemyError as e:
+        raise ServerError(
+            message=f"Failed to retrieve daily summaries : {str(e)}",
+            code="SUMMARY_FETCH_FAILED",
+        )
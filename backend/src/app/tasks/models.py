@@ -0,0 +1,71 @@
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, ForeignKey, Enum, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.enums import TaskStatus
+import uuid
+import datetime
+
+## Task
+# - task_id(PK, Text)(default uid)
+# - uid(not null, FK->User.uid)
+# - task_name(not null, Text)
+# - task_description(Text, Optional)
+# - status(Enum: COMPLETION | PENDING | UNDUE | CANCELLED)(Default: PENDING)
+# - category(Text, default: None, Fix enum values)
+# - scheduled_at(Optional)
+# - due_at(Optional)
+# - created_at(not null)
+# - last_edited(not null)
+# - completed_at (Optional)
+
+class Task(Base):
+    __tablename__ = "tasks"
+    
+    task_id : Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id : Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    task_name : Mapped[str] = mapped_column(nullable=False)
+    task_description : Mapped[str] = mapped_column(nullable=True)
+    status : Mapped[TaskStatus] = mapped_column(
+        Enum(
+            TaskStatus,
+            name="task_status",
+            native_enum=True,
+            create_type=True,
+        ),
+        nullable=False,
+        default=TaskStatus.PENDING,
+        server_default=TaskStatus.PENDING.name,
+    )
+    category : Mapped[str] = mapped_column(nullable=True)
+    scheduled_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    due_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    created_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_edited : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    completed_at : Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse
 from app.auth.security import (
     generate_access_token,
     generate_refresh_token,
-    hash_password,
+    hash_password_async,
     hash_refresh_token,
 )
 from app.auth.utils import (
@@ -14,7 +14,7 @@ from app.auth.service import (
     create_user_with_email_identity,
     get_user_by_email,
 )
-from app.db.config import DbSession
+from app.db.dependencies import DbSession
 from app.auth.schemas import AuthEmailSignUpInitRequest
 from typing import Annotated
 
@@ -52,7 +52,7 @@ async def create_user_test(session : DbSession, user_data : AuthEmailSignUpInitR
     await verify_credentinal_for_email_signup(session,user_data)
     
     # hash the password
-    password_hash = hash_password(user_data.password)
+    password_hash = await hash_password_async(user_data.password)
     
     user, auth = await create_user_with_email_identity(
         session, 
@@ -0,0 +1,53 @@
+"""
+get_current_user cost with the verified access token cache hot and cold.
+
+cold: ACCESS_TOKEN_CACHE_ENABLED behaviour off, every call decodes the JWT
+hot : the same token is served from app.auth.security.access_token_cache
+
+usage: cd backend/src && python -m benchmarks.access_token_cache --calls 50000
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.requests import Request
+
+from app.auth.dependencies import get_current_user
+from app.auth.security import access_token_cache, generate_access_token
+from app.core.setting import settings
+
+
+def make_request(token : str) -> Request:
+    return Request({
+        "type" : "http",
+        "method" : "GET",
+        "path" : "/",
+        "headers" : [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+async def run(calls : int, cached : bool) -> dict:
+    settings.access_token_cache_enabled = cached
+    access_token_cache.clear()
+    request = make_request(generate_access_token("user-1", "session-1"))
+    
+    start = time.perf_counter()
+    for _ in range(calls):
+        await get_current_user(request)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "mode" : "hot" if cached else "cold",
+        "us_per_call" : round(elapsed / calls * 1e6, 2),
+        "calls_per_s" : round(calls / elapsed),
+        "cache" : access_token_cache.stats(),
+    }
+
+async def main(calls : int) -> None:
+    for cached in (False, True):
+        print(await run(calls, cached))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
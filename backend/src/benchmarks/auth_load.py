@@ -0,0 +1,252 @@
+"""
+End-to-end load test of the app.auth.router flows.
+
+Every virtual user runs, over HTTP against a running api:
+    signup -> (otp from the sendgrid stub) -> verify -> refresh x N -> signout
+    -> signin -> (otp) -> verify -> signout-all
+and the run reports per-endpoint latency percentiles, error rates and
+requests per second as JSON, so results can be diffed across commits.
+
+Stand-ins (docker-compose.loadtest.yml at the repo root): disposable
+Postgres on tmpfs, Redis, the api migrated to head with RATE_LIMIT_ENABLED
+false, and app.email.stub_sendgrid receiving the otp mails:
+
+    docker compose -f docker-compose.loadtest.yml up -d --build
+    cd backend/src && python -m benchmarks.auth_load --users 50 --flows 500 --output load.json
+
+Only talks HTTP, it doesn't need the app settings or secrets.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+AUTH = "/api/v1/auth"
+
+def percentile(values : list[float], pct : float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+@dataclass
+class EndpointStats:
+    latencies_ms : list[float] = field(default_factory=list)
+    statuses : dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    errors : int = 0
+
+    def report(self, elapsed : float) -> dict:
+        count = len(self.latencies_ms)
+        if not count:
+            return {"count" : 0}
+        return {
+            "count" : count,
+            "rps" : round(count / elapsed, 2),
+            "errors" : self.errors,
+            "error_rate" : round(self.errors / count, 4),
+            "statuses" : dict(sorted(self.statuses.items())),
+            "p50_ms" : round(percentile(self.latencies_ms, 0.50), 2),
+            "p90_ms" : round(percentile(self.latencies_ms, 0.90), 2),
+            "p95_ms" : round(percentile(self.latencies_ms, 0.95), 2),
+            "p99_ms" : round(percentile(self.latencies_ms, 0.99), 2),
+            "max_ms" : round(max(self.latencies_ms), 2),
+        }
+
+class FlowError(Exception):
+    pass
+
+class LoadTest:
+    def __init__(
+        self,
+        api : httpx.AsyncClient,
+        stub : httpx.AsyncClient,
+        refreshes : int,
+        otp_timeout : float,
+    ):
+        self.api = api
+        self.stub = stub
+        self.refreshes = refreshes
+        self.otp_timeout = otp_timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stats : dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.flows_ok = 0
+        self.flows_failed : dict[str, int] = defaultdict(int)
+
+    async def call(
+        self,
+        name : str,
+        path : str,
+        expected : int,
+        json_body : dict | None = None,
+        tokens : dict | None = None,
+    ) -> httpx.Response:
+        # auth cookies are `secure` outside development, so they're sent by
+        # hand instead of relying on the client's cookie jar over plain http
+        headers = {"Cookie" : "; ".join(f"{k}={v}" for k, v in tokens.items())} if tokens else None
+        start = time.perf_counter()
+        try:
+            response = await self.api.post(path, json=json_body, headers=headers)
+        except httpx.HTTPError as e:
+            stats = self.stats[name]
+            stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+            stats.statuses[0] += 1
+            stats.errors += 1
+            raise FlowError(f"{name}: {type(e).__name__}")
+        stats = self.stats[name]
+        stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+        stats.statuses[response.status_code] += 1
+        if response.status_code != expected:
+            stats.errors += 1
+            raise FlowError(f"{name}: {response.status_code}")
+        return response
+
+    async def delivered_count(self, email : str) -> int:
+        response = await self.stub.get(f"/messages/{email}")
+        return len(response.json()["messages"])
+
+    async def wait_for_otp(self, email : str, already_delivered : int) -> int:
+        """
+        poll the stub until a new mail for email arrives, return its otp
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < self.otp_timeout:
+            response = await self.stub.get(f"/messages/{email}")
+            messages = response.json()["messages"]
+            if len(messages) > already_delivered and messages[-1]["otp"]:
+                self.stats["otp_delivery"].latencies_ms.append((time.perf_counter() - start) * 1000)
+                self.stats["otp_delivery"].statuses[200] += 1
+                return int(messages[-1]["otp"])
+            await asyncio.sleep(0.05)
+        self.stats["otp_delivery"].latencies_ms.append(self.otp_timeout * 1000)
+        self.stats["otp_delivery"].statuses[0] += 1
+        self.stats["otp_delivery"].errors += 1
+        raise FlowError("otp_delivery: timeout")
+
+    @staticmethod
+    def tokens_from(response : httpx.Response) -> dict:
+        tokens = {key : response.cookies.get(key) for key in ("access_token", "refresh_token")}
+        if not all(tokens.values()):
+            raise FlowError("verify: no auth cookies")
+        return tokens
+
+    async def flow(self, n : int) -> None:
+        email = f"load-{self.run_id}-{n}@example.com"
+        password = f"pw-{uuid.uuid4().hex}"
+
+        response = await self.call(
+            "signup", f"{AUTH}/email/signup", 200,
+            json_body={"email" : email, "username" : f"load-{n}", "password" : password},
+        )
+        otp = await self.wait_for_otp(email, 0)
+        response = await self.call(
+            "verify", f"{AUTH}/email/verify", 204,
+            json_body={"verification_id" : response.json()["verification_id"], "user_otp" : otp},
+        )
+        tokens = self.tokens_from(response)
+
+        for _ in range(self.refreshes):
+            response = await self.call("refresh", f"{AUTH}/refresh", 204, tokens=tokens)
+            tokens = self.tokens_from(response)
+
+        await self.call("signout", f"{AUTH}/signout", 204, tokens=tokens)
+
+        delivered = await self.delivered_count(email)
+        response = await self.call(
+            "signin", f"{AUTH}/email/signin", 200,
+            json_body={"email" : email, "password" : password},
+        )
+        otp = await self.wait_for_otp(email, delivered)
+        response = await self.call(
+            "verify", f"{AUTH}/email/verify", 204,
+            json_body={"verification_id" : response.json()["verification_id"], "user_otp" : otp},
+        )
+        await self.call("signout_all", f"{AUTH}/signout-all", 204, tokens=self.tokens_from(response))
+
+    async def run(self, users : int, flows : int) -> float:
+        remaining = iter(range(flows))
+
+        async def virtual_user():
+            for n in remaining:
+                try:
+                    await self.flow(n)
+                    self.flows_ok += 1
+                except FlowError as e:
+                    self.flows_failed[str(e)] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user() for _ in range(users)))
+        return time.perf_counter() - start
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def main(args : argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with (
+        httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as api,
+        httpx.AsyncClient(base_url=args.stub_url, timeout=args.timeout, limits=limits) as stub,
+    ):
+        await stub.delete("/messages")
+        load_test = LoadTest(api, stub, args.refreshes, args.otp_timeout)
+        elapsed = await load_test.run(args.users, args.flows)
+
+    requests = sum(
+        len(stats.latencies_ms)
+        for name, stats in load_test.stats.items()
+        if name != "otp_delivery"
+    )
+    return {
+        "commit" : git_commit(),
+        "config" : {
+            "base_url" : args.base_url,
+            "users" : args.users,
+            "flows" : args.flows,
+            "refreshes" : args.refreshes,
+        },
+        "duration_s" : round(elapsed, 2),
+        "requests" : requests,
+        "rps" : round(requests / elapsed, 2),
+        "flows" : {
+            "completed" : load_test.flows_ok,
+            "failed" : sum(load_test.flows_failed.values()),
+            "failures" : dict(load_test.flows_failed),
+        },
+        "endpoints" : {
+            name : stats.report(elapsed)
+            for name, stats in sorted(load_test.stats.items())
+        },
+    }
+
+def cli() -> None:
+    parser = argparse.ArgumentParser(description="Load test the auth flows end to end")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--stub-url", default="http://localhost:8025")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--flows", type=int, default=200, help="total flows to run")
+    parser.add_argument("--refreshes", type=int, default=5, help="refreshes per flow")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per request timeout, seconds")
+    parser.add_argument("--otp-timeout", type=float, default=30.0, help="max wait for an otp mail, seconds")
+    parser.add_argument("--output", default=None, help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    sys.exit(1 if report["flows"]["completed"] == 0 else 0)
+
+if __name__ == "__main__":
+    cli()
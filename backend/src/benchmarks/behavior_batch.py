@@ -0,0 +1,136 @@
+"""
+Behavior ingestion: one request per behavior vs POST /api/v1/behaviors/batch.
+
+Needs a local Postgres migrated to head (same settings as the api). For each
+size in --sizes a set of behaviors (a mix of uncategorized, Diet, Expense,
+WorkOut and TechWork) is written twice:
+    per_row : the single create flow of behavior.api.md, one transaction per
+              behavior with an INSERT into behaviors and one into its
+              category table
+    batch   : app.behaviors.service.create_behaviors_batch, one transaction
+              with one multi-row INSERT ... RETURNING per table and the
+              daily_user_summary upsert
+and the best of --repeats is reported with the number of statements sent.
+Rows are written for a throwaway user that's deleted afterwards.
+
+usage: cd backend/src && python -m benchmarks.behavior_batch --sizes 1,500 --repeats 5
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import delete, event, insert
+
+from app.auth.models import User
+from app.behaviors.models import Behavior, CATEGORY_MODELS
+from app.behaviors.schemas import BehaviorCreateRequest
+from app.behaviors.service import create_behaviors_batch
+from app.core.enums import BehaviorCategory
+from app.db.config import async_session, dispose_engine, get_engine
+
+DETAILS = {
+    BehaviorCategory.DIET : {"diet_name" : "oats", "calories" : 350},
+    BehaviorCategory.EXPENSE : {"expense_name" : "coffee", "amount" : Decimal("3.50")},
+    BehaviorCategory.WORKOUT : {"workout_name" : "run"},
+    BehaviorCategory.TECHWORK : {"techwork_name" : "code review"},
+}
+CATEGORIES = [None, *DETAILS]
+
+def make_behaviors(count : int) -> list[BehaviorCreateRequest]:
+    now = datetime.datetime.now(datetime.UTC)
+    behaviors = []
+    for n in range(count):
+        category = CATEGORIES[n % len(CATEGORIES)]
+        behaviors.append(BehaviorCreateRequest(
+            behavior_name=f"behavior {n}",
+            occured_at=now - datetime.timedelta(minutes=n),
+            category=category,
+            category_specific_detail=DETAILS[category] if category else None, # type: ignore
+        ))
+    return behaviors
+
+async def insert_per_row(user_id : uuid.UUID, behaviors : list[BehaviorCreateRequest]) -> None:
+    async with async_session() as session:
+        for behavior in behaviors:
+            behavior_id = await session.scalar(
+                insert(Behavior)
+                .values(
+                    user_id=user_id,
+                    behavior_name=behavior.behavior_name,
+                    category=behavior.category,
+                    occured_at=behavior.occured_at,
+                    source=behavior.source,
+                )
+                .returning(Behavior.behavior_id)
+            )
+            if behavior.category is not None:
+                model = CATEGORY_MODELS[behavior.category]
+                await session.execute(
+                    insert(model).values(
+                        behavior_id=behavior_id,
+                        **behavior.category_specific_detail.model_dump(), # type: ignore
+                    )
+                )
+            await session.commit()
+
+async def insert_batch(user_id : uuid.UUID, behaviors : list[BehaviorCreateRequest]) -> None:
+    async with async_session() as session:
+        await create_behaviors_batch(session, user_id, behaviors)
+
+async def measure(name, fn, user_id, behaviors, repeats : int, counter : dict) -> dict:
+    best = float("inf")
+    statements = 0
+    for _ in range(repeats):
+        counter["statements"] = 0
+        start = time.perf_counter()
+        await fn(user_id, behaviors)
+        best = min(best, time.perf_counter() - start)
+        statements = counter["statements"]
+    return {
+        "mode" : name,
+        "items" : len(behaviors),
+        "total_ms" : round(best * 1000, 2),
+        "per_item_ms" : round(best * 1000 / len(behaviors), 3),
+        "statements" : statements,
+    }
+
+async def main(sizes : list[int], repeats : int) -> list[dict]:
+    counter = {"statements" : 0}
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+            counter["statements"] += 1
+
+    engine = get_engine()
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    user_id = uuid.uuid4()
+    results = []
+    try:
+        async with async_session() as session:
+            session.add(User(user_id=user_id, username=f"bench-{user_id}"))
+            await session.commit()
+        for size in sizes:
+            behaviors = make_behaviors(size)
+            per_row = await measure("per_row", insert_per_row, user_id, behaviors, repeats, counter)
+            batch = await measure("batch", insert_batch, user_id, behaviors, repeats, counter)
+            batch["speedup"] = round(per_row["total_ms"] / batch["total_ms"], 2) if batch["total_ms"] else None
+            results += [per_row, batch]
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+        async with async_session() as session:
+            # behaviors and category rows go with the user (ON DELETE CASCADE)
+            await session.execute(delete(User).where(User.user_id == user_id))
+            await session.commit()
+        await dispose_engine()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,500", help="comma separated batch sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(asyncio.run(main(sizes, args.repeats)), indent=2))
@@ -0,0 +1,135 @@
+"""
+Bulk behavior import: COPY + merge vs the batch-insert path, in rows per second.
+
+A CSV of --rows behaviors (uncategorized, Diet, Expense, WorkOut and
+TechWork round robin, the columns an export writes) is generated in memory
+and fed in --chunk-kb chunks, like an upload.
+
+parse : default, no database: app.imports.service.staging_records reads,
+        validates and turns every row into a staging record, the
+        client side cost of an import
+db    : --db, a local Postgres migrated to head (same settings as the api),
+        the same CSV loaded twice for a throwaway user:
+            copy  : app.imports.service.import_behaviors, one binary COPY
+                    into the staging table, one INSERT ... SELECT per table
+            batch : the rows parsed the same way, then written with
+                    create_behaviors_batch (POST /api/v1/behaviors/batch)
+                    in batches of BEHAVIOR_BATCH_MAX_ITEMS, a transaction each
+        the user is deleted afterwards
+
+usage: cd backend/src && python -m benchmarks.behavior_import --rows 200000
+       python -m benchmarks.behavior_import --rows 200000 --db
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import io
+import json
+import time
+import uuid
+
+from app.core.enums import BEHAVIOR_BATCH_MAX_ITEMS
+from app.imports.service import IMPORT_COLUMNS, ImportReport, csv_records, behavior_request, staging_records
+from app.summaries.service import SummaryDeltas
+
+DETAILS = {
+    "Diet" : {"diet_name" : "oats", "calories" : "350"},
+    "Expense" : {"expense_name" : "coffee", "amount" : "3.50"},
+    "WorkOut" : {"workout_name" : "run"},
+    "TechWork" : {"techwork_name" : "code review"},
+}
+CATEGORIES = ["", *DETAILS]
+
+def make_csv(rows : int) -> bytes:
+    now = datetime.datetime.now(datetime.UTC)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=IMPORT_COLUMNS)
+    writer.writeheader()
+    for n in range(rows):
+        category = CATEGORIES[n % len(CATEGORIES)]
+        writer.writerow({
+            "name" : f"behavior {n}",
+            "occured_at" : (now - datetime.timedelta(minutes=n)).isoformat(),
+            "category" : category,
+        } | DETAILS.get(category, {}))
+    return buffer.getvalue().encode()
+
+async def chunks(data : bytes, size : int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def rate(rows : int, seconds : float) -> dict:
+    return {"seconds" : round(seconds, 3), "rows_per_second" : round(rows / seconds) if seconds else None}
+
+async def measure_parse(data : bytes, chunk_size : int) -> dict:
+    report = ImportReport()
+    start = time.perf_counter()
+    async for _ in staging_records(uuid.uuid4(), chunks(data, chunk_size), report, SummaryDeltas()):
+        pass
+    return {"imported" : report.imported, "invalid" : report.invalid} | rate(report.rows, time.perf_counter() - start)
+
+async def measure_db(data : bytes, chunk_size : int) -> dict:
+    from sqlalchemy import delete
+    from app.auth.models import User
+    from app.behaviors.service import create_behaviors_batch
+    from app.db.config import async_session, dispose_engine
+    from app.imports.service import import_behaviors
+
+    copy_user, batch_user = uuid.uuid4(), uuid.uuid4()
+    try:
+        async with async_session() as session:
+            session.add_all([User(user_id=user_id, username=f"bench-{user_id}") for user_id in (copy_user, batch_user)])
+            await session.commit()
+
+        async with async_session() as session:
+            start = time.perf_counter()
+            report = await import_behaviors(session, copy_user, chunks(data, chunk_size))
+            copy = {"imported" : report.imported} | rate(report.imported, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        imported = 0
+        async with async_session() as session:
+            header, pending = None, []
+            async for records in csv_records(chunks(data, chunk_size)):
+                for record in records:
+                    if header is None:
+                        header = record
+                        continue
+                    pending.append(behavior_request(dict(zip(header, record))))
+                    if len(pending) == BEHAVIOR_BATCH_MAX_ITEMS:
+                        imported += len(await create_behaviors_batch(session, batch_user, pending))
+                        pending = []
+            if pending:
+                imported += len(await create_behaviors_batch(session, batch_user, pending))
+        batch = {"imported" : imported} | rate(imported, time.perf_counter() - start)
+        return {
+            "copy" : copy,
+            "batch" : batch,
+            "speedup" : round(batch["seconds"] / copy["seconds"], 1) if copy["seconds"] else None,
+        }
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(User).where(User.user_id.in_([copy_user, batch_user])))
+            await session.commit()
+        await dispose_engine()
+
+def main(args : argparse.Namespace) -> dict:
+    data = make_csv(args.rows)
+    chunk_size = args.chunk_kb * 1024
+    report = {
+        "rows" : args.rows,
+        "csv_mb" : round(len(data) / 2**20, 1),
+        "parse" : asyncio.run(measure_parse(data, chunk_size)),
+    }
+    if args.db:
+        report["db"] = asyncio.run(measure_db(data, chunk_size))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-kb", type=int, default=64, help="size of the upload chunks")
+    parser.add_argument("--db", action="store_true", help="also load into postgres, COPY vs batch inserts")
+    args = parser.parse_args()
+    print(json.dumps(main(args), indent=2))
@@ -0,0 +1,194 @@
+"""
+Page latency of GET /api/v1/behaviors by page depth, keyset vs OFFSET.
+
+Needs a local Postgres migrated to head (same settings as the api). Seeds
+one user with --rows behaviors (two minutes apart, categories round robin,
+with their category rows) and --noise-users users with --noise-rows each, so
+the indexes hold other users' rows too. Then, for every depth in --depths
+(in pages of --limit), fetches that page:
+    keyset   : app.behaviors.service.list_behaviors with the cursor of the
+               previous page + get_category_details, what the endpoint runs
+    offset   : the same query with OFFSET depth * limit, for comparison
+with and without a category filter, best of --repeats. The keyset cursor is
+looked up beforehand and not timed. Keyset times should stay flat with
+depth; OFFSET grows linearly. The plan of the deepest keyset query is
+printed as well.
+
+Seeded users (and through ON DELETE CASCADE their behaviors) are deleted
+afterwards; seeding and deleting millions of rows takes a while.
+
+usage: cd backend/src && python -m benchmarks.behavior_pages --rows 2000000
+       python -m benchmarks.behavior_pages --rows 200000 --depths 0,10,100,1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.behaviors.models import Behavior
+from app.behaviors.service import get_category_details, list_behaviors
+from app.core.enums import BehaviorCategory
+from app.db.config import async_session, dispose_engine, get_engine
+
+SEED_PREFIX = "pages-seed-"
+# category -> (table, its not null columns besides behavior_id, their values)
+CATEGORY_TABLES = {
+    "DIET" : ("diets", "diet_name", "'seeded'"),
+    "EXPENSE" : ("expenses", "expense_name, amount", "'seeded', 3.50"),
+    "WORKOUT" : ("workouts", "workout_name", "'seeded'"),
+    "TECHWORK" : ("techworks", "techwork_name", "'seeded'"),
+}
+
+SEED_BEHAVIORS_SQL = """
+INSERT INTO behaviors (behavior_id, user_id, behavior_name, category, occured_at, source)
+SELECT
+    gen_random_uuid(), u.user_id, 'seeded behavior',
+    ((ARRAY['DIET', 'EXPENSE', 'WORKOUT', 'TECHWORK'])[1 + n % 5])::behavior_category,
+    now() - n * interval '2 minutes', 'USER_LOGGED'
+FROM users AS u, generate_series(1, :rows) AS n
+WHERE u.username LIKE :pattern
+"""
+
+async def seed(rows : int, noise_users : int, noise_rows : int) -> uuid.UUID:
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("""
+            INSERT INTO users (user_id, username)
+            SELECT gen_random_uuid(), :prefix || i FROM generate_series(0, :noise_users) AS i
+            """),
+            {"prefix" : SEED_PREFIX, "noise_users" : noise_users},
+        )
+        await conn.execute(text(SEED_BEHAVIORS_SQL), {"rows" : rows, "pattern" : f"{SEED_PREFIX}0"})
+        if noise_users:
+            await conn.execute(
+                text(SEED_BEHAVIORS_SQL + " AND u.username <> :prefix || '0'"),
+                {"rows" : noise_rows, "pattern" : f"{SEED_PREFIX}%", "prefix" : SEED_PREFIX},
+            )
+        for category, (table, columns, values) in CATEGORY_TABLES.items():
+            await conn.execute(text(f"""
+                INSERT INTO {table} (behavior_id, {columns})
+                SELECT b.behavior_id, {values} FROM behaviors AS b JOIN users AS u USING (user_id)
+                WHERE u.username LIKE :pattern AND b.category = '{category}'
+            """), {"pattern" : f"{SEED_PREFIX}%"})
+        user_id = (await conn.execute(
+            text("SELECT user_id FROM users WHERE username = :name"),
+            {"name" : f"{SEED_PREFIX}0"},
+        )).scalar_one()
+    async with get_engine().connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("behaviors", *(table for table, _, _ in CATEGORY_TABLES.values())):
+            await conn.execute(text(f"ANALYZE {table}"))
+    return user_id
+
+async def cleanup() -> None:
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE username LIKE :prefix || '%'"),
+            {"prefix" : SEED_PREFIX},
+        )
+
+def page_query(user_id : uuid.UUID, category : BehaviorCategory | None):
+    stmt = select(Behavior).where(Behavior.user_id == user_id)
+    if category is not None:
+        stmt = stmt.where(Behavior.category == category)
+    return stmt.order_by(Behavior.occured_at.desc(), Behavior.behavior_id.desc())
+
+async def cursor_at(session, user_id, category, offset : int):
+    """
+    (occured_at, behavior_id) of the row just before the page, untimed
+    """
+    if offset == 0:
+        return None
+    row = (await session.execute(
+        page_query(user_id, category)
+        .with_only_columns(Behavior.occured_at, Behavior.behavior_id)
+        .offset(offset - 1)
+        .limit(1)
+    )).one_or_none()
+    return tuple(row) if row else None
+
+async def best_ms(fn, repeats : int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+async def measure(user_id, depths, limit, repeats, category) -> list[dict]:
+    results = []
+    async with async_session() as session:
+        for depth in depths:
+            offset = depth * limit
+            after = await cursor_at(session, user_id, category, offset)
+            if offset and after is None:
+                break
+
+            async def keyset():
+                page = await list_behaviors(session, user_id, limit + 1, category=category, after=after)
+                await get_category_details(session, page[:limit])
+
+            async def by_offset():
+                page = list(await session.scalars(page_query(user_id, category).offset(offset).limit(limit + 1)))
+                await get_category_details(session, page[:limit])
+
+            results.append({
+                "category" : category.value if category else None,
+                "depth_pages" : depth,
+                "keyset_ms" : await best_ms(keyset, repeats),
+                "offset_ms" : await best_ms(by_offset, repeats),
+            })
+        await session.rollback()
+    return results
+
+async def explain_deepest(user_id, depths, limit, category) -> list[str]:
+    async with async_session() as session:
+        after = None
+        for depth in sorted(depths, reverse=True):
+            after = await cursor_at(session, user_id, category, depth * limit)
+            if after:
+                break
+        stmt = page_query(user_id, category).limit(limit + 1)
+        if after:
+            occured_at, behavior_id = after
+            stmt = stmt.where(
+                Behavior.occured_at <= occured_at,
+                (Behavior.occured_at < occured_at)
+                | ((Behavior.occured_at == occured_at) & (Behavior.behavior_id < behavior_id)),
+            )
+        compiled = stmt.compile(get_engine().sync_engine, compile_kwargs={"literal_binds" : True})
+        rows = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"))
+        await session.rollback()
+        return [row[0] for row in rows]
+
+async def main(args : argparse.Namespace) -> dict:
+    depths = [int(depth) for depth in args.depths.split(",")]
+    try:
+        user_id = await seed(args.rows, args.noise_users, args.noise_rows)
+        results = await measure(user_id, depths, args.limit, args.repeats, None)
+        results += await measure(user_id, depths, args.limit, args.repeats, BehaviorCategory.EXPENSE)
+        plan = await explain_deepest(user_id, depths, args.limit, BehaviorCategory.EXPENSE)
+    finally:
+        await cleanup()
+        await dispose_engine()
+    return {
+        "rows" : args.rows,
+        "noise_rows" : args.noise_users * args.noise_rows,
+        "limit" : args.limit,
+        "results" : results,
+        "deepest_keyset_plan" : plan,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000, help="behaviors of the measured user")
+    parser.add_argument("--noise-users", type=int, default=20)
+    parser.add_argument("--noise-rows", type=int, default=25_000, help="behaviors per noise user")
+    parser.add_argument("--depths", default="0,10,100,1000,10000", help="page depths to fetch")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,143 @@
+"""
+Dashboard reads: daily_user_summary vs aggregating the raw tables per request.
+
+Needs a local Postgres migrated to head (same settings as the api). Seeds one
+user with --per-day behaviors (categories round robin, with their category
+rows) and --tasks-per-day tasks on each of --days days, builds the rollup with
+app.summaries.service.rebuild_daily_summaries, then for every range in
+--ranges (days, ending today) times, best of --repeats:
+    rollup    : app.summaries.service.get_daily_summaries, what
+                GET /api/v1/summaries/daily reads
+    aggregate : daily_summary_aggregate, the GROUP BY over behaviors,
+                expenses, diets and tasks the rollup replaces
+and checks both return the same days. The rebuild time is reported too.
+The user (and through ON DELETE CASCADE its rows) is deleted afterwards.
+
+usage: cd backend/src && python -m benchmarks.daily_summary --days 365 --per-day 40
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+from sqlalchemy import text
+
+from app.db.config import async_session, dispose_engine, get_engine
+from app.summaries.service import (
+    SUMMARY_COLUMNS,
+    daily_summary_aggregate,
+    get_daily_summaries,
+    rebuild_daily_summaries,
+)
+
+SEED_USERNAME = "summary-seed"
+# category -> (table, its not null columns besides behavior_id, their values)
+CATEGORY_TABLES = {
+    "DIET" : ("diets", "diet_name, calories", "'seeded', 100 + n % 400"),
+    "EXPENSE" : ("expenses", "expense_name, amount", "'seeded', 1 + (n % 5000) / 100.0"),
+    "WORKOUT" : ("workouts", "workout_name", "'seeded'"),
+    "TECHWORK" : ("techworks", "techwork_name", "'seeded'"),
+}
+
+async def seed(days : int, per_day : int, tasks_per_day : int):
+    rows = days * per_day
+    async with get_engine().begin() as conn:
+        user_id = (await conn.execute(
+            text("INSERT INTO users (user_id, username) VALUES (gen_random_uuid(), :name) RETURNING user_id"),
+            {"name" : SEED_USERNAME},
+        )).scalar_one()
+        # the n-th behavior, day n / per_day back, spread over the day
+        await conn.execute(text("""
+            INSERT INTO behaviors (behavior_id, user_id, behavior_name, category, occured_at, source)
+            SELECT
+                gen_random_uuid(), :user_id, 'seeded behavior ' || n,
+                ((ARRAY['DIET', 'EXPENSE', 'WORKOUT', 'TECHWORK'])[1 + n % 5])::behavior_category,
+                date_trunc('day', now()) - (n / :per_day) * interval '1 day'
+                    + (n % :per_day) * (interval '1 day' / :per_day),
+                'USER_LOGGED'
+            FROM generate_series(0, :rows - 1) AS n
+        """), {"user_id" : user_id, "per_day" : per_day, "rows" : rows})
+        for category, (table, columns, values) in CATEGORY_TABLES.items():
+            await conn.execute(text(f"""
+                INSERT INTO {table} (behavior_id, {columns})
+                SELECT b.behavior_id, {values}
+                FROM behaviors AS b, LATERAL (SELECT split_part(b.behavior_name, ' ', 3)::int AS n) AS seq
+                WHERE b.user_id = :user_id AND b.category = '{category}'
+            """), {"user_id" : user_id})
+        await conn.execute(text("""
+            INSERT INTO tasks (task_id, user_id, task_name, status, due_at)
+            SELECT
+                gen_random_uuid(), :user_id, 'seeded task',
+                ((ARRAY['COMPLETION', 'PENDING', 'COMPLETION', 'CANCELLED'])[1 + n % 4])::task_status,
+                date_trunc('day', now()) - (n / :tasks_per_day) * interval '1 day' + interval '12 hours'
+            FROM generate_series(0, :tasks - 1) AS n
+        """), {"user_id" : user_id, "tasks_per_day" : max(tasks_per_day, 1), "tasks" : days * tasks_per_day})
+    async with get_engine().connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("behaviors", "tasks", *(table for table, _, _ in CATEGORY_TABLES.values())):
+            await conn.execute(text(f"ANALYZE {table}"))
+    return user_id
+
+async def cleanup() -> None:
+    async with get_engine().begin() as conn:
+        await conn.execute(text("DELETE FROM users WHERE username = :name"), {"name" : SEED_USERNAME})
+
+async def best_ms(fn, repeats : int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3), result
+
+async def main(args : argparse.Namespace) -> dict:
+    ranges = [int(days) for days in args.ranges.split(",")]
+    tomorrow = datetime.datetime.now(datetime.UTC).date() + datetime.timedelta(days=1)
+    results = []
+    try:
+        user_id = await seed(args.days, args.per_day, args.tasks_per_day)
+        async with async_session() as session:
+            rebuild_ms, days_written = await best_ms(
+                lambda : rebuild_daily_summaries(session, user_id), 1,
+            )
+            for days in ranges:
+                start = tomorrow - datetime.timedelta(days=days)
+
+                async def rollup():
+                    rows = await get_daily_summaries(session, user_id, start, tomorrow)
+                    return [(row.day, *(getattr(row, name) for name in SUMMARY_COLUMNS)) for row in rows]
+
+                async def aggregate():
+                    rows = await session.execute(daily_summary_aggregate(user_id, start, tomorrow))
+                    return [(row.day, *(getattr(row, name) for name in SUMMARY_COLUMNS)) for row in rows]
+
+                rollup_ms, rollup_rows = await best_ms(rollup, args.repeats)
+                aggregate_ms, aggregate_rows = await best_ms(aggregate, args.repeats)
+                await session.rollback()
+                results.append({
+                    "range_days" : days,
+                    "rollup_ms" : rollup_ms,
+                    "aggregate_ms" : aggregate_ms,
+                    "speedup" : round(aggregate_ms / rollup_ms, 1) if rollup_ms else None,
+                    "same_result" : rollup_rows == aggregate_rows,
+                })
+    finally:
+        await cleanup()
+        await dispose_engine()
+    return {
+        "behaviors" : args.days * args.per_day,
+        "tasks" : args.days * args.tasks_per_day,
+        "rebuild" : {"days_written" : days_written, "duration_ms" : rebuild_ms},
+        "results" : results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=730, help="days of seeded history")
+    parser.add_argument("--per-day", type=int, default=40, help="behaviors per day")
+    parser.add_argument("--tasks-per-day", type=int, default=4)
+    parser.add_argument("--ranges", default="7,30,365", help="comma separated dashboard ranges, days")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2, default=str))
@@ -0,0 +1,259 @@
+"""
+GET /api/v1/analytics/expenses: numpy over a columnar series vs Python loops.
+
+compute : --expenses synthetic expenses over --history-days days and
+          --names expense names are analyzed twice, best of --repeats:
+              numpy  : app.analytics.service.compute_expense_analytics on
+                       an ExpenseSeries, what the endpoint runs
+              python : the same statistics with loops over one object per
+                       expense (how it looks over ORM objects)
+          and the two results are compared. Needs nothing but numpy.
+fetch   : with --db, the same expenses are seeded for a throwaway user in a
+          local Postgres migrated to head, and fetch_expense_series (one row
+          of array_agg columns) is timed against selecting Behavior and
+          Expense objects. The user is deleted afterwards.
+
+usage: cd backend/src && python -m benchmarks.expense_analytics --expenses 100000
+       python -m benchmarks.expense_analytics --expenses 100000 --db
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+
+from app.analytics.service import (
+    ANOMALY_MIN_SAMPLES,
+    ANOMALY_SCORE,
+    CATEGORY_QUANTILES,
+    MAX_ANOMALIES,
+    MONTHS,
+    TOP_CATEGORIES,
+    ExpenseSeries,
+    compute_expense_analytics,
+    fetch_expense_series,
+)
+
+@dataclass
+class ExpenseRow:
+    behavior_id : uuid.UUID
+    occured_at : datetime.datetime
+    expense_name : str
+    amount : Decimal
+
+def make_expenses(count : int, history_days : int, names : int, today : datetime.date) -> list[ExpenseRow]:
+    rng = np.random.default_rng(7)
+    end = datetime.datetime.combine(today, datetime.time.max, tzinfo=datetime.UTC)
+    seconds = rng.integers(0, history_days * 86400, count)
+    name_ids = rng.zipf(1.5, count) % names
+    # per name base price, a few expenses 20x it
+    amounts = rng.gamma(2.0, 5.0 + name_ids * 3.0)
+    amounts[rng.random(count) < 0.002] *= 20
+    return [
+        ExpenseRow(
+            behavior_id=uuid.uuid4(),
+            occured_at=end - datetime.timedelta(seconds=int(second)),
+            expense_name=f"expense {name_id}",
+            amount=Decimal(f"{max(amount, 0.01):.2f}"),
+        )
+        for second, name_id, amount in zip(seconds, name_ids, amounts)
+    ]
+
+def to_series(expenses : list[ExpenseRow]) -> ExpenseSeries:
+    """
+    the arrays fetch_expense_series builds from its one row; Python's str
+    hash stands in for postgres' hashtextextended as the name key
+    """
+    names = [row.expense_name.strip().lower() for row in expenses]
+    return ExpenseSeries(
+        behavior_ids=np.array([row.behavior_id for row in expenses], dtype=object),
+        days=np.array([int(row.occured_at.timestamp() // 86400) for row in expenses], dtype=np.int64),
+        amounts=np.array([float(row.amount) for row in expenses], dtype=np.float64),
+        names=np.array(names, dtype=object),
+        name_keys=np.array([hash(name) for name in names], dtype=np.int64),
+    )
+
+def quantile(ordered : list[float], q : float) -> float:
+    position = q * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def python_analytics(expenses : list[ExpenseRow], today : datetime.date, days : int) -> dict:
+    """
+    reference: the same statistics, one loop iteration per expense
+    """
+    first_day = today - datetime.timedelta(days=days - 1)
+    by_day = defaultdict(float)
+    by_month = defaultdict(float)
+    by_name = defaultdict(list)
+    for row in expenses:
+        day = row.occured_at.astimezone(datetime.UTC).date()
+        amount = float(row.amount)
+        by_day[day] += amount
+        by_month[(day.year, day.month)] += amount
+        by_name[row.expense_name.strip().lower()].append((amount, row, day))
+
+    def window(day : datetime.date, size : int) -> float:
+        return sum(by_day[day - datetime.timedelta(days=k)] for k in range(size)) / size
+
+    daily = []
+    for offset in range(days):
+        day = first_day + datetime.timedelta(days=offset)
+        daily.append((day, round(by_day[day], 2), round(window(day, 7), 2), round(window(day, 30), 2)))
+
+    months = []
+    year, month = today.year, today.month
+    for _ in range(MONTHS + 1):
+        months.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    months.reverse()
+    monthly = [
+        (f"{year:04d}-{month:02d}", round(by_month[(year, month)], 2),
+         round(by_month[(year, month)] - by_month[previous], 2))
+        for previous, (year, month) in zip(months, months[1:])
+    ]
+
+    categories = []
+    anomalies = []
+    for name, entries in by_name.items():
+        ordered = sorted(amount for amount, _, _ in entries)
+        total = sum(ordered)
+        categories.append((name, len(ordered), round(total, 2),
+                           *(round(quantile(ordered, q), 2) for q in CATEGORY_QUANTILES), total))
+        median = quantile(ordered, 0.5)
+        mad = quantile(sorted(abs(amount - median) for amount in ordered), 0.5)
+        if len(ordered) < ANOMALY_MIN_SAMPLES or mad <= 0:
+            continue
+        for amount, row, day in entries:
+            score = 0.6745 * abs(amount - median) / mad
+            if day >= first_day and score > ANOMALY_SCORE:
+                anomalies.append((day, score, row.behavior_id))
+    categories.sort(key=lambda category : -category[-1])
+    anomalies.sort(key=lambda anomaly : (anomaly[0], anomaly[1]), reverse=True)
+    return {
+        "daily" : daily,
+        "monthly" : monthly,
+        "categories" : [category[:-1] for category in categories[:TOP_CATEGORIES]],
+        "anomalies" : {anomaly[2] for anomaly in anomalies[:MAX_ANOMALIES]},
+    }
+
+def comparable(response) -> dict:
+    return {
+        "daily" : [(d.day, d.total, d.rolling_7d_avg, d.rolling_30d_avg) for d in response.daily],
+        "monthly" : [(m.month, m.total, m.delta) for m in response.monthly],
+        "categories" : [(c.name, c.count, c.total, c.p50, c.p90, c.p99) for c in response.categories],
+        "anomalies" : {a.behavior_id for a in response.anomalies},
+    }
+
+def best_ms(fn, repeats : int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3), result
+
+def same(left : dict, right : dict) -> dict:
+    """
+    per section, rounded values may differ by a cent (float summation order)
+    """
+    def close(a, b):
+        if isinstance(a, (tuple, list)):
+            return len(a) == len(b) and all(close(x, y) for x, y in zip(a, b))
+        if isinstance(a, float):
+            return abs(a - b) <= 0.011
+        return a == b
+    return {section : close(left[section], right[section]) if section != "anomalies"
+            else left[section] == right[section] for section in left}
+
+async def measure_fetch(expenses : list[ExpenseRow], repeats : int) -> dict:
+    from sqlalchemy import delete, insert, select
+    from app.auth.models import User
+    from app.behaviors.models import Behavior, Expense
+    from app.core.enums import BehaviorCategory
+    from app.db.config import async_session, dispose_engine
+
+    user_id = uuid.uuid4()
+    try:
+        async with async_session() as session:
+            session.add(User(user_id=user_id, username=f"bench-{user_id}"))
+            await session.flush()
+            for start in range(0, len(expenses), 5000):
+                chunk = expenses[start:start + 5000]
+                await session.execute(insert(Behavior).values([{
+                    "behavior_id" : row.behavior_id, "user_id" : user_id,
+                    "behavior_name" : row.expense_name, "category" : BehaviorCategory.EXPENSE,
+                    "occured_at" : row.occured_at,
+                } for row in chunk]))
+                await session.execute(insert(Expense).values([{
+                    "behavior_id" : row.behavior_id, "expense_name" : row.expense_name, "amount" : row.amount,
+                } for row in chunk]))
+            await session.commit()
+
+        async with async_session() as session:
+            columnar_ms = float("inf")
+            orm_ms = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                await fetch_expense_series(session, user_id)
+                columnar_ms = min(columnar_ms, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                rows = (await session.execute(
+                    select(Behavior, Expense)
+                    .join(Expense, Expense.behavior_id == Behavior.behavior_id)
+                    .where(Behavior.user_id == user_id)
+                )).all()
+                session.expunge_all()
+                orm_ms = min(orm_ms, time.perf_counter() - start)
+            await session.rollback()
+        return {
+            "rows" : len(rows),
+            "columnar_ms" : round(columnar_ms * 1000, 2),
+            "orm_objects_ms" : round(orm_ms * 1000, 2),
+        }
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(User).where(User.user_id == user_id))
+            await session.commit()
+        await dispose_engine()
+
+def main(args : argparse.Namespace) -> dict:
+    today = datetime.datetime.now(datetime.UTC).date()
+    expenses = make_expenses(args.expenses, args.history_days, args.names, today)
+    series = to_series(expenses)
+
+    numpy_ms, response = best_ms(lambda : compute_expense_analytics(series, today, args.days), args.repeats)
+    python_ms, reference = best_ms(lambda : python_analytics(expenses, today, args.days), args.repeats)
+    report = {
+        "expenses" : args.expenses,
+        "days" : args.days,
+        "compute" : {
+            "numpy_ms" : numpy_ms,
+            "python_ms" : python_ms,
+            "speedup" : round(python_ms / numpy_ms, 1) if numpy_ms else None,
+            "same_result" : same(comparable(response), reference),
+            "anomalies" : len(response.anomalies), # type: ignore
+        },
+    }
+    if args.db:
+        report["fetch"] = asyncio.run(measure_fetch(expenses, args.repeats))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--history-days", type=int, default=3 * 365)
+    parser.add_argument("--names", type=int, default=60, help="distinct expense names")
+    parser.add_argument("--days", type=int, default=90, help="?days= of the request")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--db", action="store_true", help="also time the fetch against postgres")
+    args = parser.parse_args()
+    print(json.dumps(main(args), indent=2, default=str))
@@ -0,0 +1,232 @@
+"""
+GET /api/v1/export streams in constant memory.
+
+Exports a --rows behavior history (categories round robin with their detail
+rows, plus --tasks tasks) in every format through the ASGI app, reading the
+body chunk by chunk like a client would and sampling the process RSS on each
+chunk. Fails when the RSS grows by more than --max-growth-mb over what it was
+before the export started, or when fewer rows than seeded come back.
+
+db        : default, seeds a throwaway user in a local Postgres migrated to
+            head (same settings as the api) and calls the real endpoint; the
+            user is deleted afterwards
+synthetic : --synthetic, no database: the same StreamingResponse and
+            encoders fed with generated rows, checks the encoding side only
+
+usage: cd backend/src && python -m benchmarks.export_memory --rows 1000000
+       python -m benchmarks.export_memory --synthetic --rows 1000000
+exit code 1 when a bound is exceeded
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+
+from fastapi.responses import StreamingResponse
+
+from app.core.enums import EXPORT_FETCH_SIZE, BehaviorCategory, BehaviorSource, ExportFormat
+from app.export.service import BEHAVIOR_COLUMNS, DETAIL_FIELDS, EXPORT_ENCODERS, TASK_COLUMNS
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+SEED_USERNAME = "export-seed"
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+class BodyReader:
+    """
+    ASGI receive/send pair that counts the body and samples RSS per chunk
+    """
+    def __init__(self):
+        self.status = None
+        self.bytes = 0
+        self.lines = 0
+        self.peak_rss = rss_bytes()
+        self.done = asyncio.Event()
+        self.requested = False
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {"type" : "http.request", "body" : b"", "more_body" : False}
+        await self.done.wait()
+        return {"type" : "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            self.bytes += len(body)
+            self.lines += body.count(b"\n")
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+            if not message.get("more_body", False):
+                self.done.set()
+
+def http_scope(path : str, query : str) -> dict:
+    return {
+        "type" : "http",
+        "asgi" : {"version" : "3.0", "spec_version" : "2.4"},
+        "http_version" : "1.1",
+        "method" : "GET",
+        "scheme" : "http",
+        "path" : path,
+        "raw_path" : path.encode(),
+        "root_path" : "",
+        "query_string" : query.encode(),
+        "headers" : [(b"host", b"bench")],
+        "client" : ("127.0.0.1", 50000),
+        "server" : ("bench", 80),
+    }
+
+async def run_export(app, export_format : ExportFormat) -> dict:
+    reader = BodyReader()
+    baseline = rss_bytes()
+    start = time.perf_counter()
+    await app(http_scope("/api/v1/export", f"format={export_format.value}"), reader.receive, reader.send)
+    elapsed = time.perf_counter() - start
+    return {
+        "format" : export_format.value,
+        "status" : reader.status,
+        # data lines; the csv header line is not a row
+        "rows" : reader.lines - (1 if export_format == ExportFormat.CSV else 0),
+        "mb" : round(reader.bytes / 2**20, 1),
+        "seconds" : round(elapsed, 2),
+        "rows_per_second" : round(reader.lines / elapsed) if elapsed else None,
+        "rss_before_mb" : round(baseline / 2**20, 1),
+        "rss_peak_mb" : round(reader.peak_rss / 2**20, 1),
+        "rss_growth_mb" : round((reader.peak_rss - baseline) / 2**20, 1),
+    }
+
+# < ------------- Synthetic rows --------------->
+TaskRow = namedtuple("TaskRow", [column.key for column in TASK_COLUMNS])
+BehaviorRow = namedtuple(
+    "BehaviorRow",
+    [column.key for column in BEHAVIOR_COLUMNS] + [name for names in DETAIL_FIELDS.values() for name in names],
+)
+DETAIL_VALUES = {
+    BehaviorCategory.DIET : {"diet_name" : "oats", "calories" : 350},
+    BehaviorCategory.EXPENSE : {"expense_name" : "coffee", "amount" : Decimal("3.50")},
+    BehaviorCategory.WORKOUT : {"workout_name" : "run"},
+    BehaviorCategory.TECHWORK : {"techwork_name" : "code review"},
+}
+CATEGORIES = [None, *DETAIL_VALUES]
+
+async def synthetic_partitions(rows : int, tasks : int):
+    now = datetime.datetime.now(datetime.UTC)
+    empty = dict.fromkeys(BehaviorRow._fields)
+    for start in range(0, tasks, EXPORT_FETCH_SIZE):
+        yield "task", [
+            TaskRow(uuid.uuid4(), f"task {n}", None, "PENDING", None, None, now, None, now, now)
+            for n in range(start, min(start + EXPORT_FETCH_SIZE, tasks))
+        ]
+    for start in range(0, rows, EXPORT_FETCH_SIZE):
+        partition = []
+        for n in range(start, min(start + EXPORT_FETCH_SIZE, rows)):
+            category = CATEGORIES[n % len(CATEGORIES)]
+            partition.append(BehaviorRow(**empty | {
+                "behavior_id" : uuid.uuid4(),
+                "behavior_name" : f"behavior {n}",
+                "category" : category,
+                "occured_at" : now - datetime.timedelta(minutes=n),
+                "source" : BehaviorSource.USER_LOGGED,
+                "created_at" : now,
+                "last_edited" : now,
+            } | DETAIL_VALUES.get(category, {}))) # type: ignore
+        yield "behavior", partition
+
+def synthetic_app(rows : int, tasks : int):
+    async def app(scope, receive, send):
+        export_format = ExportFormat(scope["query_string"].decode().split("=", 1)[1])
+        media_type, encode = EXPORT_ENCODERS[export_format]
+        response = StreamingResponse(encode(synthetic_partitions(rows, tasks)), media_type=media_type)
+        await response(scope, receive, send)
+    return app
+
+# < ------------- Postgres --------------->
+async def seed(rows : int, tasks : int) -> uuid.UUID:
+    from sqlalchemy import text
+    from app.db.config import get_engine
+
+    async with get_engine().begin() as conn:
+        user_id = (await conn.execute(
+            text("INSERT INTO users (user_id, username) VALUES (gen_random_uuid(), :name) RETURNING user_id"),
+            {"name" : SEED_USERNAME},
+        )).scalar_one()
+        await conn.execute(text("""
+            INSERT INTO tasks (task_id, user_id, task_name, due_at)
+            SELECT gen_random_uuid(), :user_id, 'task ' || n, now() - n * interval '1 hour'
+            FROM generate_series(1, :tasks) AS n
+        """), {"user_id" : user_id, "tasks" : tasks})
+        await conn.execute(text("""
+            INSERT INTO behaviors (behavior_id, user_id, behavior_name, category, occured_at, source)
+            SELECT
+                gen_random_uuid(), :user_id, 'behavior ' || n,
+                ((ARRAY['DIET', 'EXPENSE', 'WORKOUT', 'TECHWORK'])[1 + n % 5])::behavior_category,
+                now() - n * interval '1 minute', 'USER_LOGGED'
+            FROM generate_series(1, :rows) AS n
+        """), {"user_id" : user_id, "rows" : rows})
+        for category, table, columns, values in (
+            ("DIET", "diets", "diet_name, calories", "'oats', 350"),
+            ("EXPENSE", "expenses", "expense_name, amount", "'coffee', 3.50"),
+            ("WORKOUT", "workouts", "workout_name", "'run'"),
+            ("TECHWORK", "techworks", "techwork_name", "'code review'"),
+        ):
+            await conn.execute(text(f"""
+                INSERT INTO {table} (behavior_id, {columns})
+                SELECT behavior_id, {values} FROM behaviors
+                WHERE user_id = :user_id AND category = '{category}'
+            """), {"user_id" : user_id})
+    return user_id
+
+async def cleanup() -> None:
+    from sqlalchemy import text
+    from app.db.config import dispose_engine, get_engine
+
+    async with get_engine().begin() as conn:
+        await conn.execute(text("DELETE FROM users WHERE username = :name"), {"name" : SEED_USERNAME})
+    await dispose_engine()
+
+async def main(args : argparse.Namespace) -> list[dict]:
+    if args.synthetic:
+        app = synthetic_app(args.rows, args.tasks)
+        return [await run_export(app, export_format) for export_format in ExportFormat]
+
+    from app.auth.dependencies import get_current_user
+    from app.main import create_app
+
+    try:
+        user_id = await seed(args.rows, args.tasks)
+        app = create_app()
+        app.dependency_overrides[get_current_user] = lambda : str(user_id)
+        return [await run_export(app, export_format) for export_format in ExportFormat]
+    finally:
+        await cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="behaviors")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--max-growth-mb", type=float, default=64.0)
+    parser.add_argument("--synthetic", action="store_true", help="no database, encoders only")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    failed = False
+    for result in results:
+        result["ok"] = (
+            result["status"] == 200
+            and result["rows"] == args.rows + args.tasks
+            and result["rss_growth_mb"] <= args.max_growth_mb
+        )
+        failed = failed or not result["ok"]
+    print(json.dumps({"rows" : args.rows, "tasks" : args.tasks, "max_growth_mb" : args.max_growth_mb,
+                      "results" : results}, indent=2))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,73 @@
+"""
+Event loop responsiveness while argon2 hashing is running.
+
+Fires `--hashes` concurrent password hashes and, at the same time, a stream of
+cheap "unrelated requests" (a tiny coroutine that awaits once), then reports
+the scheduling delay percentiles of the unrelated requests with the hashes run inline
+and with the hashes run through the bounded worker pool.
+
+usage: cd backend/src && python -m benchmarks.hash_pool --hashes 32
+"""
+import argparse
+import asyncio
+import time
+
+from app.auth.security import (
+    hash_password,
+    hash_password_async,
+    init_hash_executor,
+    shutdown_hash_executor,
+)
+
+
+async def inline_hash(password : str) -> str:
+    return hash_password(password)
+
+async def unrelated_requests(stop : asyncio.Event, interval : float) -> list[float]:
+    # delay = how much later than asked the loop got back to us
+    delays = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append((time.perf_counter() - start - interval) * 1000)
+    return delays
+
+def percentile(values : list[float], pct : float) -> float:
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def run(hashes : int, use_pool : bool, interval : float) -> dict:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(unrelated_requests(stop, interval))
+    # let the probe start before the burst
+    await asyncio.sleep(interval)
+    
+    hasher = hash_password_async if use_pool else inline_hash
+    start = time.perf_counter()
+    await asyncio.gather(*(hasher(f"password-{i}") for i in range(hashes)))
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    latencies = sorted(await probe)
+    return {
+        "mode" : "pool" if use_pool else "inline",
+        "hash_wall_s" : round(elapsed, 3),
+        "requests_served" : len(latencies),
+        "p50_delay_ms" : round(percentile(latencies, 0.50), 3),
+        "p99_delay_ms" : round(percentile(latencies, 0.99), 3),
+        "max_delay_ms" : round(latencies[-1], 3),
+    }
+
+async def main(hashes : int, interval : float) -> None:
+    init_hash_executor()
+    try:
+        for use_pool in (False, True):
+            print(await run(hashes, use_pool, interval))
+    finally:
+        shutdown_hash_executor()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hashes", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=0.001)
+    args = parser.parse_args()
+    asyncio.run(main(args.hashes, args.interval))
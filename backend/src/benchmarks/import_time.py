@@ -0,0 +1,107 @@
+"""
+Import time budget for the app entry points.
+
+Every module is imported in a fresh interpreter with `python -X importtime`,
+its cumulative import time is checked against a fixed budget (best of
+--runs). The import runs with SECRETS_DIR pointing at an empty directory
+and no secret env vars, and must not build the settings or the engine:
+importing the app, alembic's models, a worker or a CLI needs no secrets
+and does no I/O beyond loading code.
+
+Budgets were set at ~2x the times of a single-core dev box; use --scale on
+slower machines instead of editing them.
+
+usage: cd backend/src && python -m benchmarks.import_time
+       python -m benchmarks.import_time --runs 5 --scale 1.5
+exit code 1 when a module is over budget or its import loads the settings
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# module -> budget, ms
+BUDGETS_MS = {
+    "app.core.setting" : 50,
+    "app.email.worker" : 600,
+    "app.auth.retention" : 1200,
+    "app.main" : 1200,
+}
+
+SECRET_NAMES = (
+    "POSTGRES_DB",
+    "POSTGRES_PASSWORD",
+    "POSTGRES_USER",
+    "REDIS_PASSWORD",
+    "JWT_SECRET_KEY",
+    "SENDGRID_API_KEY",
+    "SENDGRID_SENDER_EMAIL",
+    "OTP_HMAC_KEY",
+)
+
+# after the import: neither the settings nor the engine may exist yet
+CHECK = """
+import {module}
+from app.core.setting import get_settings
+from app.db.config import get_engine
+assert not get_settings.cache_info().currsize, "settings loaded at import"
+assert not get_engine.cache_info().currsize, "engine built at import"
+"""
+
+def clean_env(secrets_dir : str) -> dict:
+    env = {
+        key : value
+        for key, value in os.environ.items()
+        if key.removesuffix("_FILE") not in SECRET_NAMES
+    }
+    env["SECRETS_DIR"] = secrets_dir
+    return env
+
+def import_ms(module : str, env : dict) -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHECK.format(module=module)],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    # "import time: self [us] | cumulative | module", top level imports unindented
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if name == module and not line.rsplit("|", 1)[1].startswith("  "):
+            return int(cumulative) / 1000
+    raise RuntimeError(f"{module} not in -X importtime output")
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    args = parser.parse_args()
+
+    report = {}
+    failed = False
+    with tempfile.TemporaryDirectory() as secrets_dir:
+        env = clean_env(secrets_dir)
+        for module, budget in BUDGETS_MS.items():
+            budget = budget * args.scale
+            try:
+                best = min(import_ms(module, env) for _ in range(args.runs))
+            except RuntimeError as e:
+                report[module] = {"error" : str(e)}
+                failed = True
+                continue
+            report[module] = {
+                "import_ms" : round(best, 1),
+                "budget_ms" : budget,
+                "ok" : best <= budget,
+            }
+            failed = failed or best > budget
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Request throughput with logging off, with the old synchronous StreamHandler
+and with the queue + json pipeline from app.core.logging.
+
+Requests go through the full middleware stack in process (httpx
+ASGITransport, no lifespan) against GET /. Log output goes to --output
+(default /dev/null) so the terminal isn't the bottleneck. --sink-delay-ms
+adds a sleep to every write, standing in for a stdout pipe that a log
+shipper drains slowly.
+
+With a fast sink on one core the listener thread competes with the loop
+for the GIL, so the queue is not faster there; it pays off once writes
+block, which the sync handler turns into request latency.
+
+usage: cd backend/src && python -m benchmarks.logging_throughput --requests 5000
+       python -m benchmarks.logging_throughput --sink-delay-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+import httpx
+
+from app.core.logging import RequestIdFilter, TextFormatter, setup_logging, stop_logging
+from app.core.setting import LoggingConfig
+from app.main import app
+
+
+class SlowSink:
+    def __init__(self, stream, delay_ms : float):
+        self.stream = stream
+        self.delay = delay_ms / 1000
+
+    def write(self, data : str) -> int:
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+def use_sync_handler() -> None:
+    # the setup before the queue pipeline: format and write on the loop thread
+    stop_logging()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(TextFormatter())
+    handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel("INFO")
+
+MODES = {
+    "off" : lambda: setup_logging("WARNING", LoggingConfig(format="json")),
+    "sync text" : use_sync_handler,
+    "queue text" : lambda: setup_logging("INFO", LoggingConfig(format="text")),
+    "queue json" : lambda: setup_logging("INFO", LoggingConfig(format="json")),
+    "queue json, http.request sampled 10%" : lambda: setup_logging(
+        "INFO", LoggingConfig(format="json", sample_rates={"http.request" : 0.1}),
+    ),
+}
+
+async def run(requests : int, concurrency : int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return round(requests / (time.perf_counter() - start), 1)
+
+def main(requests : int, concurrency : int, output : str, sink_delay_ms : float) -> None:
+    results = {}
+    real_stdout = sys.stdout
+    with open(output, "w") as sink:
+        sys.stdout = SlowSink(sink, sink_delay_ms) if sink_delay_ms else sink
+        try:
+            for mode, configure in MODES.items():
+                configure()
+                results[mode] = asyncio.run(run(requests, concurrency))
+            stop_logging()
+        finally:
+            sys.stdout = real_stdout
+    for mode, rps in results.items():
+        print(f"{mode:<40} {rps} req/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", default="/dev/null")
+    parser.add_argument("--sink-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.output, args.sink_delay_ms)
@@ -0,0 +1,121 @@
+"""
+Requests per second through the old decorator middleware
+(app.middleware("http"), i.e. BaseHTTPMiddleware) and the pure ASGI
+RequestContextMiddleware, on GET / and on a route behind get_current_user.
+
+Both apps are create_app() with only the request middleware swapped; the
+"before" middleware is the previous logging_middleware, kept here for the
+comparison. Requests run in process over httpx ASGITransport (no lifespan,
+no network). Logging is set to WARNING so the request log line itself isn't
+what's being measured.
+
+usage: cd backend/src && python -m benchmarks.middleware_throughput --requests 5000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+
+from app.auth.dependencies import get_current_user
+from app.auth.security import generate_access_token
+from app.core.log_context import request_id_ctx
+from app.core.logging import setup_logging, stop_logging
+from app.core.metrics import HTTP_REQUESTS_IN_FLIGHT, observe_request
+from app.main import create_app
+
+logger = logging.getLogger("http.request")
+
+async def legacy_logging_middleware(request : Request, call_next):
+    start_time = time.monotonic()
+    
+    req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+    request.state.request_id = req_id
+    token = request_id_ctx.set(req_id)
+    response = None
+    in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(request.method)
+    in_flight.inc()
+    
+    try:
+        response = await call_next(request)
+        return response
+    except Exception:
+        logger.exception("Unhandled exception")
+        raise
+    finally:
+        duration = time.monotonic() - start_time 
+        status_code = response.status_code if response is not None else 500
+        in_flight.dec()
+        route = request.scope.get("route")
+        observe_request(
+            request.method,
+            route.path if route is not None else "unmatched",
+            status_code,
+            duration,
+        )
+        logger.info(
+            "%s %s",
+            request.method,
+            request.url.path,
+            extra={
+                "status_code" : status_code,
+                "duration_ms" : round(duration*1000, 2),
+            }
+        )
+        request_id_ctx.reset(token)
+
+def build_app(legacy : bool) -> FastAPI:
+    app = create_app()
+    if legacy:
+        # the middleware stack is built on the first request, swapping is safe here
+        app.user_middleware.clear()
+        app.middleware("http")(legacy_logging_middleware)
+
+    @app.get('/')
+    def home():
+        return {'msg' : 'Hi'}
+
+    @app.get('/bench/protected', dependencies=[Depends(get_current_user)])
+    async def protected():
+        return {'msg' : 'ok'}
+
+    return app
+
+async def run(app : FastAPI, path : str, headers : dict, requests : int, concurrency : int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return round(requests / (time.perf_counter() - start), 1)
+
+def main(requests : int, concurrency : int) -> None:
+    setup_logging("WARNING")
+    token = generate_access_token(str(uuid.uuid4()), "bench-session")
+    routes = {
+        "/" : {},
+        "/bench/protected" : {"Authorization" : f"Bearer {token}"},
+    }
+    try:
+        for path, headers in routes.items():
+            for label, legacy in (("before (BaseHTTPMiddleware)", True), ("after (pure ASGI)", False)):
+                rps = asyncio.run(run(build_app(legacy), path, headers, requests, concurrency))
+                print(f"{path:<20} {label:<30} {rps} req/s")
+    finally:
+        stop_logging()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency)
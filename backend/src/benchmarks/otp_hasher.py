@@ -0,0 +1,64 @@
+"""
+OTP hashing throughput per scheme.
+
+Simulates the hashing work of the OTP endpoints: every signin/signup/resend
+hashes one OTP and every /email/verify verifies one. Runs `--requests` of each
+at `--concurrency` through the same code path the handlers use and reports
+operations per second for every scheme.
+
+usage: cd backend/src && python -m benchmarks.otp_hasher --requests 200
+"""
+import argparse
+import asyncio
+import time
+
+from app.auth.security import (
+    generate_numeric_otp,
+    get_otp_hasher,
+    init_hash_executor,
+    shutdown_hash_executor,
+)
+
+
+async def run_scheme(scheme : str, requests : int, concurrency : int) -> dict:
+    hasher = get_otp_hasher(scheme)
+    limit = asyncio.Semaphore(concurrency)
+    otps = [str(generate_numeric_otp()) for _ in range(requests)]
+    
+    async def issue(otp : str) -> str:
+        async with limit:
+            return await hasher.hash(otp)
+    
+    async def verify(otp : str, otp_hash : str) -> bool:
+        async with limit:
+            return await hasher.verify(otp, otp_hash)
+    
+    start = time.perf_counter()
+    hashes = await asyncio.gather(*(issue(otp) for otp in otps))
+    issue_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify(otp, h) for otp, h in zip(otps, hashes)))
+    verify_s = time.perf_counter() - start
+    assert all(results)
+    
+    return {
+        "scheme" : scheme,
+        "issue_per_s" : round(requests / issue_s, 1),
+        "verify_per_s" : round(requests / verify_s, 1),
+    }
+
+async def main(requests : int, concurrency : int) -> None:
+    init_hash_executor()
+    try:
+        for scheme in ("argon2", "hmac"):
+            print(await run_scheme(scheme, requests, concurrency))
+    finally:
+        shutdown_hash_executor()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
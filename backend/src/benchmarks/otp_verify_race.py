@@ -0,0 +1,159 @@
+"""
+Concurrent OTP verifies against one signin record: the attempt limit holds
+and the OTP is consumed once.
+
+Every round seeds a record like store_data_in_redis_signin does and fires
+its verifies at once (asyncio.gather) through
+fetch_and_verify_pending_user_from_redis, counting the verify_otp script
+replies. Per otp scheme:
+- exhaust : --concurrency wrong codes; at most MAX_OTP_ATTEMPTS are judged
+            (MISMATCH/CHECK), exactly one gets TOO_MANY and the record is
+            gone afterwards
+- consume : right codes mixed with wrong ones, MAX_OTP_ATTEMPTS judged in
+            total at most; exactly one verify succeeds and the record is gone
+            hmac compares inside the script, so --concurrency right codes
+            race next to MAX_OTP_ATTEMPTS - 1 wrong ones. argon2 is verified
+            after the script (CHECK) and every right code spends an attempt
+            until one DELETE wins, so there min(--concurrency,
+            MAX_OTP_ATTEMPTS) right codes fill the attempts up.
+
+redis : default, fakeredis with lua scripting (pip install "fakeredis[lua]"),
+        no server needed
+        --redis, the compose Redis (same settings as the api)
+
+usage: cd backend/src && python -m benchmarks.otp_verify_race --concurrency 20 --rounds 50
+       python -m benchmarks.otp_verify_race --redis
+exit code 1 when any round breaks one of the above
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import Counter
+
+from app.auth import utils
+from app.auth.schemas import RedisSignInData
+from app.auth.security import generate_refresh_token, get_otp_hasher
+from app.core.enums import MAX_OTP_ATTEMPTS
+from app.core.exceptions import ClientError
+from app.core.setting import settings
+
+OTP = "123456"
+WRONG_OTP = "654321"
+# script replies that spent an attempt on judging the code
+JUDGED = {"MISMATCH", "OK", "CHECK"}
+
+class ScriptReplies:
+    """
+    wraps run_redis_script in app.auth.utils and counts verify_otp replies
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self.run = utils.run_redis_script
+
+    async def __call__(self, redis_client, name, keys, args):
+        result = await self.run(redis_client=redis_client, name=name, keys=keys, args=args)
+        if name == "verify_otp":
+            self.counts[result[0]] += 1
+        return result
+
+async def seed(redis_client, scheme : str) -> str:
+    verification_id = "auth:otp:signin:" + generate_refresh_token()
+    otp_hasher = get_otp_hasher(scheme)
+    data = RedisSignInData(
+        signin_verification_id=verification_id,
+        user_id="otp-race",
+        email="otp-race@example.com",
+        otp_hash=await otp_hasher.hash(OTP),
+        otp_scheme=otp_hasher.scheme,
+        attempts=0,
+    )
+    return await utils.set_hash_with_verification_id(redis_client, verification_id, data.model_dump())
+
+async def verify(redis_client, verification_id : str, otp : str) -> str:
+    try:
+        await utils.fetch_and_verify_pending_user_from_redis(redis_client, verification_id, otp)
+    except ClientError as e:
+        return e.code
+    return "ok"
+
+async def race(redis_client, replies : ScriptReplies, scheme : str, otps : list[str]) -> tuple[Counter, Counter, bool]:
+    verification_id = await seed(redis_client, scheme)
+    random.shuffle(otps)
+    replies.counts = Counter()
+    outcomes = Counter(await asyncio.gather(*(verify(redis_client, verification_id, otp) for otp in otps)))
+    left = bool(await redis_client.exists(verification_id))
+    return outcomes, replies.counts, left
+
+async def race_round(redis_client, replies : ScriptReplies, scheme : str, concurrency : int) -> dict:
+    failures = []
+
+    outcomes, counts, left = await race(redis_client, replies, scheme, [WRONG_OTP] * concurrency)
+    judged = sum(counts[status] for status in JUDGED)
+    if judged > MAX_OTP_ATTEMPTS:
+        failures.append(f"exhaust: {judged} attempts judged")
+    if counts["TOO_MANY"] != 1:
+        failures.append(f"exhaust: {counts['TOO_MANY']} TOO_MANY replies")
+    if outcomes["ok"]:
+        failures.append("exhaust: a wrong code was accepted")
+    if left:
+        failures.append("exhaust: record left after TOO_MANY")
+    exhaust = {"outcomes" : dict(outcomes), "script" : dict(counts)}
+
+    rights = concurrency if scheme == "hmac" else min(concurrency, MAX_OTP_ATTEMPTS)
+    wrongs = MAX_OTP_ATTEMPTS - 1 if scheme == "hmac" else MAX_OTP_ATTEMPTS - rights
+    outcomes, counts, left = await race(redis_client, replies, scheme, [OTP] * rights + [WRONG_OTP] * wrongs)
+    judged = sum(counts[status] for status in JUDGED)
+    if judged > MAX_OTP_ATTEMPTS:
+        failures.append(f"consume: {judged} attempts judged")
+    if outcomes["ok"] != 1:
+        failures.append(f"consume: {outcomes['ok']} verifies succeeded")
+    if left:
+        failures.append("consume: record left after a successful verify")
+    consume = {"outcomes" : dict(outcomes), "script" : dict(counts)}
+
+    return {"exhaust" : exhaust, "consume" : consume, "failures" : failures}
+
+async def run(redis_client, concurrency : int, rounds : int) -> dict:
+    replies = ScriptReplies()
+    utils.run_redis_script = replies
+    report = {}
+    try:
+        for scheme in ("hmac", "argon2"):
+            settings.otp_hash_scheme = scheme
+            results = [await race_round(redis_client, replies, scheme, concurrency) for _ in range(rounds)]
+            report[scheme] = {
+                "last_round" : results[-1],
+                "failed_rounds" : [result for result in results if result["failures"]],
+            }
+    finally:
+        utils.run_redis_script = replies.run
+        await redis_client.aclose()
+    return report
+
+def make_client(real_redis : bool):
+    if real_redis:
+        from app.db.redis.config import create_redis
+        return create_redis()
+    import fakeredis
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20, help="verifies fired at once per race")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--redis", action="store_true", help="the compose redis instead of fakeredis")
+    args = parser.parse_args()
+    if args.concurrency <= MAX_OTP_ATTEMPTS:
+        parser.error(f"--concurrency must exceed MAX_OTP_ATTEMPTS ({MAX_OTP_ATTEMPTS})")
+
+    report = asyncio.run(run(make_client(args.redis), args.concurrency, args.rounds))
+    failed = any(scheme["failed_rounds"] for scheme in report.values())
+    print(json.dumps({
+        "concurrency" : args.concurrency,
+        "rounds" : args.rounds,
+        "max_attempts" : MAX_OTP_ATTEMPTS,
+        **report,
+    }, indent=2))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,198 @@
+"""
+Query plan regression check for app.auth.service (and the retention purge).
+
+Needs a local Postgres migrated to head (same settings as the api). Seeds
+`--users` users with an email identity and a mix of active, rotated, revoked
+and expired refresh tokens, runs every service query once while recording
+the SQL it sends, then EXPLAINs each statement with enable_seqscan=off.
+With seq scans disabled the planner still picks one only when no index can
+serve the query, so any "Seq Scan" node is reported and the exit code is 1.
+
+Seeded rows are deleted afterwards (usernames start with the seed prefix).
+
+usage: cd backend/src && python -m benchmarks.query_plans --users 5000
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import sys
+import uuid
+
+from sqlalchemy import event, text
+
+from app.auth.retention import purge_refresh_token_batch
+from app.auth.security import hash_refresh_token
+from app.auth.service import (
+    create_user_with_email_identity,
+    get_refresh_token_data_by_hashed_token,
+    get_user_by_email,
+    revoke_all_auth_session,
+    revoke_auth_session_by_hashed_token,
+    revoke_auth_session_by_token_object,
+    rotate_and_insert_new_refresh_token,
+    rotate_refresh_token_atomic,
+    update_password_hash,
+)
+from app.db.config import async_session, dispose_engine, get_engine
+
+SEED_PREFIX = "plan-seed-"
+DML = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+SEED_SQL = [
+    """
+    INSERT INTO users (user_id, username)
+    SELECT gen_random_uuid(), :prefix || i FROM generate_series(1, :users) AS i
+    """,
+    """
+    INSERT INTO auth_identity (auth_id, user_id, provider, email, password_hash, is_verified)
+    SELECT gen_random_uuid(), user_id, 'EMAIL', username || '@example.com', 'x', true
+    FROM users WHERE username LIKE :prefix || '%'
+    """,
+    # per user: 2 active, 4 rotated, 1 revoked, 1 expired
+    """
+    INSERT INTO refresh_tokens (
+        token_id, user_id, hashed_refresh_token, session_id,
+        expires_at, rotated_at, revoked_at
+    )
+    SELECT
+        gen_random_uuid(), u.user_id, md5(u.username || ':' || n), 'seed-' || (n % 3),
+        CASE WHEN n = 8 THEN now() - interval '1 day' ELSE now() + interval '7 days' END,
+        CASE WHEN n BETWEEN 3 AND 6 THEN now() - interval '2 days' END,
+        CASE WHEN n = 7 THEN now() - interval '1 hour' END
+    FROM users AS u, generate_series(1, 8) AS n
+    WHERE u.username LIKE :prefix || '%'
+    """,
+]
+
+class StatementRecorder:
+    """
+    collects (statement, parameters) of everything sent while recording
+    """
+    def __init__(self):
+        self.label = None
+        self.statements : list[tuple[str, str, tuple]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is None or executemany:
+            return
+        if statement.lstrip().upper().startswith(DML):
+            self.statements.append((self.label, statement, parameters))
+
+def seq_scans(plan : dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+def seeded_hash(username : str, n : int) -> str:
+    # seeded token hashes are md5(username:n), see SEED_SQL
+    return hashlib.md5(f"{username}:{n}".encode()).hexdigest()
+
+async def seed(users : int) -> None:
+    async with get_engine().begin() as conn:
+        for sql in SEED_SQL:
+            await conn.execute(text(sql), {"prefix" : SEED_PREFIX, "users" : users})
+        await conn.execute(text("ANALYZE users"))
+        await conn.execute(text("ANALYZE auth_identity"))
+        await conn.execute(text("ANALYZE refresh_tokens"))
+
+async def cleanup() -> None:
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE username LIKE :prefix || '%'"),
+            {"prefix" : SEED_PREFIX},
+        )
+
+async def exercise(recorder : StatementRecorder) -> None:
+    """
+    call each service query once against seeded rows
+    """
+    seeded = f"{SEED_PREFIX}1"
+    async with async_session() as session:
+        recorder.label = "get_user_by_email"
+        identity = await get_user_by_email(session, f" {seeded.upper()}@Example.com ")
+        assert identity is not None, "seeded identity not found, case normalization broken?"
+
+        recorder.label = "update_password_hash"
+        await update_password_hash(session, identity, "y")
+
+        recorder.label = "get_refresh_token_data_by_hashed_token"
+        active = await get_refresh_token_data_by_hashed_token(session, seeded_hash(seeded, 1))
+        assert active is not None
+
+        recorder.label = "rotate_refresh_token_atomic"
+        new_hash = hash_refresh_token(str(uuid.uuid4()))
+        rotated = await rotate_refresh_token_atomic(session, active.hashed_refresh_token, new_hash)
+        assert rotated is not None
+
+        recorder.label = "rotate_and_insert_new_refresh_token"
+        latest = await rotate_and_insert_new_refresh_token(
+            session, rotated.user_id, rotated.session_id,
+            hash_refresh_token(str(uuid.uuid4())), "plans", db_refresh_token=rotated,
+        )
+        assert latest is not None
+
+        recorder.label = "revoke_auth_session_by_token_object"
+        await revoke_auth_session_by_token_object(session, latest)
+
+        recorder.label = "revoke_auth_session_by_hashed_token"
+        await revoke_auth_session_by_hashed_token(session, seeded_hash(seeded, 2))
+
+        recorder.label = "revoke_all_auth_session"
+        await revoke_all_auth_session(session, identity.user_id)
+
+        recorder.label = "create_user_with_email_identity"
+        await create_user_with_email_identity(
+            session, f"{SEED_PREFIX}new-{uuid.uuid4()}", f"{uuid.uuid4()}@example.com", "x",
+        )
+
+        recorder.label = "purge_refresh_token_batch"
+        await purge_refresh_token_batch(session, 100, datetime.timedelta(days=1))
+    recorder.label = None
+
+async def explain(statements : list[tuple[str, str, tuple]]) -> list[dict]:
+    results = []
+    async with get_engine().connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for label, statement, parameters in statements:
+            # EXPLAIN without ANALYZE plans the statement, nothing is written
+            rows = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = rows.scalar_one()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            results.append({
+                "query" : label,
+                "statement" : " ".join(statement.split())[:120],
+                "seq_scans" : seq_scans(plan[0]["Plan"]),
+            })
+        await conn.rollback()
+    return results
+
+async def main(users : int) -> int:
+    recorder = StatementRecorder()
+    event.listen(get_engine().sync_engine, "before_cursor_execute", recorder)
+    try:
+        await seed(users)
+        await exercise(recorder)
+        results = await explain(recorder.statements)
+    finally:
+        event.remove(get_engine().sync_engine, "before_cursor_execute", recorder)
+        await cleanup()
+        await dispose_engine()
+
+    failed = [result for result in results if result["seq_scans"]]
+    for result in results:
+        status = "SEQ SCAN " + ",".join(result["seq_scans"]) if result["seq_scans"] else "ok"
+        print(f"{result['query']:<40} {status:<30} {result['statement']}")
+    covered = {result["query"] for result in results}
+    print(f"\n{len(results)} statements from {len(covered)} queries, {len(failed)} with seq scans")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.users)))
@@ -0,0 +1,140 @@
+"""
+Concurrent /refresh of one token: exactly one rotation wins, the losers
+don't trip reuse detection.
+
+Needs a local Postgres migrated to head (same settings as the api), no
+redis. Per round a throwaway user gets a fresh refresh token, then:
+- atomic : --concurrency sessions call rotate_refresh_token_atomic with the
+           same old hash at once (asyncio.gather); exactly one returns a row
+- refresh: the same race through rotate_and_issue_tokens; one succeeds, the
+           others get REFRESH_TOKEN_ALREADY_ROTATED (409) and the winner's
+           new token is still active
+- reuse  : the old token's rotated_at is moved back past
+           refresh_rotation_grace_seconds and it is replayed; that is
+           REFRESH_TOKEN_REUSE_DETECTED and the winner's token is revoked
+The user is deleted afterwards.
+
+usage: cd backend/src && python -m benchmarks.refresh_rotation_race --concurrency 10 --rounds 20
+exit code 1 when any round breaks one of the above
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+from sqlalchemy import delete, text
+
+from app.auth.models import User
+from app.auth.security import generate_refresh_token, hash_refresh_token
+from app.auth.service import get_refresh_token_data_by_hashed_token, rotate_refresh_token_atomic
+from app.auth.utils import rotate_and_issue_tokens, set_new_refresh_token_with_rotation
+from app.core.exceptions import DomainError
+from app.core.setting import settings
+from app.db.config import async_session, dispose_engine
+
+SEED_PREFIX = "rotation-race-"
+
+async def issue_token(user_id : uuid.UUID) -> str:
+    async with async_session() as session:
+        token, _ = await set_new_refresh_token_with_rotation(session, user_id, "race", rotate=False)
+    return token
+
+async def rotate_atomic(old_hash : str):
+    async with async_session() as session:
+        return await rotate_refresh_token_atomic(session, old_hash, hash_refresh_token(generate_refresh_token()))
+
+async def refresh(token : str) -> str:
+    async with async_session() as session:
+        new_token, _ = await rotate_and_issue_tokens(session, token)
+    return new_token
+
+def error_code(result) -> str:
+    if isinstance(result, DomainError):
+        return result.code
+    if isinstance(result, BaseException):
+        return type(result).__name__
+    return "ok"
+
+async def is_active(token : str) -> bool:
+    async with async_session() as session:
+        row = await get_refresh_token_data_by_hashed_token(session, hash_refresh_token(token))
+    return bool(row and row.revoked_at is None and row.rotated_at is None)
+
+async def race_round(user_id : uuid.UUID, concurrency : int) -> dict:
+    failures = []
+
+    token = await issue_token(user_id)
+    rotated = await asyncio.gather(*(rotate_atomic(hash_refresh_token(token)) for _ in range(concurrency)))
+    atomic_winners = sum(row is not None for row in rotated)
+    if atomic_winners != 1:
+        failures.append(f"atomic: {atomic_winners} rotations won")
+
+    token = await issue_token(user_id)
+    results = await asyncio.gather(*(refresh(token) for _ in range(concurrency)), return_exceptions=True)
+    codes = [error_code(result) for result in results]
+    winners = [result for result in results if isinstance(result, str)]
+    losers = {code for code in codes if code != "ok"}
+    if len(winners) != 1:
+        failures.append(f"refresh: {len(winners)} refreshes won")
+    if losers - {"REFRESH_TOKEN_ALREADY_ROTATED"}:
+        failures.append(f"refresh: losers got {sorted(losers)}")
+    if winners and not await is_active(winners[0]):
+        failures.append("refresh: a concurrent loser revoked the winner's token")
+
+    # past the grace window the same replay is reuse
+    async with async_session() as session:
+        await session.execute(
+            text("""
+                UPDATE refresh_tokens
+                SET rotated_at = rotated_at - make_interval(secs => :seconds)
+                WHERE hashed_refresh_token = :hash
+            """),
+            {"seconds" : settings.refresh_rotation_grace_seconds + 1, "hash" : hash_refresh_token(token)},
+        )
+        await session.commit()
+    try:
+        replay = await refresh(token)
+    except Exception as e:
+        replay = e
+    if error_code(replay) != "REFRESH_TOKEN_REUSE_DETECTED":
+        failures.append(f"reuse: replay got {error_code(replay)}")
+    if winners and await is_active(winners[0]):
+        failures.append("reuse: the winner's token survived reuse detection")
+
+    return {
+        "atomic_winners" : atomic_winners,
+        "refresh_winners" : len(winners),
+        "refresh_losers" : sorted(losers),
+        "reuse" : error_code(replay),
+        "failures" : failures,
+    }
+
+async def main(concurrency : int, rounds : int) -> list[dict]:
+    user_id = uuid.uuid4()
+    try:
+        async with async_session() as session:
+            session.add(User(user_id=user_id, username=f"{SEED_PREFIX}{user_id}"))
+            await session.commit()
+        return [await race_round(user_id, concurrency) for _ in range(rounds)]
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(User).where(User.user_id == user_id))
+            await session.commit()
+        await dispose_engine()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions refreshing the same token")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args.concurrency, args.rounds))
+    failed = [result for result in results if result["failures"]]
+    print(json.dumps({
+        "concurrency" : args.concurrency,
+        "rounds" : args.rounds,
+        "grace_seconds" : settings.refresh_rotation_grace_seconds,
+        "failed_rounds" : failed,
+    }, indent=2))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,93 @@
+"""
+/refresh and /signout session lookups with the redis refresh session cache on and off.
+
+Needs the compose Postgres and Redis (same settings as the api). Seeds one
+user, then for each mode:
+- rotates a refresh token chain `--rotations` times (rotate_and_issue_tokens)
+- replays every already rotated token once (rejected, reuse detection off)
+- signs out `--rotations` fresh sessions (signout_user)
+
+usage: cd backend/src && python -m benchmarks.refresh_session_cache --rotations 500
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.auth.models import User
+from app.auth.security import hash_refresh_token
+from app.auth.service import get_refresh_token_data_by_hashed_token
+from app.auth.utils import (
+    get_refresh_session,
+    rotate_and_issue_tokens,
+    set_new_refresh_token_with_rotation,
+    signout_user,
+)
+from app.core.setting import settings
+from app.db.config import async_session
+from app.db.redis.config import create_redis
+
+
+async def timed(label : str, count : int, coro_factory) -> dict:
+    start = time.perf_counter()
+    for i in range(count):
+        await coro_factory(i)
+    elapsed = time.perf_counter() - start
+    return {label : round(count / elapsed, 1)}
+
+async def run(rotations : int, cached : bool) -> dict:
+    settings.refresh_session_cache_enabled = cached
+    redis_client = create_redis()
+    result = {"mode" : "cache on" if cached else "cache off"}
+    try:
+        async with async_session() as session:
+            user = User(username=f"bench-{uuid.uuid4()}")
+            session.add(user)
+            await session.commit()
+            
+            token, _ = await set_new_refresh_token_with_rotation(
+                session, user.user_id, "bench", rotate=False, redis_client=redis_client,
+            )
+            chain = [token]
+            
+            async def rotate(_):
+                new_token, _ = await rotate_and_issue_tokens(session, chain[-1], redis_client)
+                chain.append(new_token)
+            result |= await timed("refresh_per_s", rotations, rotate)
+            
+            # replays only need the rejection path, not reuse revocation
+            async def lookup_rotated(i):
+                refresh_session = await get_refresh_session(
+                    session, hash_refresh_token(chain[i]), redis_client,
+                )
+                assert refresh_session and refresh_session.rotated_at
+            result |= await timed("rotated_lookup_per_s", rotations, lookup_rotated)
+            
+            sessions = [
+                (await set_new_refresh_token_with_rotation(
+                    session, user.user_id, "bench", rotate=False, redis_client=redis_client,
+                ))[0]
+                for _ in range(rotations)
+            ]
+            async def signout(i):
+                await signout_user(session, sessions[i], redis_client=redis_client)
+            result |= await timed("signout_per_s", rotations, signout)
+            
+            db_row = await get_refresh_token_data_by_hashed_token(session, hash_refresh_token(sessions[0]))
+            assert db_row and db_row.revoked_at
+            
+            await session.delete(user)
+            await session.commit()
+    finally:
+        await redis_client.aclose()
+    return result
+
+async def main(rotations : int) -> None:
+    for cached in (False, True):
+        print(await run(rotations, cached))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rotations", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rotations))
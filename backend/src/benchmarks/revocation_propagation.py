@@ -0,0 +1,78 @@
+"""
+How long a session revocation takes to reach every worker's in-memory denylist.
+
+Starts `--workers` SessionDenylist instances, each on its own redis client
+like separate uvicorn workers, revokes `--revocations` sessions one by one
+through publish_revoked_sessions and records the time until every worker
+reports the session as revoked. A worker that misses the pubsub message
+still catches up on its next snapshot, so the delay is bounded by
+settings.revocation_snapshot_seconds; `--max-ms` defaults to that bound.
+
+usage: cd backend/src && python -m benchmarks.revocation_propagation --workers 4
+exit code 1 when the slowest revocation exceeds --max-ms
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from app.auth.revocation import SessionDenylist, publish_revoked_sessions
+from app.core.setting import settings
+from app.db.redis.config import create_redis
+
+
+def percentile(values : list[float], pct : float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def measure(redis_factory, workers : int, revocations : int, timeout : float) -> dict:
+    clients = [redis_factory() for _ in range(workers + 1)]
+    publisher, worker_clients = clients[0], clients[1:]
+    denylists = [SessionDenylist() for _ in worker_clients]
+    for denylist, client in zip(denylists, worker_clients):
+        await denylist.start(client)
+    
+    delays = []
+    try:
+        for _ in range(revocations):
+            session_id = str(uuid.uuid4())
+            start = time.perf_counter()
+            await publish_revoked_sessions(publisher, [session_id])
+            while not all(d.is_revoked(session_id) for d in denylists):
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"revocation of {session_id} not seen within {timeout}s")
+                await asyncio.sleep(0.0005)
+            delays.append((time.perf_counter() - start) * 1000)
+    finally:
+        for denylist in denylists:
+            await denylist.stop()
+        for client in clients:
+            await client.aclose()
+    
+    return {
+        "workers" : workers,
+        "revocations" : revocations,
+        "p50_ms" : round(percentile(delays, 0.50), 3),
+        "p99_ms" : round(percentile(delays, 0.99), 3),
+        "max_ms" : round(max(delays), 3),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--revocations", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds, default just past --max-ms")
+    parser.add_argument(
+        "--max-ms", type=float, default=None,
+        help="bound on the slowest revocation, default revocation_snapshot_seconds",
+    )
+    args = parser.parse_args()
+    max_ms = args.max_ms if args.max_ms is not None else settings.revocation_snapshot_seconds * 1000
+    timeout = args.timeout if args.timeout is not None else max_ms / 1000 + 1
+    
+    result = asyncio.run(measure(create_redis, args.workers, args.revocations, timeout))
+    result["bound_ms"] = max_ms
+    result["ok"] = result["max_ms"] <= max_ms
+    print(result)
+    sys.exit(0 if result["ok"] else 1)
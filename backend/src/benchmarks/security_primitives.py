@@ -0,0 +1,205 @@
+"""
+Microbenchmarks for the app.auth.security primitives, checked against a
+stored baseline.
+
+Cases: hash_password and verify_password with the configured argon2
+parameters, verify_password on a hash with older parameters (verify +
+needs_update + rehash), generate/decode_access_token, generate/hash_refresh_token
+and generate_numeric_otp. Each case reports the best per-call wall and CPU time over
+--repeats rounds (argon2 runs its lanes on threads, so CPU time can exceed wall
+time on multi-core machines).
+
+The report also derives the signin capacity per core from the CPU cost of
+one /email/signin (verify_password + otp + otp hash) plus one /email/verify
+(tokens + refresh token hash); argon2 is nearly all of it.
+
+Baselines are machine specific: compare on the machine that wrote them.
+
+usage: cd backend/src && python -m benchmarks.security_primitives
+       python -m benchmarks.security_primitives --tolerance 0.15
+       python -m benchmarks.security_primitives --update-baseline
+exit code 1 when any case is slower than baseline * (1 + tolerance)
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.auth.security import (
+    _pwd_ctx,
+    decode_access_token,
+    generate_access_token,
+    generate_numeric_otp,
+    generate_refresh_token,
+    get_otp_hasher,
+    hash_password,
+    hash_refresh_token,
+    verify_password,
+)
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "security_primitives.json"
+PASSWORD = "correct horse battery staple"
+
+def argon2_params() -> dict:
+    handler = _pwd_ctx.handler("argon2")
+    return {
+        "type" : handler.type,
+        "time_cost" : handler.default_rounds,
+        "memory_cost_kib" : handler.memory_cost,
+        "parallelism" : handler.parallelism,
+    }
+
+def outdated_hash() -> str:
+    # weaker than the configured parameters, so needs_update() is true
+    handler = _pwd_ctx.handler("argon2")
+    outdated = handler.using(
+        memory_cost=max(8 * handler.parallelism, handler.memory_cost // 2),
+        rounds=max(1, handler.default_rounds - 1),
+    ).hash(PASSWORD)
+    assert _pwd_ctx.needs_update(outdated)
+    return outdated
+
+def cases() -> dict:
+    current_hash = hash_password(PASSWORD)
+    legacy_hash = outdated_hash()
+    access_token = generate_access_token(str(uuid.uuid4()), str(uuid.uuid4()))
+    refresh_token = generate_refresh_token()
+
+    def verify_outdated():
+        valid, new_hash = verify_password(PASSWORD, legacy_hash)
+        assert valid and new_hash
+
+    return {
+        "hash_password" : lambda: hash_password(PASSWORD),
+        "verify_password" : lambda: verify_password(PASSWORD, current_hash),
+        "verify_password_needs_update" : verify_outdated,
+        "generate_access_token" : lambda: generate_access_token("user", "session"),
+        "decode_access_token" : lambda: decode_access_token(access_token),
+        "generate_refresh_token" : generate_refresh_token,
+        "hash_refresh_token" : lambda: hash_refresh_token(refresh_token),
+        "generate_numeric_otp" : generate_numeric_otp,
+    }
+
+def measure(fn, repeats : int, min_time : float) -> dict:
+    # calibrate so one round takes at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2 if number < 16 else 4
+
+    best_wall = best_cpu = float("inf")
+    for _ in range(repeats):
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(number):
+            fn()
+        best_wall = min(best_wall, (time.perf_counter() - wall) / number)
+        best_cpu = min(best_cpu, (time.process_time() - cpu) / number)
+    return {
+        "wall_us" : round(best_wall * 1e6, 2),
+        "cpu_us" : round(best_cpu * 1e6, 2),
+        "calls_per_round" : number,
+    }
+
+def otp_hash_cpu_us(results : dict, repeats : int, min_time : float) -> float:
+    hasher = get_otp_hasher()
+    if hasher.scheme == "argon2":
+        return results["hash_password"]["cpu_us"]
+
+    def hash_otp():
+        # the hmac hasher never suspends, drive the coroutine by hand
+        coro = hasher.hash("123456")
+        try:
+            coro.send(None)
+        except StopIteration:
+            return
+        raise RuntimeError("otp hasher suspended")
+    return measure(hash_otp, repeats, min_time)["cpu_us"]
+
+def signin_capacity(results : dict, repeats : int, min_time : float) -> dict:
+    otp_hash_us = otp_hash_cpu_us(results, repeats, min_time)
+    signin_cpu_us = (
+        results["verify_password"]["cpu_us"]
+        + results["generate_numeric_otp"]["cpu_us"]
+        + otp_hash_us
+        # /email/verify
+        + results["generate_access_token"]["cpu_us"]
+        + results["generate_refresh_token"]["cpu_us"]
+        + results["hash_refresh_token"]["cpu_us"]
+    )
+    return {
+        "argon2" : argon2_params(),
+        "otp_hash_scheme" : get_otp_hasher().scheme,
+        "cpu_us_per_signin" : round(signin_cpu_us, 2),
+        "argon2_share" : round(results["verify_password"]["cpu_us"] / signin_cpu_us, 4),
+        "signins_per_second_per_core" : round(1e6 / signin_cpu_us, 1),
+        # every concurrent argon2 hash holds memory_cost of RAM
+        "memory_mib_per_concurrent_hash" : round(argon2_params()["memory_cost_kib"] / 1024, 1),
+    }
+
+def compare(results : dict, baseline : dict, tolerance : float) -> list[dict]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["cpu_us"] / base["cpu_us"] if base["cpu_us"] else 1.0
+        result["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "case" : name,
+                "baseline_cpu_us" : base["cpu_us"],
+                "cpu_us" : result["cpu_us"],
+                "ratio" : round(ratio, 3),
+            })
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {name : measure(fn, args.repeats, args.min_time) for name, fn in cases().items()}
+    report = {
+        "machine" : {
+            "platform" : platform.platform(),
+            "processor" : platform.processor() or platform.machine(),
+            "python" : platform.python_version(),
+        },
+        "results" : results,
+        "signin_capacity" : signin_capacity(results, args.repeats, args.min_time),
+    }
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        report["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(json.dumps(report, indent=2))
+        return 0
+
+    regressions = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        report["baseline_machine"] = baseline.get("machine")
+        report["tolerance"] = args.tolerance
+        report["regressions"] = regressions
+    else:
+        report["baseline"] = f"{args.baseline} not found, run with --update-baseline"
+
+    print(json.dumps(report, indent=2))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())